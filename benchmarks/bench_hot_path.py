@@ -0,0 +1,380 @@
+"""Benchmark the reporting hot path.
+
+Measures, against a fake ``hass.states`` and a local rapportera.php
+stand-in running in a separate process:
+
+* ``readings``: cost of parsing one source state change into the cache
+* ``tick``: CPU time, allocations, HTTP round trip and event-loop lag of
+  one reporting tick, scaling the number of entries and of sources
+* ``aggregation``: cost of each aggregation method at report time, with
+  every source holding several samples in the window
+* ``units``: cost of converting Fahrenheit sources to Celsius when a
+  state changes, and that a report costs the same whatever the units
+* ``attributes``: cost of building the sensor state and attributes after
+  a report, and of reading them back
+* ``setup_unload``: cost of the integration's own per-entry setup and
+  teardown (excluding Home Assistant's config entry machinery)
+
+Usage::
+
+    python benchmarks/bench_hot_path.py --output bench.json
+
+Results are written as JSON so runs from different releases can be
+compared.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from common import (
+    FakeEntry,
+    FakeHass,
+    LoopLagProbe,
+    entry_data,
+    parse_counts,
+    percentile,
+    stand_in_server,
+    write_results,
+)
+from homeassistant.core import State
+from homeassistant.util import dt as dt_util
+
+from custom_components.rapportera_temp import reporter as reporter_module
+from custom_components.rapportera_temp.client import ReportClient
+from custom_components.rapportera_temp.config_flow import AGGREGATION_OPTIONS
+from custom_components.rapportera_temp.models import (
+    EntrySettings,
+    RapporteraTempData,
+    ReportState,
+)
+from custom_components.rapportera_temp.multiplexer import SourceSlot
+from custom_components.rapportera_temp.readings import SourceReadings
+from custom_components.rapportera_temp.reporter import TemperatureReporter
+from custom_components.rapportera_temp.scheduler import async_get_scheduler
+from custom_components.rapportera_temp.sensor import (
+    RapporteraTempStatusSensor,
+    RapporteraTempTemperatureSensor,
+)
+
+AGGREGATION_METHODS = [option["value"] for option in AGGREGATION_OPTIONS]
+
+
+def _create_station(
+    hass: FakeHass, client: ReportClient, index: int, source_count: int
+) -> tuple[FakeEntry, TemperatureReporter]:
+    """Create sources, reading cache and reporter for one station."""
+    sources = [f"sensor.station{index}_t{source}" for source in range(source_count)]
+    for offset, entity_id in enumerate(sources):
+        hass.states.set(entity_id, f"{10 + offset * 0.1:.1f}")
+    entry = FakeEntry(f"entry{index}", entry_data(index, sources))
+    settings = EntrySettings.from_entry_data(entry.data)
+    state = ReportState()
+    readings = SourceReadings(hass, sources, 300)
+    for entity_id in sources:
+        # Feed the cache the way the multiplexer does
+        slot = SourceSlot(entity_id)
+        slot.async_set(hass.states.get(entity_id))
+        readings._async_set(slot)
+    reporter = TemperatureReporter(hass, entry, client, settings, readings, state)
+    entry.runtime_data = RapporteraTempData(settings, state, readings, reporter)
+    return entry, reporter
+
+
+async def bench_readings(source_count: int, updates: int) -> dict:
+    """Measure the cost of one source state change."""
+    hass = FakeHass()
+    sources = [f"sensor.t{source}" for source in range(source_count)]
+    readings = SourceReadings(hass, sources, 300)
+    slots = {entity_id: SourceSlot(entity_id) for entity_id in sources}
+    for slot in slots.values():
+        slot.subscribers.append(readings._async_set)
+    states = [
+        State(sources[step % source_count], f"{(step * 7) % 300 / 10 - 10:.1f}")
+        for step in range(updates)
+    ]
+
+    cpu = time.process_time()
+    for state in states:
+        slots[state.entity_id].async_set(state)
+    cpu = time.process_time() - cpu
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for state in states[:1000]:
+        slots[state.entity_id].async_set(state)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "benchmark": "readings",
+        "sources": source_count,
+        "updates": updates,
+        "cpu_us_per_update": cpu / updates * 1e6,
+        "retained_bytes_per_update": (after - before) / min(updates, 1000),
+        "peak_bytes": peak - before,
+    }
+
+
+async def bench_tick(url: str, entry_count: int, source_count: int, ticks: int) -> dict:
+    """Measure reporting ticks of entry_count stations concurrently."""
+    hass = FakeHass()
+    client = ReportClient()
+    reporters = [
+        _create_station(hass, client, index, source_count)[1]
+        for index in range(entry_count)
+    ]
+
+    round_trips: list[float] = []
+    http_get = client.async_get
+
+    async def timed_get(request_url: str, **kwargs) -> tuple[int, str]:
+        start = time.perf_counter()
+        try:
+            return await http_get(request_url, **kwargs)
+        finally:
+            round_trips.append(time.perf_counter() - start)
+
+    client.async_get = timed_get
+    reporter_module.REPORT_URL = url
+
+    async def tick() -> None:
+        await asyncio.gather(*(reporter.async_report() for reporter in reporters))
+
+    # Warm up the connection pool
+    await tick()
+    round_trips.clear()
+
+    cpu_times, wall_times = [], []
+    with LoopLagProbe() as probe:
+        for _ in range(ticks):
+            cpu = time.process_time()
+            wall = time.perf_counter()
+            await tick()
+            wall_times.append(time.perf_counter() - wall)
+            cpu_times.append(time.process_time() - cpu)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await tick()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    failures = sum(
+        1 for reporter in reporters if reporter.state.status != "success"
+    )
+    await client.async_close()
+
+    return {
+        "benchmark": "tick",
+        "entries": entry_count,
+        "sources": source_count,
+        "ticks": ticks,
+        "cpu_ms_per_tick": statistics.fmean(cpu_times) * 1000,
+        "cpu_us_per_entry": statistics.fmean(cpu_times) / entry_count * 1e6,
+        "wall_ms_per_tick": statistics.fmean(wall_times) * 1000,
+        "alloc_peak_bytes_per_tick": peak - before,
+        "retained_bytes_per_tick": after - before,
+        "http_rtt_ms_mean": statistics.fmean(round_trips) * 1000 if round_trips else 0.0,
+        "http_rtt_ms_p95": percentile(round_trips, 0.95) * 1000,
+        "failures": failures,
+        **probe.summary(),
+    }
+
+
+async def bench_aggregation(source_count: int, reports: int) -> dict:
+    """Measure the report-time cost of every aggregation method."""
+    hass = FakeHass()
+    sources = [f"sensor.t{source}" for source in range(source_count)]
+    readings = SourceReadings(hass, sources, 300)
+    # Four samples per source inside the window, a few of them outliers
+    start = time.time() - 240
+    for sample in range(4):
+        for index, entity_id in enumerate(sources):
+            value = 30.0 if index % 50 == 0 else 5 + (index * 7 + sample) % 20 / 10
+            state = State(entity_id, f"{value:.1f}")
+            state.last_updated = dt_util.utc_from_timestamp(start + sample * 60)
+            slot = SourceSlot(entity_id)
+            slot.async_set(state)
+            readings._async_set(slot)
+
+    results: dict[str, float] = {}
+    now = time.time()
+    for method in AGGREGATION_METHODS:
+        cpu = time.process_time()
+        for _ in range(reports):
+            readings.aggregate(method, now)
+        results[f"{method}_us"] = (time.process_time() - cpu) / reports * 1e6
+
+    return {
+        "benchmark": "aggregation",
+        "sources": source_count,
+        "samples": readings.window.sample_count,
+        "reports": reports,
+        **results,
+    }
+
+
+async def bench_units(source_count: int, updates: int, reports: int) -> dict:
+    """Measure converting source readings to Celsius.
+
+    Compares Celsius sources with Fahrenheit ones whose attributes object
+    is reused between states, as the state machine does, and with
+    Fahrenheit ones whose attributes change on every update, which makes
+    the slot look the unit up again each time. The report reads the
+    converted values, so its cost must not depend on the unit.
+    """
+    sources = [f"sensor.t{source}" for source in range(source_count)]
+    results: dict[str, float] = {}
+    for label, unit, shared in (
+        ("celsius", "°C", True),
+        ("fahrenheit", "°F", True),
+        ("fahrenheit_new_attributes", "°F", False),
+    ):
+        readings = SourceReadings(FakeHass(), sources, 300)
+        slots = {entity_id: SourceSlot(entity_id) for entity_id in sources}
+        for slot in slots.values():
+            slot.subscribers.append(readings._async_set)
+        attributes = State(sources[0], "0", {"unit_of_measurement": unit}).attributes
+        states = [
+            State(
+                sources[step % source_count],
+                f"{(step * 7) % 300 / 10 + 20:.1f}",
+                attributes if shared else {"unit_of_measurement": unit},
+            )
+            for step in range(updates)
+        ]
+
+        cpu = time.process_time()
+        for state in states:
+            slots[state.entity_id].async_set(state)
+        results[f"{label}_us_per_update"] = (time.process_time() - cpu) / updates * 1e6
+
+        now = time.time()
+        cpu = time.process_time()
+        for _ in range(reports):
+            readings.aggregate("min", now, readings.statistics())
+        results[f"{label}_us_per_report"] = (time.process_time() - cpu) / reports * 1e6
+
+    return {
+        "benchmark": "units",
+        "sources": source_count,
+        "updates": updates,
+        "reports": reports,
+        **results,
+    }
+
+
+async def bench_attributes(source_count: int, reads: int) -> dict:
+    """Measure building the sensor state and attributes."""
+    hass = FakeHass()
+    client = ReportClient()
+    entry, reporter = _create_station(hass, client, 0, source_count)
+    reporter.state.sensor_temperatures = reporter.readings.sensor_temperatures()
+    reporter.state.temperature = 10.0
+    status = RapporteraTempStatusSensor(entry.runtime_data, entry)
+    temperature = RapporteraTempTemperatureSensor(entry.runtime_data, entry)
+
+    cpu = time.process_time()
+    for _ in range(reads):
+        status._async_update_from_data()
+        temperature._async_update_from_data()
+    update = time.process_time() - cpu
+
+    cpu = time.process_time()
+    for _ in range(reads):
+        status.state
+        status.icon
+        status.extra_state_attributes
+        temperature.native_value
+        temperature.available
+        temperature.extra_state_attributes
+    cpu = time.process_time() - cpu
+
+    return {
+        "benchmark": "attributes",
+        "sources": source_count,
+        "reads": reads,
+        "cpu_us_per_update": update / reads * 1e6,
+        "cpu_us_per_read": cpu / reads * 1e6,
+    }
+
+
+async def bench_setup_unload(entry_count: int, source_count: int) -> dict:
+    """Measure the integration's own per-entry setup and teardown."""
+    hass = FakeHass()
+    client = ReportClient()
+
+    cpu = time.process_time()
+    removers = []
+    for index in range(entry_count):
+        entry, reporter = _create_station(hass, client, index, source_count)
+        removers.append(
+            async_get_scheduler(hass).async_add(
+                entry.entry_id, 300, entry.data["hash_code"], reporter.async_tick
+            )
+        )
+    setup = time.process_time() - cpu
+
+    cpu = time.process_time()
+    for remove in removers:
+        remove()
+    unload = time.process_time() - cpu
+
+    # Memory held per entry by the reporter, reading cache and runtime data
+    hass = FakeHass()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    stations = [
+        _create_station(hass, client, index, source_count)
+        for index in range(entry_count)
+    ]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del stations
+
+    return {
+        "benchmark": "setup_unload",
+        "entries": entry_count,
+        "sources": source_count,
+        "setup_us_per_entry": setup / entry_count * 1e6,
+        "unload_us_per_entry": unload / entry_count * 1e6,
+        "retained_bytes_per_entry": (after - before) / entry_count,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the benchmarks."""
+    results = []
+    for source_count in args.sources:
+        results.append(await bench_readings(source_count, args.updates))
+        results.append(await bench_aggregation(source_count, args.reports))
+        results.append(await bench_units(source_count, args.updates, args.reports))
+        results.append(await bench_attributes(source_count, args.updates))
+    for entry_count in args.entries:
+        results.append(await bench_setup_unload(entry_count, 3))
+
+    async with stand_in_server(latency=args.latency) as url:
+        for entry_count in args.entries:
+            results.append(await bench_tick(url, entry_count, 3, args.ticks))
+        for source_count in args.sources:
+            results.append(await bench_tick(url, 1, source_count, args.ticks))
+
+    write_results(args.output, "hot_path", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=parse_counts, default=[1, 10, 100, 1000])
+    parser.add_argument("--sources", type=parse_counts, default=[1, 3, 30, 500])
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--updates", type=int, default=10000)
+    parser.add_argument("--reports", type=int, default=1000)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="stand-in response delay (s)"
+    )
+    parser.add_argument("--output", help="write JSON results to this file")
+    asyncio.run(main(parser.parse_args()))
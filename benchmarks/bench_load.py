@@ -0,0 +1,228 @@
+"""Load-test many stations in one Home Assistant instance.
+
+Sets up N config entries, each aggregating M source sensors, in a real
+Home Assistant core (the test harness from
+pytest-homeassistant-custom-component, with a temporary configuration
+directory) and reports against a rapportera.php stand-in running in its
+own process with configurable latency and error rate. While the
+scheduler reports on its normal wall-clock grid, every source updates
+at random with the given mean interval, like outdoor sensors do.
+
+For each N it measures:
+
+* ``setup``/``unload``: wall time of ``async_setup``/``async_unload`` of
+  each config entry, including the sensor platform
+* ``rss_bytes_per_entry``: growth of the resident set while the entries
+  were set up
+* ``loop_lag``: how late the event loop woke up a 1 ms sleeper during the
+  run
+* throughput: reports, HTTP requests and source state changes handled
+  per second, and the report outcomes
+
+Usage::
+
+    python benchmarks/bench_load.py --entries 10,100,1000 --output load.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import resource
+import statistics
+import tempfile
+import time
+
+from common import (
+    LoopLagProbe,
+    entry_data,
+    parse_counts,
+    percentile,
+    stand_in_server,
+    write_results,
+)
+from homeassistant import loader
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.rapportera_temp import reporter as reporter_module
+from custom_components.rapportera_temp.const import DOMAIN
+from custom_components.rapportera_temp.metrics import OUTCOMES
+
+# Source updates are applied in batches this many seconds apart
+UPDATE_TICK = 0.1
+
+
+def _rss_bytes() -> int:
+    """Return the resident set size of this process."""
+    with contextlib.suppress(OSError):
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    # Peak instead of current size where /proc is not available
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _timings(samples: list[float]) -> dict:
+    """Return summary statistics of durations in milliseconds."""
+    return {
+        "total_s": sum(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p95_ms": percentile(samples, 0.95) * 1000,
+        "max_ms": max(samples) * 1000,
+    }
+
+
+async def _update_sources(
+    hass, sources: list[str], update_interval: float, rng: random.Random
+) -> int:
+    """Update random sources at the given mean interval until cancelled."""
+    updates = 0
+    # Expected state changes per batch, with the fraction carried over
+    rate = len(sources) * UPDATE_TICK / update_interval
+    carry = 0.0
+    values = {entity_id: rng.uniform(-5, 15) for entity_id in sources}
+    try:
+        while True:
+            await asyncio.sleep(UPDATE_TICK)
+            carry += rate
+            batch, carry = int(carry), carry % 1
+            for entity_id in rng.sample(sources, min(batch, len(sources))):
+                values[entity_id] += rng.gauss(0, 0.1)
+                hass.states.async_set(
+                    entity_id,
+                    f"{values[entity_id]:.1f}",
+                    {"unit_of_measurement": "°C", "device_class": "temperature"},
+                )
+            updates += batch
+    except asyncio.CancelledError:
+        return updates
+
+
+async def run_load(
+    url: str, entry_count: int, source_count: int, args: argparse.Namespace
+) -> dict:
+    """Set up entry_count stations, run them for a while and unload them."""
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as config_dir:
+        async with async_test_home_assistant(storage_dir=config_dir) as hass:
+            # Let the loader find the integration in custom_components
+            hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+            reporter_module.REPORT_URL = url
+            assert await async_setup_component(hass, DOMAIN, {})
+
+            sources = []
+            entries = []
+            for index in range(entry_count):
+                station = [
+                    f"sensor.station{index}_t{source}" for source in range(source_count)
+                ]
+                for entity_id in station:
+                    hass.states.async_set(entity_id, f"{rng.uniform(-5, 15):.1f}")
+                sources.extend(station)
+                entry = MockConfigEntry(
+                    domain=DOMAIN,
+                    title=f"Station {index}",
+                    data=entry_data(index, station, interval=args.interval),
+                )
+                entry.add_to_hass(hass)
+                entries.append(entry)
+            await hass.async_block_till_done()
+
+            setup_times = []
+            rss = _rss_bytes()
+            for entry in entries:
+                start = time.perf_counter()
+                assert await hass.config_entries.async_setup(entry.entry_id)
+                setup_times.append(time.perf_counter() - start)
+            await hass.async_block_till_done()
+            rss = _rss_bytes() - rss
+
+            reporters = [entry.runtime_data.reporter for entry in entries]
+            before = [reporter.metrics.as_dict() for reporter in reporters]
+            updater = hass.async_create_background_task(
+                _update_sources(hass, sources, args.update_interval, rng), "updater"
+            )
+            start = time.perf_counter()
+            with LoopLagProbe() as probe:
+                await asyncio.sleep(args.duration)
+            elapsed = time.perf_counter() - start
+            updater.cancel()
+            updates = await updater
+            after = [reporter.metrics.as_dict() for reporter in reporters]
+
+            outcomes = dict.fromkeys(OUTCOMES, 0)
+            requests = 0
+            for old, new in zip(before, after):
+                requests += new["requests"] - old["requests"]
+                for outcome in OUTCOMES:
+                    outcomes[outcome] += (
+                        new["outcomes"][outcome] - old["outcomes"][outcome]
+                    )
+            reports = sum(outcomes.values()) - outcomes["queued"]
+            slowest = max(reporter.metrics.total.stats[1] for reporter in reporters)
+
+            unload_times = []
+            for entry in entries:
+                start = time.perf_counter()
+                assert await hass.config_entries.async_unload(entry.entry_id)
+                unload_times.append(time.perf_counter() - start)
+            await hass.async_block_till_done()
+            await hass.async_stop(force=True)
+
+    lags = probe.lags or [0.0]
+    return {
+        "benchmark": "load",
+        "entries": entry_count,
+        "sources_per_entry": source_count,
+        "interval_minutes": args.interval,
+        "update_interval_s": args.update_interval,
+        "latency_s": args.latency,
+        "error_rate": args.error_rate,
+        "duration_s": elapsed,
+        "setup": _timings(setup_times),
+        "unload": _timings(unload_times),
+        "rss_bytes_per_entry": rss / entry_count,
+        "loop_lag_ms_mean": statistics.fmean(lags) * 1000,
+        "loop_lag_ms_p99": percentile(lags, 0.99) * 1000,
+        "loop_lag_ms_max": max(lags) * 1000,
+        "reports_per_s": reports / elapsed,
+        "requests_per_s": requests / elapsed,
+        "state_changes_per_s": updates / elapsed,
+        "report_ms_max": slowest * 1000,
+        "outcomes": outcomes,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the load test for every entry count."""
+    results = []
+    async with stand_in_server(latency=args.latency, error_rate=args.error_rate) as url:
+        for entry_count in args.entries:
+            results.append(await run_load(url, entry_count, args.sources, args))
+    write_results(args.output, "load", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=parse_counts, default=[10, 100, 1000])
+    parser.add_argument("--sources", type=int, default=3, help="per entry")
+    parser.add_argument("--interval", type=int, default=1, help="minutes")
+    parser.add_argument(
+        "--update-interval", type=float, default=30.0,
+        help="mean seconds between updates of one source",
+    )
+    parser.add_argument("--duration", type=float, default=130.0, help="seconds")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="stand-in response delay (s)"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.01, help="fraction of HTTP 500 answers"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON results to this file")
+    asyncio.run(main(parser.parse_args()))
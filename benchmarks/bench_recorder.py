@@ -0,0 +1,196 @@
+"""Estimate what the integration's entities write to the recorder per day.
+
+Simulates a day of reports for one station and counts, per entity, the
+``states`` rows and the distinct ``state_attributes`` rows the recorder
+would store, along with the bytes of the state strings and of the JSON
+encoded attributes. Attributes are encoded the way the recorder does it,
+once with every attribute (``before``) and once leaving out the entity's
+unrecorded attributes (``after``).
+
+The recorder writes a ``states`` row for every state change event, which
+Home Assistant fires when either the state or any attribute changed, so
+unrecorded attributes still trigger rows; they stop adding a new
+``state_attributes`` row each time. Fixed per-row overhead (ids,
+timestamps, indexes) depends on the database and is not included.
+
+Usage::
+
+    python benchmarks/bench_recorder.py --output recorder.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+import random
+
+from common import FakeEntry, FakeHass, entry_data, parse_counts, write_results
+from homeassistant.const import ATTR_ATTRIBUTION, ATTR_RESTORED, ATTR_SUPPORTED_FEATURES
+from homeassistant.helpers.json import json_bytes
+
+from custom_components.rapportera_temp.client import ReportClient
+from custom_components.rapportera_temp.models import (
+    EntrySettings,
+    RapporteraTempData,
+    ReportState,
+)
+from custom_components.rapportera_temp.readings import SourceReadings
+from custom_components.rapportera_temp.reporter import TemperatureReporter, truncate_message
+from custom_components.rapportera_temp.sensor import (
+    RapporteraTempStatusSensor,
+    RapporteraTempTemperatureSensor,
+)
+
+# Attributes the recorder never stores for any domain
+ALL_DOMAIN_EXCLUDE_ATTRS = {ATTR_ATTRIBUTION, ATTR_RESTORED, ATTR_SUPPORTED_FEATURES}
+
+# A failure message as the reporter builds it, including the request URL
+FAILURE_MESSAGE = (
+    "Error reporting temperature: Cannot connect to host www.temperatur.nu:80 "
+    "ssl:default [Connect call failed ('{address}', 80)]. "
+    "URL: http://www.temperatur.nu/rapportera.php?hash={hash}&t={temperature:.1f}"
+)
+
+
+class RecorderTally:
+    """Rows and bytes the recorder would write for one entity."""
+
+    def __init__(self, exclude: set[str]) -> None:
+        """Initialize the tally."""
+        self.exclude = exclude
+        self.previous: tuple[str, bytes] | None = None
+        self.shared_attrs: set[bytes] = set()
+        self.state_rows = 0
+        self.state_bytes = 0
+        self.attribute_bytes = 0
+
+    def record(self, state: str, attributes: dict) -> None:
+        """Count the rows written for one state write."""
+        shared = json_bytes(
+            {key: value for key, value in attributes.items() if key not in self.exclude}
+        )
+        # Home Assistant only fires a state change when something changed;
+        # the unfiltered attributes decide that, not the recorded ones
+        current = (state, json_bytes(attributes))
+        if current == self.previous:
+            return
+        self.previous = current
+        self.state_rows += 1
+        self.state_bytes += len(state)
+        if shared not in self.shared_attrs:
+            self.shared_attrs.add(shared)
+            self.attribute_bytes += len(shared)
+
+    def summary(self) -> dict:
+        """Return the tally."""
+        return {
+            "states_rows": self.state_rows,
+            "state_attributes_rows": len(self.shared_attrs),
+            "state_bytes": self.state_bytes,
+            "attribute_bytes": self.attribute_bytes,
+            "total_bytes": self.state_bytes + self.attribute_bytes,
+        }
+
+
+def simulate(
+    days: float, interval: int, source_count: int, failure_rate: float, seed: int
+) -> list[dict]:
+    """Simulate reports and tally recorder writes for each entity."""
+    rng = random.Random(seed)
+    hass = FakeHass()
+    sources = [f"sensor.outdoor_{index}" for index in range(source_count)]
+    entry = FakeEntry("entry0", entry_data(0, sources, interval=interval))
+    settings = EntrySettings.from_entry_data(entry.data)
+    report = ReportState()
+    readings = SourceReadings(hass, sources, interval * 60)
+    reporter = TemperatureReporter(hass, entry, ReportClient(), settings, readings, report)
+    runtime = RapporteraTempData(settings, report, readings, reporter)
+    entities = [
+        RapporteraTempStatusSensor(runtime, entry),
+        RapporteraTempTemperatureSensor(runtime, entry),
+    ]
+    tallies = {
+        entity: {
+            "before": RecorderTally(ALL_DOMAIN_EXCLUDE_ATTRS),
+            "after": RecorderTally(
+                ALL_DOMAIN_EXCLUDE_ATTRS
+                | entity._unrecorded_attributes
+                | entity._entity_component_unrecorded_attributes
+            ),
+        }
+        for entity in entities
+    }
+
+    temperatures = [rng.uniform(-5, 15) for _ in sources]
+    now = datetime(2026, 1, 1)
+    reports = int(days * 86400 / (interval * 60))
+    for _ in range(reports):
+        now += timedelta(minutes=interval)
+        # Outdoor temperatures drift slowly between reports
+        temperatures = [value + rng.gauss(0, 0.15) for value in temperatures]
+        report.sensor_temperatures = {
+            entity_id: round(value, 1) for entity_id, value in zip(sources, temperatures)
+        }
+        reported = round(min(temperatures), 1)
+        report.temperature = reported
+        report.time = now
+        if rng.random() < failure_rate:
+            report.status = "failed"
+            report.message = truncate_message(
+                FAILURE_MESSAGE.format(
+                    address=f"93.184.{rng.randrange(256)}.{rng.randrange(256)}",
+                    hash=entry.data["hash_code"],
+                    temperature=reported,
+                )
+            )
+        else:
+            report.status = "success"
+            report.message = "ok"
+            report.reported_temperature = reported
+
+        for entity in entities:
+            entity._async_update_from_data()
+            state = str(entity.native_value)
+            attributes = entity.extra_state_attributes
+            for tally in tallies[entity].values():
+                tally.record(state, attributes)
+
+    return [
+        {
+            "benchmark": "recorder",
+            "entity": type(entity).__name__,
+            "days": days,
+            "interval_minutes": interval,
+            "sources": source_count,
+            "failure_rate": failure_rate,
+            "reports": reports,
+            "before": {
+                key: value / days for key, value in tallies[entity]["before"].summary().items()
+            },
+            "after": {
+                key: value / days for key, value in tallies[entity]["after"].summary().items()
+            },
+        }
+        for entity in entities
+    ]
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the simulation."""
+    results = []
+    for source_count in args.sources:
+        results.extend(
+            simulate(args.days, args.interval, source_count, args.failure_rate, args.seed)
+        )
+    write_results(args.output, "recorder", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=float, default=1.0)
+    parser.add_argument("--interval", type=int, default=5, help="minutes")
+    parser.add_argument("--sources", type=parse_counts, default=[1, 3, 10])
+    parser.add_argument("--failure-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON results to this file")
+    asyncio.run(main(parser.parse_args()))
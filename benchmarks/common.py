@@ -0,0 +1,205 @@
+"""Shared helpers for the RapporteraTempHA benchmarks.
+
+Provides a minimal stand-in for the parts of ``hass`` the reporting hot
+path touches, a rapportera.php stand-in server that runs in its own
+process so its CPU time is not billed to the integration, and small
+measurement utilities.
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+import json
+import multiprocessing
+import os
+from pathlib import Path
+import platform
+import statistics
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from homeassistant.core import State  # noqa: E402
+
+
+class FakeStates:
+    """Dict-backed replacement for ``hass.states``."""
+
+    def __init__(self) -> None:
+        """Initialize the state machine."""
+        self._states: dict[str, State] = {}
+
+    def get(self, entity_id: str) -> State | None:
+        """Return the state of an entity."""
+        return self._states.get(entity_id)
+
+    def set(self, entity_id: str, value: str, attributes: dict | None = None) -> State:
+        """Set and return a new state for an entity."""
+        state = self._states[entity_id] = State(entity_id, value, attributes)
+        return state
+
+
+class FakeConfig:
+    """Replacement for ``hass.config``."""
+
+    def __init__(self, config_dir: str) -> None:
+        """Initialize the config."""
+        self.config_dir = config_dir
+
+    def path(self, *parts: str) -> str:
+        """Return a path inside the config directory."""
+        return os.path.join(self.config_dir, *parts)
+
+
+class FakeHass:
+    """Minimal ``hass`` with just what the reporting hot path uses."""
+
+    def __init__(self, config_dir: str = "/tmp") -> None:
+        """Initialize the fake."""
+        self.loop = asyncio.get_running_loop()
+        self.states = FakeStates()
+        self.data: dict = {}
+        self.config = FakeConfig(config_dir)
+
+    def async_create_task(self, target, name=None, eager_start=False):
+        """Schedule a coroutine on the loop."""
+        return self.loop.create_task(target, name=name)
+
+    def async_create_background_task(self, target, name, eager_start=False):
+        """Schedule a background coroutine on the loop."""
+        return self.loop.create_task(target, name=name)
+
+
+class FakeEntry:
+    """Replacement for a ``ConfigEntry``."""
+
+    def __init__(self, entry_id: str, data: dict) -> None:
+        """Initialize the entry."""
+        self.entry_id = entry_id
+        self.title = data.get("entity_name", entry_id)
+        self.data = data
+        self.options: dict = {}
+        self.runtime_data = None
+
+
+def entry_data(index: int, sources: list[str], **extra) -> dict:
+    """Return config entry data for a benchmark station."""
+    return {
+        "hash_code": f"hash{index:05d}",
+        "sensor_entity_ids": sources,
+        "aggregation_method": "min",
+        "entity_name": f"Station {index}",
+        "interval": 5,
+        **extra,
+    }
+
+
+def _serve(port_queue, latency: float, error_rate: float) -> None:
+    """Run the rapportera.php stand-in until terminated."""
+    import random
+
+    from aiohttp import web
+
+    async def rapportera(request):
+        if latency:
+            await asyncio.sleep(latency)
+        if error_rate and random.random() < error_rate:
+            return web.Response(status=500, text="error")
+        return web.Response(text="ok")
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/rapportera.php", rapportera)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, backlog=4096)
+        await site.start()
+        port_queue.put(site._server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
+
+
+@asynccontextmanager
+async def stand_in_server(latency: float = 0.0, error_rate: float = 0.0):
+    """Run a rapportera.php stand-in in a separate process and yield its URL."""
+    context = multiprocessing.get_context("spawn")
+    port_queue = context.Queue()
+    process = context.Process(
+        target=_serve, args=(port_queue, latency, error_rate), daemon=True
+    )
+    process.start()
+    try:
+        port = await asyncio.get_running_loop().run_in_executor(
+            None, port_queue.get, True, 30
+        )
+        yield f"http://127.0.0.1:{port}/rapportera.php"
+    finally:
+        process.terminate()
+        process.join()
+
+
+class LoopLagProbe:
+    """Measure how late the event loop wakes up a periodic sleeper."""
+
+    def __init__(self, period: float = 0.001) -> None:
+        """Initialize the probe."""
+        self.period = period
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.period)
+            self.lags.append(time.perf_counter() - start - self.period)
+
+    def __enter__(self) -> LoopLagProbe:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._task.cancel()
+
+    def summary(self) -> dict:
+        """Return lag statistics in milliseconds."""
+        lags = self.lags or [0.0]
+        return {
+            "loop_lag_ms_mean": statistics.fmean(lags) * 1000,
+            "loop_lag_ms_max": max(lags) * 1000,
+        }
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Return the given percentile of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def parse_counts(text: str) -> list[int]:
+    """Parse a comma-separated list of counts."""
+    return [int(part) for part in text.split(",") if part]
+
+
+def write_results(path: str | None, name: str, results: list[dict]) -> None:
+    """Write machine-readable results as JSON, to a file or stdout."""
+    manifest = json.loads(
+        (ROOT / "custom_components" / "rapportera_temp" / "manifest.json").read_text()
+    )
+    document = {
+        "benchmark": name,
+        "version": manifest["version"],
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+    text = json.dumps(document, indent=2)
+    if path:
+        Path(path).write_text(text + "\n")
+    else:
+        print(text)
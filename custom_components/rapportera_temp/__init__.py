@@ -1,155 +1,249 @@
 """Report Temperature to Temperatur.nu integration."""
 import logging
+import os
 from datetime import datetime, timedelta
-import statistics
+from functools import partial
 
-from homeassistant.config_entries import ConfigEntry
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
 from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.event import async_track_time_interval
-import aiohttp
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ConfigEntryNotReady, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import dt as dt_util
 
-from .const import AGGREGATION_MIN, AGGREGATION_MEAN
+from .backfill import async_get_backfill
+from .client import async_acquire_client, async_release_client
+from .const import (
+    ATTR_END,
+    ATTR_ENTRY_ID,
+    ATTR_FORMAT,
+    ATTR_PATH,
+    ATTR_START,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_JSON,
+    SERVICE_EXPORT_HISTORY,
+    SERVICE_REPORT_NOW,
+    SIGNAL_REPORT_UPDATED,
+)
+from .history import ReportHistory
+from .models import EntrySettings, RapporteraTempData, ReportState
+from .readings import SourceReadings
+from .reporter import TemperatureReporter
+from .retry import async_remove_retry_queue
+from .scheduler import async_get_scheduler
+from .sources import async_drop_source_index
 
 _LOGGER = logging.getLogger(__name__)
 
 DOMAIN = "rapportera_temp"
 PLATFORMS = [Platform.SENSOR]
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Report Temperature from a config entry."""
-    hass.data.setdefault(DOMAIN, {})
-    
-    # Initialize status tracking
-    hass.data[DOMAIN][entry.entry_id] = {
-        "config": entry.data,
-        "last_update_status": "pending",
-        "last_update_message": "Waiting for first report",
-        "last_update_time": None,
-        "last_temperature": None,
-        "last_reported_temperature": None,
-        "sensor_temperatures": {},
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+REPORT_NOW_SCHEMA = vol.Schema({vol.Optional(ATTR_ENTRY_ID): cv.string})
+
+EXPORT_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_FORMAT, default=EXPORT_FORMAT_CSV): vol.In(
+            [EXPORT_FORMAT_CSV, EXPORT_FORMAT_JSON]
+        ),
+        vol.Optional(ATTR_PATH): cv.string,
     }
+)
 
-    # Schedule temperature reporting
-    async def report_temperature(now):
-        """Report temperature to Temperatur.nu."""
-        # Support both old (single) and new (multiple) sensor format
-        sensor_ids = entry.data.get("sensor_entity_ids", [entry.data.get("sensor_entity_id")])
-        if not isinstance(sensor_ids, list):
-            sensor_ids = [sensor_ids]
-        
-        hash_code = entry.data.get("hash_code")
-        if not hash_code:
-            _LOGGER.error("No hash_code found in configuration")
-            return
-        
-        aggregation_method = entry.data.get("aggregation_method", AGGREGATION_MIN)
-        
-        # Collect temperatures from all sensors
-        temperatures = []
-        sensor_temps = {}
-        
-        for sensor_id in sensor_ids:
-            if not sensor_id:
-                continue
-                
-            state = hass.states.get(sensor_id)
-            if state is None:
-                _LOGGER.warning("Sensor %s not found", sensor_id)
-                continue
-            
-            # Check if state is unavailable or unknown
-            if state.state in ["unavailable", "unknown", "none", None]:
-                _LOGGER.warning("Sensor %s is %s", sensor_id, state.state)
-                continue
-            
-            try:
-                temperature = float(state.state)
-                temperatures.append(temperature)
-                sensor_temps[sensor_id] = round(temperature, 1)
-            except (ValueError, TypeError) as err:
-                _LOGGER.warning("Invalid temperature value from sensor %s: %s (error: %s)", 
-                              sensor_id, state.state, err)
+
+def _history_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the path of an entry's report history file."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}.history_{entry_id}")
+
+
+def _timestamp(value: datetime | None) -> float | None:
+    """Return a service datetime as a timestamp, reading naive times as local."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return value.timestamp()
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Report Temperature services."""
+
+    async def async_report_now(call: ServiceCall) -> None:
+        """Report now for one entry, or for all entries."""
+        entry_id = call.data.get(ATTR_ENTRY_ID)
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            if entry.state is not ConfigEntryState.LOADED:
                 continue
-        
-        # Update sensor temperatures in data
-        hass.data[DOMAIN][entry.entry_id]["sensor_temperatures"] = sensor_temps
-        
-        if not temperatures:
-            msg = "No valid temperature readings from any sensor"
-            _LOGGER.warning(msg)
-            hass.data[DOMAIN][entry.entry_id]["last_update_status"] = "failed"
-            hass.data[DOMAIN][entry.entry_id]["last_update_message"] = msg
-            hass.data[DOMAIN][entry.entry_id]["last_update_time"] = datetime.now()
-            return
-        
-        # Calculate aggregated temperature
-        if aggregation_method == AGGREGATION_MEAN:
-            aggregated_temp = statistics.mean(temperatures)
-        else:  # AGGREGATION_MIN (default)
-            aggregated_temp = min(temperatures)
-        
-        # Round to 1 decimal place
-        aggregated_temp = round(aggregated_temp, 1)
-        
-        # Store the calculated temperature (before reporting)
-        hass.data[DOMAIN][entry.entry_id]["last_temperature"] = aggregated_temp
-        
-        # Format temperature with dot as decimal separator (US format)
-        temp_formatted = f"{aggregated_temp:.1f}"
-        url = f"http://www.temperatur.nu/rapportera.php?hash={hash_code}&t={temp_formatted}"
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=10) as response:
-                    response_text = await response.text()
-                    
-                    if response.status == 200:
-                        msg = f"Successfully reported {temp_formatted}°C ({aggregation_method} of {len(temperatures)} sensor(s)). Server response: {response_text}"
-                        _LOGGER.info(msg)
-                        _LOGGER.debug("URL used: %s", url)
-                        hass.data[DOMAIN][entry.entry_id]["last_update_status"] = "success"
-                        hass.data[DOMAIN][entry.entry_id]["last_update_message"] = response_text
-                        hass.data[DOMAIN][entry.entry_id]["last_reported_temperature"] = aggregated_temp
-                    else:
-                        msg = f"Failed with HTTP {response.status}. Response: {response_text}. URL: {url}"
-                        _LOGGER.error(msg)
-                        hass.data[DOMAIN][entry.entry_id]["last_update_status"] = "failed"
-                        hass.data[DOMAIN][entry.entry_id]["last_update_message"] = msg
-                    
-                    hass.data[DOMAIN][entry.entry_id]["last_update_time"] = datetime.now()
-                    
-        except Exception as err:
-            msg = f"Error reporting temperature: {err}. URL: {url}"
-            _LOGGER.error(msg)
-            hass.data[DOMAIN][entry.entry_id]["last_update_status"] = "failed"
-            hass.data[DOMAIN][entry.entry_id]["last_update_message"] = msg
-            hass.data[DOMAIN][entry.entry_id]["last_update_time"] = datetime.now()
+            if entry_id is None or entry_id == entry.entry_id:
+                await entry.runtime_data.reporter.async_report_now()
+
+    async def async_export_history(call: ServiceCall) -> ServiceResponse:
+        """Write the report history of an entry in a time range to a file."""
+        entry_id = call.data[ATTR_ENTRY_ID]
+        entry = hass.config_entries.async_get_entry(entry_id)
+        if (
+            entry is None
+            or entry.domain != DOMAIN
+            or entry.state is not ConfigEntryState.LOADED
+        ):
+            raise ServiceValidationError(f"No loaded Report Temperature entry {entry_id}")
+        fmt = call.data[ATTR_FORMAT]
+        if (path := call.data.get(ATTR_PATH)) is None:
+            path = hass.config.path(f"{DOMAIN}_{entry_id}.{fmt}")
+        elif not hass.config.is_allowed_path(path):
+            raise ServiceValidationError(f"Writing to {path} is not allowed")
+
+        # Records are streamed from the ring file to the export one by one
+        count = await hass.async_add_executor_job(
+            entry.runtime_data.reporter.history.export,
+            path,
+            fmt,
+            _timestamp(call.data.get(ATTR_START)),
+            _timestamp(call.data.get(ATTR_END)),
+        )
+        _LOGGER.info("Exported %d report(s) to %s", count, path)
+        return {"path": path, "records": count}
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_REPORT_NOW, async_report_now, schema=REPORT_NOW_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_HISTORY,
+        async_export_history,
+        schema=EXPORT_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    return True
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up Report Temperature from a config entry."""
+    settings = EntrySettings.from_entry_data(entry.data)
+    state = ReportState()
+    client = async_acquire_client(hass)
+    entry.async_on_unload(partial(async_release_client, hass))
 
     # Get interval from config (default 5 minutes)
-    interval_minutes = entry.data.get("interval", 5)
-    interval = timedelta(minutes=interval_minutes)
-    
-    # Schedule the reporting
+    interval = timedelta(minutes=settings.interval)
+
+    # Parse source states as they change instead of on every report
+    readings = SourceReadings(
+        hass, settings.sensor_ids, interval.total_seconds(), settings.max_age * 60
+    )
+    entry.async_on_unload(readings.async_start())
+    readings.history_backfill = async_get_backfill(hass)
+
+    # Keep every report on disk, and show the last upload from before a
+    # restart until the first new one
+    history = ReportHistory(_history_path(hass, entry.entry_id))
+    try:
+        await hass.async_add_executor_job(history.open)
+    except OSError as err:
+        # Raised as not ready so the callbacks registered above are run
+        raise ConfigEntryNotReady(f"Could not open the report history: {err}") from err
+    if (last := await hass.async_add_executor_job(history.last, "success")) is not None:
+        state.reported_temperature = last.temperature
+        state.time = datetime.fromtimestamp(last.timestamp)
+
+    reporter = TemperatureReporter(
+        hass, entry, client, settings, readings, state, history
+    )
+    entry.runtime_data = RapporteraTempData(settings, state, readings, reporter)
+    await reporter.retry_queue.async_load()
+
+    # Schedule the reporting on the shared, wall-clock aligned scheduler
     entry.async_on_unload(
-        async_track_time_interval(hass, report_temperature, interval)
+        async_get_scheduler(hass).async_add(
+            entry.entry_id,
+            interval.total_seconds(),
+            settings.hash_code or entry.entry_id,
+            reporter.async_tick,
+        )
     )
-    
-    # Don't report immediately on startup - wait for first interval
-    # This gives sensors time to become available
-    sensor_count = len(entry.data.get("sensor_entity_ids", [entry.data.get("sensor_entity_id")]))
-    aggregation = entry.data.get("aggregation_method", AGGREGATION_MIN)
+
+    # Report as soon as the sources are available instead of waiting for
+    # the first scheduled tick
+    entry.async_create_background_task(
+        hass, reporter.async_report_when_ready(), f"{entry.entry_id} first report"
+    )
+
+    # Apply option changes in place instead of reloading the entry
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
     _LOGGER.info("Report Temperature configured with %d sensor(s), %s aggregation, %d minute interval", 
-                 sensor_count, aggregation, interval_minutes)
+                 len(readings.entity_ids), settings.aggregation_method, settings.interval)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
     return True
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed settings to a running entry.
+
+    The reporter, reading cache, sensors, HTTP session, history and retry
+    queue stay in place, so windowed aggregates keep their samples. Only
+    a change of the statistics sensors, which adds or removes entities,
+    reloads the entry.
+    """
+    runtime: RapporteraTempData = entry.runtime_data
+    old = runtime.settings
+    settings = EntrySettings.from_entry_data(entry.data)
+    if settings == old:
+        return
+    if settings.statistics != old.statistics:
+        hass.config_entries.async_schedule_reload(entry.entry_id)
+        return
+
+    runtime.settings = settings
+    runtime.readings.async_reconfigure(
+        settings.sensor_ids, settings.interval * 60, settings.max_age * 60
+    )
+    await runtime.reporter.async_apply_settings(settings)
+    if (settings.interval, settings.hash_code) != (old.interval, old.hash_code):
+        async_get_scheduler(hass).async_update(
+            entry.entry_id, settings.interval * 60, settings.hash_code or entry.entry_id
+        )
+    _LOGGER.info(
+        "Report Temperature settings updated: %d sensor(s), %s aggregation, %d minute interval",
+        len(runtime.readings.entity_ids), settings.aggregation_method, settings.interval,
+    )
+    # Let the sensors pick up the new settings
+    async_dispatcher_send(hass, SIGNAL_REPORT_UPDATED.format(entry.entry_id))
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        await entry.runtime_data.reporter.async_shutdown()
+        if not any(
+            other.state is ConfigEntryState.LOADED
+            for other in hass.config_entries.async_entries(DOMAIN)
+            if other.entry_id != entry.entry_id
+        ):
+            # The flows build the index again when they need it
+            async_drop_source_index(hass)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persisted data of a deleted config entry."""
+    await async_remove_retry_queue(hass, entry.entry_id)
+    path = _history_path(hass, entry.entry_id)
+    if await hass.async_add_executor_job(os.path.exists, path):
+        await hass.async_add_executor_job(os.remove, path)
@@ -0,0 +1,236 @@
+"""Streaming windowed aggregation of source sensor samples."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Sequence
+
+from .const import (
+    AGGREGATION_MAD_MEAN,
+    AGGREGATION_MEDIAN,
+    AGGREGATION_TIME_WEIGHTED_MEAN,
+    AGGREGATION_TRIMMED_MEAN,
+    AGGREGATION_WINDOW_MIN,
+    MAD_THRESHOLD,
+    TRIM_FRACTION,
+    WINDOW_MAX_SAMPLES,
+)
+
+Sample = tuple[float, float]
+
+# Scales the median absolute deviation to the standard deviation of
+# normally distributed values
+MAD_SCALE = 1.4826
+
+
+def kth_deviation(values: Sequence[float], center: float, k: int) -> float:
+    """Return the k-th smallest distance (1-based) of sorted values from center.
+
+    The k values closest to center are always a contiguous run of the
+    sorted values, so the run is found by binary search in O(log n)
+    instead of sorting all deviations.
+    """
+    low, high = 0, len(values) - k
+    while low < high:
+        middle = (low + high) // 2
+        if center - values[middle] > values[middle + k] - center:
+            low = middle + 1
+        else:
+            high = middle
+    return max(center - values[low], values[low + k - 1] - center)
+
+
+def median(values: Sequence[float]) -> float:
+    """Return the median of sorted values."""
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def mad_mean(values: Sequence[float]) -> float:
+    """Return the mean of the sorted values that are not outliers.
+
+    Values further from the median than MAD_THRESHOLD times the scaled
+    median absolute deviation are left out.
+    """
+    count = len(values)
+    center = median(values)
+    mad = kth_deviation(values, center, count // 2 + 1)
+    if not count % 2:
+        mad = (mad + kth_deviation(values, center, count // 2)) / 2
+    limit = MAD_THRESHOLD * MAD_SCALE * mad
+    low = bisect_left(values, center - limit)
+    high = bisect_right(values, center + limit)
+    if low >= high:
+        return center
+    return sum(values[low:high]) / (high - low)
+
+
+class SourceWindow:
+    """Bounded ring buffer of one source's (timestamp, value) samples.
+
+    Keeps a monotonic deque for the windowed minimum and the integral of
+    value over time between consecutive samples for the time-weighted mean.
+    """
+
+    __slots__ = ("samples", "mins", "integral")
+
+    def __init__(self) -> None:
+        """Initialize an empty window."""
+        self.samples: deque[Sample] = deque()
+        self.mins: deque[Sample] = deque()
+        self.integral = 0.0
+
+    def append(self, sample: Sample) -> None:
+        """Add a sample, which must not be older than the previous one."""
+        samples = self.samples
+        if samples:
+            last_time, last_value = samples[-1]
+            self.integral += last_value * (sample[0] - last_time)
+        samples.append(sample)
+
+        mins = self.mins
+        value = sample[1]
+        while mins and mins[-1][1] >= value:
+            mins.pop()
+        mins.append(sample)
+
+    def popleft(self) -> Sample:
+        """Drop the oldest sample and return it."""
+        samples = self.samples
+        oldest = samples.popleft()
+        if samples:
+            self.integral -= oldest[1] * (samples[0][0] - oldest[0])
+        else:
+            self.integral = 0.0
+        if self.mins and self.mins[0] is oldest:
+            self.mins.popleft()
+        return oldest
+
+    def time_weighted_mean(self, start: float, now: float) -> float:
+        """Return the mean value weighted by how long each value was held."""
+        first_time, first_value = self.samples[0]
+        last_time, last_value = self.samples[-1]
+        total = self.integral + last_value * (now - last_time)
+        begin = first_time
+        if first_time < start:
+            # The oldest sample was already held when the window started
+            total -= first_value * (start - first_time)
+            begin = start
+        duration = now - begin
+        if duration <= 0:
+            return last_value
+        return total / duration
+
+
+class WindowAggregator:
+    """Sliding-window aggregates over the samples of all sources.
+
+    Every sample is pushed into a per-source ring buffer capped at
+    WINDOW_MAX_SAMPLES, at O(1) amortized cost. The median, trimmed mean
+    and mean without outliers are taken across the sources, one
+    time-weighted mean per source, so each sensor counts once however
+    often it updates and a fast-updating outlier cannot outvote the
+    others.
+
+    A source's time-weighted mean depends on the time of the report, so
+    the means are not kept between reports: result computes each one in
+    O(1) from the running integral and sorts them, O(S log S) for S
+    sources. Only the windowed minimum avoids the sort.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        max_samples: int = WINDOW_MAX_SAMPLES,
+        trim_fraction: float = TRIM_FRACTION,
+    ) -> None:
+        """Initialize the aggregator with a window length in seconds."""
+        self.window = window
+        self.max_samples = max_samples
+        self.trim_fraction = trim_fraction
+        self.sources: dict[str, SourceWindow] = {}
+
+    def add(self, source: str, value: float, timestamp: float) -> None:
+        """Add a sample from a source."""
+        source_window = self.sources.get(source)
+        if source_window is None:
+            source_window = self.sources[source] = SourceWindow()
+        elif source_window.samples and timestamp < source_window.samples[-1][0]:
+            timestamp = source_window.samples[-1][0]
+
+        if len(source_window.samples) >= self.max_samples:
+            source_window.popleft()
+        source_window.append((timestamp, value))
+        self._expire_source(source_window, timestamp - self.window)
+
+    def backfill(self, source: str, samples: list[Sample]) -> None:
+        """Add earlier samples of a source, in time order, before those held."""
+        held = self.sources.get(source)
+        held_samples = list(held.samples) if held is not None else []
+        first = held_samples[0][0] if held_samples else None
+        self.discard(source)
+        for timestamp, value in samples:
+            if first is not None and timestamp >= first:
+                break
+            self.add(source, value, timestamp)
+        for timestamp, value in held_samples:
+            self.add(source, value, timestamp)
+
+    def discard(self, source: str) -> None:
+        """Drop all samples of a source, e.g. when it becomes unavailable."""
+        self.sources.pop(source, None)
+
+    def expire(self, now: float) -> None:
+        """Evict samples that were superseded before the window started."""
+        start = now - self.window
+        for source_window in self.sources.values():
+            self._expire_source(source_window, start)
+
+    @staticmethod
+    def _expire_source(source_window: SourceWindow, start: float) -> None:
+        """Evict samples of one source that ended before start.
+
+        The newest sample older than start is kept, since its value was
+        still held when the window began.
+        """
+        samples = source_window.samples
+        while len(samples) > 1 and samples[1][0] <= start:
+            source_window.popleft()
+
+    @property
+    def sample_count(self) -> int:
+        """Return the number of samples held in the window."""
+        return sum(len(source_window.samples) for source_window in self.sources.values())
+
+    def result(self, method: str, now: float) -> float | None:
+        """Return the windowed aggregate for method, or None without samples.
+
+        Costs O(S log S) for S sources, plus evicting expired samples,
+        except for the windowed minimum, which is O(S).
+        """
+        self.expire(now)
+        if not self.sources:
+            return None
+        if method == AGGREGATION_WINDOW_MIN:
+            return min(
+                source_window.mins[0][1] for source_window in self.sources.values()
+            )
+        start = now - self.window
+        means = sorted(
+            source_window.time_weighted_mean(start, now)
+            for source_window in self.sources.values()
+        )
+        if method == AGGREGATION_TIME_WEIGHTED_MEAN:
+            return sum(means) / len(means)
+        if method == AGGREGATION_MEDIAN:
+            return median(means)
+        if method == AGGREGATION_TRIMMED_MEAN:
+            trim = int(len(means) * self.trim_fraction)
+            kept = means[trim : len(means) - trim]
+            return sum(kept) / len(kept)
+        if method == AGGREGATION_MAD_MEAN:
+            return mad_mean(means)
+        return None
+
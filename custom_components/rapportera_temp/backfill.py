@@ -0,0 +1,122 @@
+"""Seeding of the reading windows from recorder history."""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import BACKFILL_DELAY, DATA_BACKFILL
+
+if TYPE_CHECKING:
+    from .readings import SourceReadings
+
+_LOGGER = logging.getLogger(__name__)
+
+RECORDER_DOMAIN = "recorder"
+
+
+async def _async_fetch_history(
+    hass: HomeAssistant, entity_ids: list[str], start: float
+) -> dict[str, list[State]]:
+    """Return the recorded states of entity_ids since start, in one query.
+
+    The state each entity had at start is included.
+    """
+    # pylint: disable-next=import-outside-toplevel
+    from homeassistant.components.recorder import get_instance, history
+
+    instance = get_instance(hass)
+    if not await instance.async_db_ready:
+        return {}
+    return await instance.async_add_executor_job(
+        lambda: history.get_significant_states(
+            hass,
+            dt_util.utc_from_timestamp(start),
+            entity_ids=entity_ids,
+            significant_changes_only=False,
+            no_attributes=True,
+        )
+    )
+
+
+class HistoryBackfill:
+    """Fill the windows of reading caches with recorded samples.
+
+    Requests arriving within BACKFILL_DELAY seconds of each other, as
+    they do when every entry is set up after a restart, are merged into
+    one history query covering all their sources, so the database is
+    asked once however many entries and sources there are.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the backfill."""
+        self.hass = hass
+        self._pending: list[tuple[SourceReadings, list[str]]] = []
+        self._done: asyncio.Future[None] | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self.queries = 0
+
+    @callback
+    def async_request(
+        self, readings: SourceReadings, entity_ids: list[str]
+    ) -> asyncio.Future[None] | None:
+        """Queue a backfill of some sources of a reading cache.
+
+        Returns a future that is done once the batch including this
+        request was applied, or None if the recorder is not loaded.
+        """
+        if RECORDER_DOMAIN not in self.hass.config.components:
+            return None
+        self._pending.append((readings, entity_ids))
+        if self._done is None:
+            self._done = self.hass.loop.create_future()
+            self._unsub_timer = async_call_later(
+                self.hass, BACKFILL_DELAY, self._async_flush
+            )
+        return self._done
+
+    async def _async_flush(self, _now: datetime) -> None:
+        """Query the history of every pending source and apply it."""
+        self._unsub_timer = None
+        pending, self._pending = self._pending, []
+        done, self._done = self._done, None
+        try:
+            now = time.time()
+            start = now - max(readings.window.window for readings, _ in pending)
+            entity_ids = sorted(
+                {entity_id for _, requested in pending for entity_id in requested}
+            )
+            self.queries += 1
+            states = await _async_fetch_history(self.hass, entity_ids, start)
+            for readings, requested in pending:
+                # One cache failing must not keep the others from their samples
+                try:
+                    readings.backfill(
+                        {entity_id: states.get(entity_id, []) for entity_id in requested},
+                        now,
+                    )
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Error backfilling %s", ", ".join(requested))
+            _LOGGER.debug(
+                "Backfilled %d source(s) of %d cache(s) from history",
+                len(entity_ids), len(pending),
+            )
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.exception("Error backfilling from recorder history")
+        finally:
+            done.set_result(None)
+
+
+@callback
+def async_get_backfill(hass: HomeAssistant) -> HistoryBackfill:
+    """Return the integration-wide backfill, creating it if needed."""
+    backfill: HistoryBackfill | None = hass.data.get(DATA_BACKFILL)
+    if backfill is None:
+        backfill = hass.data[DATA_BACKFILL] = HistoryBackfill(hass)
+    return backfill
@@ -0,0 +1,154 @@
+"""Shared HTTP client for reporting to Temperatur.nu."""
+from __future__ import annotations
+
+import logging
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant
+
+from .const import (
+    DATA_CLIENT,
+    HTTP_CONNECTION_LIMIT,
+    HTTP_CONNECTION_LIMIT_PER_HOST,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    REPORT_TIMEOUT,
+)
+
+if TYPE_CHECKING:
+    from .metrics import ReportMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def _on_connection_create_start(
+    session: aiohttp.ClientSession, context: SimpleNamespace, params: object
+) -> None:
+    """Note when a new connection starts being established."""
+    context.connect_start = time.perf_counter()
+
+
+async def _on_connection_create_end(
+    session: aiohttp.ClientSession, context: SimpleNamespace, params: object
+) -> None:
+    """Record how long establishing a new connection took."""
+    if (metrics := context.trace_request_ctx) is not None:
+        metrics.http_connect.record(time.perf_counter() - context.connect_start)
+
+
+class ReportClient:
+    """Pooled keep-alive HTTP session shared by all config entries.
+
+    The session is created on first use and closed when the last entry
+    releases it, or when Home Assistant closes, since config entries are
+    not unloaded at shutdown. Every station reuses the same connector, DNS
+    cache and open connections to the server.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the client."""
+        self._session: aiohttp.ClientSession | None = None
+        self._users = 0
+        self._unsub_close: CALLBACK_TYPE | None = None
+        self._timeouts: dict[float, aiohttp.ClientTimeout] = {}
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_start.append(_on_connection_create_start)
+        trace_config.on_connection_create_end.append(_on_connection_create_end)
+        self._trace_configs = [trace_config]
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, creating it if needed."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_CONNECTION_LIMIT,
+                limit_per_host=HTTP_CONNECTION_LIMIT_PER_HOST,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, trace_configs=self._trace_configs
+            )
+        return self._session
+
+    async def async_get(
+        self,
+        url: str,
+        timeout: float = REPORT_TIMEOUT,
+        metrics: ReportMetrics | None = None,
+    ) -> tuple[int, str]:
+        """Perform a GET request and return status and body text.
+
+        With metrics, the time to establish a new connection and the time
+        until the whole response was read are recorded.
+        """
+        start = time.perf_counter()
+        async with self.session.get(
+            url, timeout=self._client_timeout(timeout), trace_request_ctx=metrics
+        ) as response:
+            text = await response.text()
+        if metrics is not None:
+            metrics.http_response.record(time.perf_counter() - start)
+        return response.status, text
+
+    async def async_post(
+        self, url: str, payload: Any, timeout: float = REPORT_TIMEOUT
+    ) -> tuple[int, str]:
+        """POST payload as JSON and return status and body text."""
+        async with self.session.post(
+            url, json=payload, timeout=self._client_timeout(timeout)
+        ) as response:
+            text = await response.text()
+        return response.status, text
+
+    def _client_timeout(self, timeout: float) -> aiohttp.ClientTimeout:
+        """Return a cached ClientTimeout for a total timeout in seconds."""
+        if (client_timeout := self._timeouts.get(timeout)) is None:
+            client_timeout = self._timeouts[timeout] = aiohttp.ClientTimeout(
+                total=timeout
+            )
+        return client_timeout
+
+    async def async_close(self) -> None:
+        """Close the pooled session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+def async_acquire_client(hass: HomeAssistant) -> ReportClient:
+    """Return the shared client and register one more user of it."""
+    client: ReportClient | None = hass.data.get(DATA_CLIENT)
+    if client is None:
+        client = hass.data[DATA_CLIENT] = ReportClient()
+
+        async def _async_close(event: Event) -> None:
+            """Close the session when Home Assistant closes."""
+            client._unsub_close = None
+            await client.async_close()
+
+        client._unsub_close = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, _async_close
+        )
+    client._users += 1
+    return client
+
+
+async def async_release_client(hass: HomeAssistant) -> None:
+    """Release one user of the shared client, closing it after the last one."""
+    client: ReportClient | None = hass.data.get(DATA_CLIENT)
+    if client is None:
+        return
+    client._users -= 1
+    if client._users <= 0:
+        hass.data.pop(DATA_CLIENT)
+        if client._unsub_close is not None:
+            client._unsub_close()
+            client._unsub_close = None
+        await client.async_close()
+        _LOGGER.debug("Closed shared HTTP session")
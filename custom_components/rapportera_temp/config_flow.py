@@ -15,18 +15,88 @@ from homeassistant.helpers.selector import (
     SelectSelectorMode,
 )
 
-from .const import DOMAIN, AGGREGATION_MIN, AGGREGATION_MEAN
+from .const import (
+    DOMAIN,
+    AGGREGATION_MIN,
+    AGGREGATION_MEAN,
+    AGGREGATION_TIME_WEIGHTED_MEAN,
+    AGGREGATION_WINDOW_MIN,
+    AGGREGATION_MEDIAN,
+    AGGREGATION_TRIMMED_MEAN,
+    AGGREGATION_MAD_MEAN,
+    DEFAULT_DEADBAND,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MAX_AGE,
+    STATISTIC_MIN,
+    STATISTIC_MEAN,
+    STATISTIC_MAX,
+    STATISTIC_MEDIAN,
+    STATISTIC_SPREAD,
+)
+
+from .destinations import is_file_sink, validate_collector_url, validate_sink
+from .sources import async_get_source_index
 
 _LOGGER = logging.getLogger(__name__)
 
+AGGREGATION_OPTIONS = [
+    {"value": AGGREGATION_MIN, "label": "Lägsta värdet (rekommenderat för skugga)"},
+    {"value": AGGREGATION_MEAN, "label": "Medelvärde"},
+    {"value": AGGREGATION_TIME_WEIGHTED_MEAN, "label": "Tidsviktat medelvärde under intervallet"},
+    {"value": AGGREGATION_WINDOW_MIN, "label": "Lägsta värdet under intervallet"},
+    {"value": AGGREGATION_MEDIAN, "label": "Median under intervallet"},
+    {"value": AGGREGATION_TRIMMED_MEAN, "label": "Trimmat medelvärde under intervallet"},
+    {"value": AGGREGATION_MAD_MEAN, "label": "Medelvärde utan avvikande värden under intervallet"},
+]
+
+STATISTIC_OPTIONS = [
+    {"value": STATISTIC_MIN, "label": "Lägsta värdet"},
+    {"value": STATISTIC_MEAN, "label": "Medelvärde"},
+    {"value": STATISTIC_MAX, "label": "Högsta värdet"},
+    {"value": STATISTIC_MEDIAN, "label": "Median"},
+    {"value": STATISTIC_SPREAD, "label": "Spridning (högsta minus lägsta)"},
+]
+
+MAX_AGE_SELECTOR = NumberSelector(
+    NumberSelectorConfig(
+        min=0,
+        max=1440,
+        step=1,
+        unit_of_measurement="minutes",
+        mode=NumberSelectorMode.BOX,
+    )
+)
+
+
+def sensor_selector(include_entities: list[str]) -> EntitySelector:
+    """Return a picker of the temperature sensors in include_entities."""
+    return EntitySelector(
+        EntitySelectorConfig(
+            domain="sensor",
+            include_entities=include_entities,
+            multiple=True,
+        )
+    )
+
+
+def default_entity_name(sensor_count: int) -> str:
+    """Return the name of an entry that was not given one."""
+    return f"Report Temperature ({sensor_count} sensor{'s' if sensor_count > 1 else ''})"
+
+
 class RapporteraTempConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Report Temperature."""
 
     VERSION = 1
 
+    def __init__(self) -> None:
+        """Initialize the config flow."""
+        self._data: dict = {}
+
     async def async_step_user(self, user_input=None):
         """Handle the initial step."""
         errors = {}
+        index = async_get_source_index(self.hass)
 
         if user_input is not None:
             # Validate hash code
@@ -36,43 +106,34 @@ class RapporteraTempConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             elif not user_input.get("sensor_entity_ids"):
                 errors["sensor_entity_ids"] = "missing_sensor"
             else:
-                # Ensure sensors is a list and limit to 3
+                # Ensure sensors is a list
                 sensors = user_input["sensor_entity_ids"]
                 if not isinstance(sensors, list):
                     sensors = [sensors]
-                user_input["sensor_entity_ids"] = sensors[:3]
-                
-                # Set default aggregation if not provided
-                if "aggregation_method" not in user_input:
-                    user_input["aggregation_method"] = AGGREGATION_MIN
-                
-                # Generate default entity name if not provided
-                if not user_input.get("entity_name"):
-                    sensor_count = len(sensors)
-                    user_input["entity_name"] = f"Report Temperature ({sensor_count} sensor{'s' if sensor_count > 1 else ''})"
-                
-                # Create the entry
-                return self.async_create_entry(
-                    title=user_input["entity_name"],
-                    data=user_input,
-                )
+                user_input["sensor_entity_ids"] = sensors
+                if not all(sensor in index for sensor in sensors):
+                    errors["sensor_entity_ids"] = "not_temperature_sensor"
+
+        if user_input is not None and not errors:
+            # Set default aggregation if not provided
+            if "aggregation_method" not in user_input:
+                user_input["aggregation_method"] = AGGREGATION_MIN
 
-        # Get all temperature sensors
+            if user_input.pop("suggest_shade", False):
+                self._data = user_input
+                return await self.async_step_shade()
+            return self._async_create(user_input)
+
+        # Only offer sensors that report a temperature
         data_schema = vol.Schema(
             {
                 vol.Required("hash_code"): str,
-                vol.Required("sensor_entity_ids"): EntitySelector(
-                    EntitySelectorConfig(
-                        domain="sensor",
-                        multiple=True,
-                    )
+                vol.Required("sensor_entity_ids"): sensor_selector(
+                    sorted(index.entity_ids)
                 ),
                 vol.Required("aggregation_method", default=AGGREGATION_MIN): SelectSelector(
                     SelectSelectorConfig(
-                        options=[
-                            {"value": AGGREGATION_MIN, "label": "Lägsta värdet (rekommenderat för skugga)"},
-                            {"value": AGGREGATION_MEAN, "label": "Medelvärde"},
-                        ],
+                        options=AGGREGATION_OPTIONS,
                         mode=SelectSelectorMode.DROPDOWN,
                     )
                 ),
@@ -86,6 +147,8 @@ class RapporteraTempConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         mode=NumberSelectorMode.BOX,
                     )
                 ),
+                vol.Optional("max_age", default=DEFAULT_MAX_AGE): MAX_AGE_SELECTOR,
+                vol.Optional("suggest_shade", default=False): bool,
             }
         )
 
@@ -99,6 +162,58 @@ class RapporteraTempConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             }
         )
 
+    async def async_step_shade(self, user_input=None):
+        """Let the user add the sensors that are likely in the shade."""
+        errors = {}
+
+        if user_input is not None:
+            if not user_input.get("sensor_entity_ids"):
+                errors["sensor_entity_ids"] = "missing_sensor"
+            else:
+                return self._async_create(
+                    {**self._data, "sensor_entity_ids": user_input["sensor_entity_ids"]}
+                )
+
+        # The coldest sensors first, after the ones already chosen
+        chosen = self._data["sensor_entity_ids"]
+        suggestions = dict(async_get_source_index(self.hass).suggest_shade())
+        options = []
+        for entity_id in [*chosen, *(s for s in suggestions if s not in chosen)]:
+            state = self.hass.states.get(entity_id)
+            label = state.name if state is not None else entity_id
+            if (value := suggestions.get(entity_id)) is not None:
+                label = f"{label} ({value:.1f} °C)"
+            options.append({"value": entity_id, "label": label})
+
+        return self.async_show_form(
+            step_id="shade",
+            data_schema=vol.Schema(
+                {
+                    vol.Required("sensor_entity_ids", default=chosen): SelectSelector(
+                        SelectSelectorConfig(
+                            options=options,
+                            multiple=True,
+                            mode=SelectSelectorMode.LIST,
+                        )
+                    ),
+                }
+            ),
+            errors=errors,
+        )
+
+    @callback
+    def _async_create(self, data: dict):
+        """Create the entry, naming it after its sensors if it has no name."""
+        # Generate default entity name if not provided
+        if not data.get("entity_name"):
+            data["entity_name"] = default_entity_name(len(data["sensor_entity_ids"]))
+
+        # Create the entry
+        return self.async_create_entry(
+            title=data["entity_name"],
+            data=data,
+        )
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -115,18 +230,44 @@ class RapporteraTempOptionsFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
+        errors = {}
+
+        # Get current values
+        current_sensors = self._config_entry.data.get("sensor_entity_ids", 
+                                                        [self._config_entry.data.get("sensor_entity_id", "")])
+        if not isinstance(current_sensors, list):
+            current_sensors = [current_sensors] if current_sensors else []
+        index = async_get_source_index(self.hass)
+
         if user_input is not None:
-            # Ensure sensors is a list and limit to 3
+            # Sources the entry already uses stay valid
+            sensors = user_input.get("sensor_entity_ids", [])
+            if not isinstance(sensors, list):
+                sensors = [sensors]
+            if not all(
+                sensor in index or sensor in current_sensors for sensor in sensors
+            ):
+                errors["sensor_entity_ids"] = "not_temperature_sensor"
+            if (url := user_input.get("collector_url")) and not validate_collector_url(url):
+                errors["collector_url"] = "invalid_collector_url"
+            if (sink := user_input.get("sink")) and not validate_sink(sink):
+                errors["sink"] = "invalid_sink"
+            elif sink and is_file_sink(sink) and not self.hass.config.is_allowed_path(sink):
+                errors["sink"] = "sink_not_allowed"
+
+        if user_input is not None and not errors:
+            # Ensure sensors is a list
             if "sensor_entity_ids" in user_input:
                 sensors = user_input["sensor_entity_ids"]
                 if not isinstance(sensors, list):
                     sensors = [sensors]
-                user_input["sensor_entity_ids"] = sensors[:3]
+                user_input["sensor_entity_ids"] = sensors
             
             # Generate default entity name if not provided
             if not user_input.get("entity_name"):
-                sensor_count = len(user_input.get("sensor_entity_ids", []))
-                user_input["entity_name"] = f"Report Temperature ({sensor_count} sensor{'s' if sensor_count > 1 else ''})"
+                user_input["entity_name"] = default_entity_name(
+                    len(user_input.get("sensor_entity_ids", []))
+                )
             
             # Update config entry with new data
             self.hass.config_entries.async_update_entry(
@@ -136,12 +277,6 @@ class RapporteraTempOptionsFlowHandler(config_entries.OptionsFlow):
             )
             return self.async_create_entry(title="", data={})
 
-        # Get current values
-        current_sensors = self._config_entry.data.get("sensor_entity_ids", 
-                                                        [self._config_entry.data.get("sensor_entity_id", "")])
-        if not isinstance(current_sensors, list):
-            current_sensors = [current_sensors] if current_sensors else []
-        
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(
@@ -153,21 +288,15 @@ class RapporteraTempOptionsFlowHandler(config_entries.OptionsFlow):
                     vol.Required(
                         "sensor_entity_ids",
                         default=current_sensors
-                    ): EntitySelector(
-                        EntitySelectorConfig(
-                            domain="sensor",
-                            multiple=True,
-                        )
+                    ): sensor_selector(
+                        sorted(index.entity_ids.union(current_sensors))
                     ),
                     vol.Required(
                         "aggregation_method",
                         default=self._config_entry.data.get("aggregation_method", AGGREGATION_MIN)
                     ): SelectSelector(
                         SelectSelectorConfig(
-                            options=[
-                                {"value": AGGREGATION_MIN, "label": "Lägsta värdet (rekommenderat för skugga)"},
-                                {"value": AGGREGATION_MEAN, "label": "Medelvärde"},
-                            ],
+                            options=AGGREGATION_OPTIONS,
                             mode=SelectSelectorMode.DROPDOWN,
                         )
                     ),
@@ -179,8 +308,57 @@ class RapporteraTempOptionsFlowHandler(config_entries.OptionsFlow):
                         "interval",
                         default=self._config_entry.data.get("interval", 5)
                     ): int,
+                    vol.Optional(
+                        "max_age",
+                        default=self._config_entry.data.get("max_age", DEFAULT_MAX_AGE)
+                    ): MAX_AGE_SELECTOR,
+                    vol.Optional(
+                        "deadband",
+                        default=self._config_entry.data.get("deadband", DEFAULT_DEADBAND)
+                    ): NumberSelector(
+                        NumberSelectorConfig(
+                            min=0,
+                            max=5,
+                            step=0.1,
+                            unit_of_measurement="°C",
+                            mode=NumberSelectorMode.BOX,
+                        )
+                    ),
+                    vol.Optional(
+                        "heartbeat_interval",
+                        default=self._config_entry.data.get(
+                            "heartbeat_interval", DEFAULT_HEARTBEAT_INTERVAL
+                        )
+                    ): NumberSelector(
+                        NumberSelectorConfig(
+                            min=1,
+                            max=180,
+                            step=1,
+                            unit_of_measurement="minutes",
+                            mode=NumberSelectorMode.BOX,
+                        )
+                    ),
+                    vol.Optional(
+                        "statistics",
+                        default=self._config_entry.data.get("statistics", [])
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=STATISTIC_OPTIONS,
+                            multiple=True,
+                            mode=SelectSelectorMode.LIST,
+                        )
+                    ),
+                    vol.Optional(
+                        "collector_url",
+                        default=self._config_entry.data.get("collector_url", "")
+                    ): str,
+                    vol.Optional(
+                        "sink",
+                        default=self._config_entry.data.get("sink", "")
+                    ): str,
                 }
             ),
+            errors=errors,
             description_placeholders={
                 "aggregation_info": "Lägsta värdet garanterar nästan alltid skugga"
             }
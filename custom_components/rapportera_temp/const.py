@@ -5,3 +5,125 @@ DOMAIN = "rapportera_temp"
 # Aggregation methods
 AGGREGATION_MIN = "min"
 AGGREGATION_MEAN = "mean"
+AGGREGATION_TIME_WEIGHTED_MEAN = "time_weighted_mean"
+AGGREGATION_WINDOW_MIN = "window_min"
+AGGREGATION_MEDIAN = "median"
+AGGREGATION_TRIMMED_MEAN = "trimmed_mean"
+AGGREGATION_MAD_MEAN = "mad_mean"
+
+# Methods computed over every sample since the previous report
+WINDOWED_AGGREGATIONS = frozenset({
+    AGGREGATION_TIME_WEIGHTED_MEAN,
+    AGGREGATION_WINDOW_MIN,
+    AGGREGATION_MEDIAN,
+    AGGREGATION_TRIMMED_MEAN,
+    AGGREGATION_MAD_MEAN,
+})
+
+# Statistics of the current source readings, computed together on each
+# report; any of them can be exposed as an extra sensor
+STATISTIC_MIN = "min"
+STATISTIC_MEAN = "mean"
+STATISTIC_MAX = "max"
+STATISTIC_MEDIAN = "median"
+STATISTIC_SPREAD = "spread"
+STATISTICS = (
+    STATISTIC_MIN,
+    STATISTIC_MEAN,
+    STATISTIC_MAX,
+    STATISTIC_MEDIAN,
+    STATISTIC_SPREAD,
+)
+
+# Integration-wide table of parsed source readings shared by all entries
+DATA_MULTIPLEXER = f"{DOMAIN}_multiplexer"
+
+# Integration-wide index of the temperature sensors the flows offer
+DATA_SOURCE_INDEX = f"{DOMAIN}_source_index"
+# Number of likely shade sensors suggested when setting up an entry
+SHADE_SUGGESTIONS = 10
+
+# Windowed aggregation limits
+WINDOW_MAX_SAMPLES = 256
+TRIM_FRACTION = 0.2
+# Samples more than this many scaled MADs from the median are outliers
+MAD_THRESHOLD = 3.0
+
+# Reporting endpoint
+REPORT_URL = "http://www.temperatur.nu/rapportera.php"
+REPORT_TIMEOUT = 10
+# Longest status message kept in the status sensor attributes
+MAX_MESSAGE_LENGTH = 255
+
+# Extra destinations that every uploaded value is also sent to. Each has
+# its own timeout (seconds), limit on sends in flight and backoff after
+# failures, so a slow or failing destination never holds up the others
+DESTINATION_TIMEOUT = 5
+DESTINATION_CONCURRENCY = 2
+DESTINATION_BASE_DELAY = 30.0
+DESTINATION_MAX_DELAY = 10 * 60.0
+# Schemes of the local sink option besides a plain file path
+SINK_SCHEME_TCP = "tcp"
+SINK_SCHEME_UNIX = "unix"
+
+# Default for the per-entry maximum age of a reading in minutes, 0 to use
+# readings however old they are
+DEFAULT_MAX_AGE = 0
+
+# Deadband mode: with a deadband above 0 (degrees), values that moved less
+# than that since the last upload are only sent as a heartbeat (minutes)
+DEFAULT_DEADBAND = 0.0
+DEFAULT_HEARTBEAT_INTERVAL = 30
+
+# Longest wait after setup for every source to have a reading before the
+# first report is sent with whatever is available
+FIRST_REPORT_TIMEOUT = 60
+
+# Integration-wide seeding of reading windows from recorder history;
+# requests within this many seconds share one history query
+DATA_BACKFILL = f"{DOMAIN}_backfill"
+BACKFILL_DELAY = 1.0
+# Longest wait for the history before the first report is sent anyway
+BACKFILL_TIMEOUT = 30
+
+# Integration-wide report scheduler
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+# Ticks are spread over this many seconds after each interval boundary
+SCHEDULER_JITTER_WINDOW = 50
+SCHEDULER_CONCURRENCY = 16
+
+# Retry queue for undelivered reports. Only the newest one is kept, since
+# Temperatur.nu records every value as the current temperature, and it is
+# dropped once it is older than RETRY_MAX_AGE seconds
+RETRY_STORAGE_VERSION = 1
+RETRY_MAX_AGE = 60 * 60
+RETRY_BASE_DELAY = 30.0
+RETRY_MAX_DELAY = 30 * 60.0
+RETRY_SAVE_DELAY = 10
+
+# Report history ring file; 2**18 records of 12 bytes hold half a year
+# of reports at a one minute interval in 3 MB
+HISTORY_CAPACITY = 2**18
+
+# Services
+SERVICE_REPORT_NOW = "report_now"
+SERVICE_EXPORT_HISTORY = "export_history"
+ATTR_ENTRY_ID = "entry_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_FORMAT = "format"
+ATTR_PATH = "path"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_JSON = "json"
+# Calls to report_now within this many seconds are merged into one upload
+REPORT_NOW_COOLDOWN = 2.0
+
+# Shared HTTP client
+DATA_CLIENT = f"{DOMAIN}_client"
+HTTP_CONNECTION_LIMIT = 20
+HTTP_CONNECTION_LIMIT_PER_HOST = 10
+HTTP_DNS_CACHE_TTL = 300
+HTTP_KEEPALIVE_TIMEOUT = 120
+
+# Dispatcher signal sent after each report, formatted with the entry id
+SIGNAL_REPORT_UPDATED = f"{DOMAIN}_report_updated_{{}}"
@@ -0,0 +1,60 @@
+"""Deadband and heartbeat policy deciding which reports are uploaded."""
+from __future__ import annotations
+
+# Weight of the newest gap in the moving average of the effective interval
+EFFECTIVE_INTERVAL_WEIGHT = 0.3
+
+
+class DeadbandPolicy:
+    """Skip uploads of values that have not moved since the last report.
+
+    A value is uploaded when it differs from the last uploaded value by at
+    least deadband degrees, or when heartbeat seconds have passed since
+    the last upload. Ticks keep running at the configured interval, so the
+    time between uploads shrinks to one interval while the temperature is
+    changing fast and stretches to the heartbeat while it is steady. A
+    deadband of 0 uploads every value.
+    """
+
+    __slots__ = (
+        "deadband",
+        "heartbeat",
+        "interval",
+        "last_value",
+        "last_time",
+        "effective_interval",
+    )
+
+    def __init__(self, deadband: float, heartbeat: float, interval: float) -> None:
+        """Initialize the policy; heartbeat and interval are in seconds."""
+        self.deadband = deadband
+        self.heartbeat = heartbeat
+        self.interval = interval
+        self.last_value: float | None = None
+        self.last_time = 0.0
+        # Moving average of the seconds between uploads
+        self.effective_interval: float | None = None
+
+    def should_report(self, value: float, now: float) -> bool:
+        """Return whether value should be uploaded at now."""
+        if not self.deadband or self.last_value is None:
+            return True
+        # Values are rounded to tenths, so compare the change the same way
+        if round(abs(value - self.last_value), 1) >= self.deadband:
+            return True
+        # Ticks fire on a fixed grid, so upload on the tick nearest the
+        # heartbeat rather than one tick after it
+        return now - self.last_time + self.interval / 2 >= self.heartbeat
+
+    def reported(self, value: float, now: float) -> None:
+        """Record that value was uploaded, or queued for upload, at now."""
+        if self.last_value is not None:
+            gap = now - self.last_time
+            if self.effective_interval is None:
+                self.effective_interval = gap
+            else:
+                self.effective_interval += EFFECTIVE_INTERVAL_WEIGHT * (
+                    gap - self.effective_interval
+                )
+        self.last_value = value
+        self.last_time = now
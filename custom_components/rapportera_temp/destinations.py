@@ -0,0 +1,287 @@
+"""Extra destinations that uploaded temperatures are fanned out to."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+from contextlib import suppress
+from dataclasses import dataclass
+import json
+import logging
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .client import ReportClient
+from .const import (
+    DESTINATION_BASE_DELAY,
+    DESTINATION_CONCURRENCY,
+    DESTINATION_MAX_DELAY,
+    DESTINATION_TIMEOUT,
+    SINK_SCHEME_TCP,
+    SINK_SCHEME_UNIX,
+)
+from .metrics import LatencyHistogram
+from .models import EntrySettings
+from .retry import backoff_delay
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DestinationError(Exception):
+    """A destination did not accept a report."""
+
+
+@dataclass(frozen=True, slots=True)
+class Report:
+    """An uploaded temperature, as sent to the extra destinations."""
+
+    entry_id: str
+    name: str
+    timestamp: float
+    temperature: float
+    aggregation_method: str
+    sensor_temperatures: dict[str, float]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the report as a JSON-serializable dict."""
+        return {
+            "entry_id": self.entry_id,
+            "name": self.name,
+            "time": dt_util.utc_from_timestamp(self.timestamp).isoformat(),
+            "temperature": self.temperature,
+            "aggregation_method": self.aggregation_method,
+            "sensor_temperatures": self.sensor_temperatures,
+        }
+
+    def as_line(self) -> bytes:
+        """Return the report as one line of JSON."""
+        return json.dumps(self.as_dict(), separators=(",", ":")).encode() + b"\n"
+
+
+class Destination(ABC):
+    """A target that reports are sent to, with its own delivery state.
+
+    Subclasses implement async_send. The fan-out gives every destination
+    its own timeout, a limit on sends in flight and an exponential backoff
+    after failures.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = DESTINATION_TIMEOUT,
+        concurrency: int = DESTINATION_CONCURRENCY,
+    ) -> None:
+        """Initialize the destination."""
+        self.name = name
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.in_flight = 0
+        # Consecutive failures, and when the destination may be tried again
+        self.attempt = 0
+        self.retry_at = 0.0
+        self.sent = 0
+        self.failed = 0
+        # Reports not attempted because of backoff or the concurrency limit
+        self.dropped = 0
+        self.latency = LatencyHistogram()
+
+    @abstractmethod
+    async def async_send(self, report: Report) -> None:
+        """Send one report, raising DestinationError if it was not accepted."""
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the delivery state as a JSON-serializable dict."""
+        return {
+            "name": self.name,
+            "in_flight": self.in_flight,
+            "attempt": self.attempt,
+            "backoff_seconds": max(0.0, self.retry_at - time.monotonic()),
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "latency": self.latency.as_dict(),
+        }
+
+
+class HttpCollectorDestination(Destination):
+    """POST each report as JSON to an HTTP collector."""
+
+    def __init__(self, client: ReportClient, url: str) -> None:
+        """Initialize the destination."""
+        super().__init__(f"collector {urlsplit(url).hostname}")
+        self.client = client
+        self.url = url
+
+    async def async_send(self, report: Report) -> None:
+        """POST the report to the collector."""
+        status, text = await self.client.async_post(
+            self.url, report.as_dict(), self.timeout
+        )
+        if not 200 <= status < 300:
+            raise DestinationError(f"HTTP {status}: {text[:100]}")
+
+
+class FileSinkDestination(Destination):
+    """Append each report as a line of JSON to a local file."""
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the destination."""
+        # One writer at a time keeps the lines in order
+        super().__init__(f"file {path}", concurrency=1)
+        self.hass = hass
+        self.path = path
+
+    async def async_send(self, report: Report) -> None:
+        """Append the report to the file."""
+        await self.hass.async_add_executor_job(self._append, report.as_line())
+
+    def _append(self, line: bytes) -> None:
+        """Append one line to the file."""
+        with open(self.path, "ab") as file:
+            file.write(line)
+
+
+class SocketSinkDestination(Destination):
+    """Write each report as a line of JSON to a TCP or Unix socket."""
+
+    def __init__(self, sink: str) -> None:
+        """Initialize the destination from a tcp:// or unix:// address."""
+        super().__init__(f"socket {sink}", concurrency=1)
+        parts = urlsplit(sink)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path
+
+    async def async_send(self, report: Report) -> None:
+        """Connect, write the report and close the connection."""
+        if self.scheme == SINK_SCHEME_UNIX:
+            _, writer = await asyncio.open_unix_connection(self.path)
+        else:
+            _, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(report.as_line())
+            await writer.drain()
+        finally:
+            writer.close()
+            with suppress(OSError):
+                await writer.wait_closed()
+
+
+def validate_sink(sink: str) -> bool:
+    """Return whether sink is a file path or a tcp:// or unix:// address."""
+    parts = urlsplit(sink)
+    if parts.scheme == SINK_SCHEME_TCP:
+        try:
+            return bool(parts.hostname) and parts.port is not None
+        except ValueError:
+            return False
+    if parts.scheme == SINK_SCHEME_UNIX:
+        return bool(parts.path)
+    return not parts.scheme and bool(sink.strip())
+
+
+def is_file_sink(sink: str) -> bool:
+    """Return whether sink is a file path rather than a socket address."""
+    return urlsplit(sink).scheme not in (SINK_SCHEME_TCP, SINK_SCHEME_UNIX)
+
+
+def validate_collector_url(url: str) -> bool:
+    """Return whether url is an http(s) URL with a host."""
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and bool(parts.netloc)
+
+
+def build_destinations(
+    hass: HomeAssistant, client: ReportClient, settings: EntrySettings
+) -> list[Destination]:
+    """Return the extra destinations configured for an entry."""
+    destinations: list[Destination] = []
+    if settings.collector_url:
+        destinations.append(HttpCollectorDestination(client, settings.collector_url))
+    if sink := settings.sink:
+        if not is_file_sink(sink):
+            destinations.append(SocketSinkDestination(sink))
+        elif hass.config.is_allowed_path(sink):
+            destinations.append(FileSinkDestination(hass, sink))
+        else:
+            _LOGGER.error("Writing reports to %s is not allowed", sink)
+    return destinations
+
+
+class DestinationFanout:
+    """Send every uploaded report to all extra destinations concurrently.
+
+    Each send runs as its own background task, so publishing never waits
+    for a destination: a slow one holds up neither the others nor the
+    next report. A destination that failed is skipped until its backoff
+    has passed, and one that already has its limit of sends in flight
+    skips the report instead of piling up more.
+    """
+
+    def __init__(self, hass: HomeAssistant, destinations: list[Destination]) -> None:
+        """Initialize the fan-out."""
+        self.hass = hass
+        self.destinations = destinations
+        self._tasks: set[asyncio.Task] = set()
+
+    def __bool__(self) -> bool:
+        """Return whether any destination is configured."""
+        return bool(self.destinations)
+
+    @callback
+    def async_publish(self, report: Report) -> None:
+        """Start sending report to every destination that can take it."""
+        now = time.monotonic()
+        for destination in self.destinations:
+            if now < destination.retry_at or (
+                destination.in_flight >= destination.concurrency
+            ):
+                destination.dropped += 1
+                continue
+            destination.in_flight += 1
+            task = self.hass.async_create_background_task(
+                self._async_deliver(destination, report),
+                f"{report.entry_id} send to {destination.name}",
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _async_deliver(self, destination: Destination, report: Report) -> None:
+        """Send a report to one destination and update its backoff."""
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(destination.timeout):
+                await destination.async_send(report)
+        except Exception as err:
+            destination.failed += 1
+            destination.attempt += 1
+            delay = backoff_delay(
+                destination.attempt, DESTINATION_BASE_DELAY, DESTINATION_MAX_DELAY
+            )
+            destination.retry_at = time.monotonic() + delay
+            _LOGGER.warning(
+                "Sending %.1f°C to %s failed (%s), retrying in %.0f seconds",
+                report.temperature,
+                destination.name,
+                "timed out" if isinstance(err, TimeoutError) else err,
+                delay,
+            )
+        else:
+            destination.sent += 1
+            destination.attempt = 0
+            destination.retry_at = 0.0
+        finally:
+            destination.in_flight -= 1
+            destination.latency.record(time.perf_counter() - start)
+
+    async def async_shutdown(self) -> None:
+        """Cancel sends that are still in flight."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,47 @@
+"""Diagnostics support for Report Temperature."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .models import RapporteraTempData
+
+TO_REDACT = {"hash_code", "collector_url"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    runtime: RapporteraTempData = entry.runtime_data
+    state = runtime.state
+    message = state.message
+    # Error messages include the report URL, which contains the hash
+    if message and (hash_code := runtime.settings.hash_code):
+        message = message.replace(hash_code, REDACTED)
+
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "status": {
+            "last_update_status": state.status,
+            "last_update_message": message,
+            "last_update_time": state.time,
+            "last_temperature": state.temperature,
+            "last_reported_temperature": state.reported_temperature,
+            "sensor_temperatures": state.sensor_temperatures,
+            "stale_sensors": state.stale_sensors,
+            "statistics": (
+                state.statistics._asdict() if state.statistics is not None else None
+            ),
+            "queued_reports": len(runtime.reporter.retry_queue),
+            "history_records": len(runtime.reporter.history),
+        },
+        "metrics": runtime.reporter.metrics.as_dict(),
+        "destinations": [
+            destination.as_dict()
+            for destination in runtime.reporter.destinations.destinations
+        ],
+    }
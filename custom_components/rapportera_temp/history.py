@@ -0,0 +1,221 @@
+"""Compact on-disk history of every report, in a memory-mapped ring file."""
+from __future__ import annotations
+
+from collections.abc import Iterator
+import csv
+import json
+import logging
+import mmap
+import os
+import struct
+from threading import Lock
+from typing import NamedTuple
+
+from homeassistant.util import dt as dt_util
+
+from .const import EXPORT_FORMAT_CSV, HISTORY_CAPACITY
+from .metrics import OUTCOMES
+
+_LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"RTHI"
+VERSION = 1
+# Magic, version, record size, capacity and the number of records ever
+# written; the next record goes to slot written % capacity
+HEADER = struct.Struct("<4sHHIQ4x")
+# Timestamp in seconds, temperature in tenths of a degree, sources with a
+# reading, outcome (index into OUTCOMES) and report duration in ms
+RECORD = struct.Struct("<IhHBxH")
+# Stored temperature of a report without a value
+NO_TEMPERATURE = -0x8000
+MAX_LATENCY_MS = 0xFFFF
+# Columns of a CSV export
+EXPORT_FIELDS = ("time", "temperature", "sources", "status", "latency")
+
+
+class HistoryRecord(NamedTuple):
+    """One report read back from the history."""
+
+    timestamp: int
+    temperature: float | None
+    sources: int
+    status: str
+    latency: float
+
+    def as_dict(self) -> dict:
+        """Return the record as a JSON-serializable dict."""
+        return {
+            "time": dt_util.utc_from_timestamp(self.timestamp).isoformat(),
+            "temperature": self.temperature,
+            "sources": self.sources,
+            "status": self.status,
+            "latency": self.latency,
+        }
+
+
+def _decode(record: tuple[int, int, int, int, int]) -> HistoryRecord:
+    """Return a HistoryRecord from a raw record."""
+    timestamp, temperature, sources, outcome, latency = record
+    return HistoryRecord(
+        timestamp,
+        None if temperature == NO_TEMPERATURE else temperature / 10,
+        sources,
+        OUTCOMES[outcome],
+        latency / 1000,
+    )
+
+
+class ReportHistory:
+    """Fixed-width report records in a ring file, read through mmap.
+
+    The file holds capacity records of RECORD.size bytes after a small
+    header and is allocated once, so it never grows: when it is full the
+    oldest record is overwritten. Records are in time order from the
+    oldest slot, so a time range is found by binary search and read
+    record by record straight from the mapping.
+
+    All methods do blocking I/O and must run in the executor. Appending,
+    exporting and closing hold a lock, so a report appended while an
+    export reads the ring, or while the entry unloads, can neither tear
+    the export nor write to a closed mapping.
+    """
+
+    def __init__(self, path: str, capacity: int = HISTORY_CAPACITY) -> None:
+        """Initialize the history."""
+        self.path = path
+        self.capacity = capacity
+        self.written = 0
+        self._map: mmap.mmap | None = None
+        self._lock = Lock()
+
+    def open(self) -> None:
+        """Map the ring file, creating it if needed."""
+        size = HEADER.size + self.capacity * RECORD.size
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != size or not self._read_header(fd):
+                if os.fstat(fd).st_size:
+                    _LOGGER.warning(
+                        "Report history %s has another layout, starting over", self.path
+                    )
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, HEADER.pack(MAGIC, VERSION, RECORD.size, self.capacity, 0), 0)
+                self.written = 0
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+    def _read_header(self, fd: int) -> bool:
+        """Read the header, returning whether it matches this layout."""
+        magic, version, record_size, capacity, written = HEADER.unpack(
+            os.pread(fd, HEADER.size, 0)
+        )
+        if (magic, version, record_size, capacity) != (
+            MAGIC, VERSION, RECORD.size, self.capacity
+        ):
+            return False
+        self.written = written
+        return True
+
+    def close(self) -> None:
+        """Flush and unmap the ring file."""
+        with self._lock:
+            if self._map is not None:
+                self._map.flush()
+                self._map.close()
+                self._map = None
+
+    def __len__(self) -> int:
+        """Return the number of records held."""
+        return min(self.written, self.capacity)
+
+    def append(
+        self,
+        timestamp: float,
+        temperature: float | None,
+        sources: int,
+        outcome: int,
+        latency: float,
+    ) -> None:
+        """Write one record, overwriting the oldest when the ring is full.
+
+        Records appended after the history was closed are dropped.
+        """
+        with self._lock:
+            if self._map is None:
+                return
+            offset = HEADER.size + (self.written % self.capacity) * RECORD.size
+            RECORD.pack_into(
+                self._map,
+                offset,
+                int(timestamp),
+                NO_TEMPERATURE if temperature is None else round(temperature * 10),
+                min(sources, 0xFFFF),
+                outcome,
+                min(round(latency * 1000), MAX_LATENCY_MS),
+            )
+            # Only count the record once it is complete
+            self.written += 1
+            HEADER.pack_into(
+                self._map, 0, MAGIC, VERSION, RECORD.size, self.capacity, self.written
+            )
+
+    def _record(self, position: int, written: int) -> tuple[int, int, int, int, int]:
+        """Return the raw record at position, 0 being the oldest held."""
+        first = written - min(written, self.capacity)
+        slot = (first + position) % self.capacity
+        return RECORD.unpack_from(self._map, HEADER.size + slot * RECORD.size)
+
+    def _bisect(self, timestamp: float, written: int) -> int:
+        """Return the position of the first record at or after timestamp."""
+        low, high = 0, min(written, self.capacity)
+        while low < high:
+            middle = (low + high) // 2
+            if self._record(middle, written)[0] < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def iter_range(
+        self, start: float | None = None, end: float | None = None
+    ) -> Iterator[HistoryRecord]:
+        """Yield the records from start up to and including end, oldest first."""
+        written = self.written
+        count = min(written, self.capacity)
+        position = 0 if start is None else self._bisect(start, written)
+        stop = count if end is None else self._bisect(int(end) + 1, written)
+        for position in range(position, stop):
+            yield _decode(self._record(position, written))
+
+    def last(self, status: str) -> HistoryRecord | None:
+        """Return the newest record with status, if any."""
+        written = self.written
+        outcome = OUTCOMES.index(status)
+        for position in range(min(written, self.capacity) - 1, -1, -1):
+            if (record := self._record(position, written))[3] == outcome:
+                return _decode(record)
+        return None
+
+    def export(
+        self, path: str, fmt: str, start: float | None = None, end: float | None = None
+    ) -> int:
+        """Stream a time range to a CSV or JSON file and return the record count."""
+        count = 0
+        with self._lock, open(path, "w", encoding="utf-8", newline="") as file:
+            if fmt == EXPORT_FORMAT_CSV:
+                writer = csv.DictWriter(file, EXPORT_FIELDS)
+                writer.writeheader()
+                for record in self.iter_range(start, end):
+                    writer.writerow(record.as_dict())
+                    count += 1
+            else:
+                file.write("[")
+                for record in self.iter_range(start, end):
+                    file.write(",\n" if count else "\n")
+                    file.write(json.dumps(record.as_dict()))
+                    count += 1
+                file.write("\n]\n")
+        return count
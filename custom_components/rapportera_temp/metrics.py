@@ -0,0 +1,89 @@
+"""Counters and latency histograms for the reporting hot path."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+
+# Upper bounds in seconds of the latency histogram buckets; one extra
+# bucket counts everything slower than the last bound
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+PHASES = ("collect", "aggregate", "http_connect", "http_response", "total")
+OUTCOMES = ("success", "failure", "timeout", "queued", "no_readings", "skipped")
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram.
+
+    All storage is preallocated, so recording a sample only updates
+    counters in place and never grows a container.
+    """
+
+    __slots__ = ("counts", "stats")
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.counts = array("Q", bytes(8 * (len(LATENCY_BUCKETS) + 1)))
+        # Sum and maximum of all samples, in seconds
+        self.stats = array("d", (0.0, 0.0))
+
+    def record(self, seconds: float) -> None:
+        """Record one sample."""
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        stats = self.stats
+        stats[0] += seconds
+        if seconds > stats[1]:
+            stats[1] = seconds
+
+    def as_dict(self) -> dict:
+        """Return the histogram as a JSON-serializable dict."""
+        count = sum(self.counts)
+        buckets = {
+            f"le_{bound:g}": self.counts[index]
+            for index, bound in enumerate(LATENCY_BUCKETS)
+        }
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": count,
+            "mean": self.stats[0] / count if count else None,
+            "max": self.stats[1] if count else None,
+            "buckets": buckets,
+        }
+
+
+class ReportMetrics:
+    """Per-entry outcome counters and phase latency histograms."""
+
+    __slots__ = ("outcomes", "requests") + PHASES
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.outcomes = array("Q", bytes(8 * len(OUTCOMES)))
+        # HTTP requests sent upstream, including retries of queued reports
+        self.requests = 0
+        for phase in PHASES:
+            setattr(self, phase, LatencyHistogram())
+
+    def count(self, outcome: int) -> None:
+        """Count one report outcome, an index into OUTCOMES."""
+        self.outcomes[outcome] += 1
+
+    def as_dict(self) -> dict:
+        """Return the metrics as a JSON-serializable dict."""
+        return {
+            "requests": self.requests,
+            "outcomes": dict(zip(OUTCOMES, self.outcomes)),
+            "latency": {phase: getattr(self, phase).as_dict() for phase in PHASES},
+        }
+
+
+# Indexes into ReportMetrics.outcomes
+OUTCOME_SUCCESS = OUTCOMES.index("success")
+OUTCOME_FAILURE = OUTCOMES.index("failure")
+OUTCOME_TIMEOUT = OUTCOMES.index("timeout")
+OUTCOME_QUEUED = OUTCOMES.index("queued")
+OUTCOME_NO_READINGS = OUTCOMES.index("no_readings")
+OUTCOME_SKIPPED = OUTCOMES.index("skipped")
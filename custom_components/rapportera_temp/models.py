@@ -0,0 +1,89 @@
+"""Typed runtime state of a Report Temperature config entry."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from .const import (
+    AGGREGATION_MIN,
+    DEFAULT_DEADBAND,
+    DEFAULT_HEARTBEAT_INTERVAL,
+    DEFAULT_MAX_AGE,
+    STATISTICS,
+)
+
+if TYPE_CHECKING:
+    from .readings import ReadingStatistics, SourceReadings
+    from .reporter import TemperatureReporter
+
+
+@dataclass(frozen=True, slots=True)
+class EntrySettings:
+    """Settings of a config entry, normalized once at setup."""
+
+    hash_code: str | None
+    sensor_ids: list[str]
+    aggregation_method: str
+    entity_name: str | None
+    # Minutes
+    interval: float
+    max_age: float
+    heartbeat_interval: float
+    # Degrees Celsius
+    deadband: float
+    # Extra destinations, None when not configured
+    collector_url: str | None
+    sink: str | None
+    # Statistics of the readings exposed as extra sensors
+    statistics: tuple[str, ...]
+
+    @classmethod
+    def from_entry_data(cls, data: Mapping[str, Any]) -> EntrySettings:
+        """Build the settings from config entry data."""
+        # Support both old (single) and new (multiple) sensor format
+        sensors = data.get("sensor_entity_ids", [data.get("sensor_entity_id")])
+        if not isinstance(sensors, list):
+            sensors = [sensors]
+        return cls(
+            hash_code=data.get("hash_code"),
+            sensor_ids=[sensor for sensor in sensors if sensor],
+            aggregation_method=data.get("aggregation_method", AGGREGATION_MIN),
+            entity_name=data.get("entity_name"),
+            interval=data.get("interval", 5),
+            max_age=data.get("max_age", DEFAULT_MAX_AGE),
+            heartbeat_interval=data.get("heartbeat_interval", DEFAULT_HEARTBEAT_INTERVAL),
+            deadband=data.get("deadband", DEFAULT_DEADBAND),
+            collector_url=data.get("collector_url") or None,
+            sink=data.get("sink") or None,
+            statistics=tuple(
+                statistic for statistic in STATISTICS
+                if statistic in data.get("statistics", ())
+            ),
+        )
+
+
+@dataclass(slots=True)
+class ReportState:
+    """Outcome of the latest report, shown by the sensors."""
+
+    status: str = "pending"
+    message: str = "Waiting for first report"
+    time: datetime | None = None
+    temperature: float | None = None
+    reported_temperature: float | None = None
+    sensor_temperatures: dict[str, float] = field(default_factory=dict)
+    stale_sensors: list[str] = field(default_factory=list)
+    # Statistics of the readings the temperature was picked from
+    statistics: ReadingStatistics | None = None
+
+
+@dataclass(slots=True)
+class RapporteraTempData:
+    """Runtime data of a config entry, stored as entry.runtime_data."""
+
+    settings: EntrySettings
+    state: ReportState
+    readings: SourceReadings
+    reporter: TemperatureReporter
@@ -0,0 +1,228 @@
+"""Integration-wide subscription to source sensor states."""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Mapping
+from functools import partial
+import logging
+from math import isfinite
+from typing import Any
+
+from homeassistant.const import (
+    ATTR_UNIT_OF_MEASUREMENT,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    UnitOfTemperature,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.util.unit_conversion import TemperatureConverter
+
+from .const import DATA_MULTIPLEXER
+
+try:
+    from homeassistant.const import EVENT_STATE_REPORTED
+except ImportError:  # Home Assistant before 2024.4
+    EVENT_STATE_REPORTED = None
+
+_LOGGER = logging.getLogger(__name__)
+
+INVALID_STATES = frozenset({STATE_UNAVAILABLE, STATE_UNKNOWN, "none"})
+TEMPERATURE_UNITS = frozenset(UnitOfTemperature)
+
+
+def parse_value(value: str) -> float | None:
+    """Parse a state value into a temperature without logging, or None."""
+    if value in INVALID_STATES:
+        return None
+    try:
+        number = float(value)
+    except (ValueError, TypeError):
+        return None
+    return number if isfinite(number) else None
+
+
+def parse_temperature(entity_id: str, state: State | None) -> float | None:
+    """Parse a state into a temperature, or None if it is not usable."""
+    if state is None:
+        _LOGGER.warning("Sensor %s not found", entity_id)
+        return None
+    if state.state in INVALID_STATES:
+        _LOGGER.warning("Sensor %s is %s", entity_id, state.state)
+        return None
+    try:
+        value = float(state.state)
+    except (ValueError, TypeError) as err:
+        _LOGGER.warning(
+            "Invalid temperature value from sensor %s: %s (error: %s)",
+            entity_id, state.state, err,
+        )
+        return None
+    if not isfinite(value):
+        _LOGGER.warning("Invalid temperature value from sensor %s: %s", entity_id, state.state)
+        return None
+    return value
+
+
+def celsius_converter(entity_id: str, unit: str | None) -> Callable[[float], float] | None:
+    """Return a function converting readings in unit to Celsius.
+
+    Returns None if no conversion is needed. Sensors without a unit are
+    read as Celsius, as are sensors with a unit that is not a temperature.
+    """
+    if unit is None or unit == UnitOfTemperature.CELSIUS:
+        return None
+    if unit in TEMPERATURE_UNITS:
+        return TemperatureConverter.converter_factory(unit, UnitOfTemperature.CELSIUS)
+    _LOGGER.warning("Sensor %s has unit %s, reading it as °C", entity_id, unit)
+    return None
+
+
+class SourceSlot:
+    """Parsed current reading of one source sensor, shared by every entry.
+
+    value is in Celsius. value and updated (seconds since epoch) are None
+    while the source has no usable reading.
+
+    The unit is looked up when the attributes change and the matching
+    conversion is kept in convert. The state machine reuses the
+    attributes object of a state until an attribute changes, so a new
+    reading costs an identity check, never an attribute lookup.
+    """
+
+    __slots__ = (
+        "entity_id",
+        "value",
+        "updated",
+        "attributes",
+        "convert",
+        "subscribers",
+        "unsub",
+    )
+
+    def __init__(self, entity_id: str) -> None:
+        """Initialize a slot without a reading."""
+        self.entity_id = entity_id
+        self.value: float | None = None
+        self.updated: float | None = None
+        # Attributes the unit was last resolved from
+        self.attributes: Mapping[str, Any] | None = None
+        self.convert: Callable[[float], float] | None = None
+        self.subscribers: list[Callable[[SourceSlot], None]] = []
+        self.unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_set(self, state: State | None) -> None:
+        """Parse a new state once and pass the slot to every subscriber."""
+        value = parse_temperature(self.entity_id, state)
+        if value is not None:
+            if state.attributes is not self.attributes:
+                self.attributes = state.attributes
+                self.convert = celsius_converter(
+                    self.entity_id, state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+                )
+            if self.convert is not None:
+                value = self.convert(value)
+        self.value = value
+        self.updated = None if value is None else state.last_updated.timestamp()
+        for subscriber in self.subscribers:
+            subscriber(self)
+
+    @callback
+    def async_reported(self, timestamp: float) -> None:
+        """Refresh the reading after the sensor reported the same state again."""
+        if self.value is None:
+            return
+        self.updated = timestamp
+        for subscriber in self.subscribers:
+            subscriber(self)
+
+
+class SourceMultiplexer:
+    """One state subscription and one parsed slot per source entity.
+
+    Entries that aggregate the same sensors share its slot, which is
+    reference counted by its subscribers: it is created and subscribed
+    for the first entry using the sensor and dropped with the last one,
+    so state changes are tracked and parsed once per sensor however many
+    entries use it.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the multiplexer."""
+        self.hass = hass
+        self.slots: dict[str, SourceSlot] = {}
+        self._unsub_reported: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_subscribe(
+        self, entity_ids: Iterable[str], subscriber: Callable[[SourceSlot], None]
+    ) -> CALLBACK_TYPE:
+        """Call subscriber with the slot of any of entity_ids that changes.
+
+        The slots are seeded from the current states, but subscriber is
+        only called for later changes. Returns a callback that drops the
+        references taken here.
+        """
+        entity_ids = list(entity_ids)
+        slots = self.slots
+        if EVENT_STATE_REPORTED is not None and self._unsub_reported is None:
+            # A sensor reporting the same value again changes no state, but
+            # its reading is still fresh
+            self._unsub_reported = self.hass.bus.async_listen(
+                EVENT_STATE_REPORTED,
+                self._async_state_reported,
+                event_filter=self._is_tracked,
+                run_immediately=True,
+            )
+        for entity_id in entity_ids:
+            slot = slots.get(entity_id)
+            if slot is None:
+                slot = slots[entity_id] = SourceSlot(entity_id)
+                slot.async_set(self.hass.states.get(entity_id))
+                slot.unsub = async_track_state_change_event(
+                    self.hass, entity_id, self._async_state_changed
+                )
+            slot.subscribers.append(subscriber)
+        return partial(self.async_unsubscribe, entity_ids, subscriber)
+
+    @callback
+    def async_unsubscribe(
+        self, entity_ids: Iterable[str], subscriber: Callable[[SourceSlot], None]
+    ) -> None:
+        """Drop the references of subscriber and unsubscribe unused slots."""
+        slots = self.slots
+        for entity_id in entity_ids:
+            slot = slots[entity_id]
+            slot.subscribers.remove(subscriber)
+            if not slot.subscribers:
+                slot.unsub()
+                del slots[entity_id]
+        if not slots and self._unsub_reported is not None:
+            self._unsub_reported()
+            self._unsub_reported = None
+
+    @callback
+    def _async_state_changed(self, event: Event) -> None:
+        """Update the slot of a source whose state changed."""
+        if (slot := self.slots.get(event.data["entity_id"])) is not None:
+            slot.async_set(event.data["new_state"])
+
+    @callback
+    def _is_tracked(self, event_data: Mapping[str, Any]) -> bool:
+        """Return whether an event is about a tracked source."""
+        return event_data["entity_id"] in self.slots
+
+    @callback
+    def _async_state_reported(self, event: Event) -> None:
+        """Refresh the slot of a source that reported an unchanged state."""
+        if (slot := self.slots.get(event.data["entity_id"])) is not None:
+            slot.async_reported(event.data["new_state"].last_reported.timestamp())
+
+
+@callback
+def async_get_multiplexer(hass: HomeAssistant) -> SourceMultiplexer:
+    """Return the integration-wide multiplexer, creating it if needed."""
+    multiplexer: SourceMultiplexer | None = hass.data.get(DATA_MULTIPLEXER)
+    if multiplexer is None:
+        multiplexer = hass.data[DATA_MULTIPLEXER] = SourceMultiplexer(hass)
+    return multiplexer
@@ -0,0 +1,357 @@
+"""Event-driven cache of source sensor readings."""
+from __future__ import annotations
+
+from array import array
+import asyncio
+from bisect import bisect_left, insort
+from collections import OrderedDict
+import logging
+from math import isnan, nan
+from typing import TYPE_CHECKING, NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, State, callback
+
+if TYPE_CHECKING:
+    from .backfill import HistoryBackfill
+
+from .aggregation import Sample, WindowAggregator
+from .const import AGGREGATION_MEAN, WINDOWED_AGGREGATIONS
+from .multiplexer import SourceSlot, async_get_multiplexer, parse_value
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class ReadingStatistics(NamedTuple):
+    """Statistics of the current readings of all sources.
+
+    Field names match the STATISTIC_* constants.
+    """
+
+    min: float
+    mean: float
+    max: float
+    median: float
+    spread: float
+
+
+class SourceReadings:
+    """Latest parsed reading of each source sensor, kept current by state events.
+
+    States are tracked and parsed by the integration-wide multiplexer,
+    once per sensor however many entries use it; the cache keeps the
+    aggregates of this entry's sources up to date from its slots.
+
+    Readings live in flat arrays indexed by the position of the source in
+    the configuration, with NaN marking a source without a usable value.
+    Each state is parsed once when it arrives and updates the running sum
+    and a sorted array of the current values. The position in the array
+    is found by binary search in O(log n), but inserting or removing the
+    value shifts the elements after it, O(n) as a memmove that is cheap
+    for a few sensors. A report then only reads precomputed values.
+
+    Sources with a reading are also kept in order of their last update,
+    so readings older than max_age are found without scanning every
+    source and dropped as stale until the source updates again.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entity_ids: list[str],
+        window_seconds: float,
+        max_age: float = 0,
+    ) -> None:
+        """Initialize the cache."""
+        self._hass = hass
+        self.entity_ids = list(dict.fromkeys(entity_id for entity_id in entity_ids if entity_id))
+        self._index = {entity_id: index for index, entity_id in enumerate(self.entity_ids)}
+        self.window = WindowAggregator(window_seconds)
+        self.values = array("d", [nan]) * len(self.entity_ids)
+        # Timestamp (seconds since epoch) when each current value arrived
+        self.updated = array("d", [nan]) * len(self.entity_ids)
+        self._sorted = array("d")
+        self._sum = 0.0
+        # Seconds without an update after which a reading is stale, 0 to
+        # never expire readings
+        self.max_age = max_age
+        # Last update of each source with a reading, oldest first
+        self._freshness: OrderedDict[int, float] = OrderedDict()
+        self.stale: set[str] = set()
+        self._ready: asyncio.Event | None = None
+        # Seeds the window of sources from recorder history when set
+        self.history_backfill: HistoryBackfill | None = None
+        # Shared slots of the sources while started
+        self._slots: dict[str, SourceSlot] = {}
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Seed the cache from the shared readings and follow their changes."""
+        self._async_follow(self.entity_ids)
+        return self.async_stop
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop following the sources."""
+        async_get_multiplexer(self._hass).async_unsubscribe(
+            self._slots, self._async_source_changed
+        )
+        self._slots = {}
+
+    @callback
+    def _async_follow(self, entity_ids: list[str]) -> None:
+        """Subscribe to the slots of some sources and seed them."""
+        multiplexer = async_get_multiplexer(self._hass)
+        multiplexer.async_subscribe(entity_ids, self._async_source_changed)
+        slots = [multiplexer.slots[entity_id] for entity_id in entity_ids]
+        self._slots.update((slot.entity_id, slot) for slot in slots)
+        # Seed the oldest first so the freshness order holds from the start
+        slots.sort(key=lambda slot: slot.updated or 0.0)
+        for slot in slots:
+            self._async_set(slot)
+
+    @callback
+    def async_reconfigure(
+        self, entity_ids: list[str], window_seconds: float, max_age: float
+    ) -> None:
+        """Switch to other sources, window or maximum age while running.
+
+        Sources that are kept keep their reading and window samples;
+        removed ones are unsubscribed and added ones seeded from their
+        shared slots and, if they have a reading, from history.
+        """
+        entity_ids = list(dict.fromkeys(entity_id for entity_id in entity_ids if entity_id))
+        self.max_age = max_age
+        grown = window_seconds > self.window.window
+        self.window.window = window_seconds
+        if entity_ids != self.entity_ids:
+            self._async_set_sources(entity_ids)
+        elif grown and self.history_backfill is not None:
+            self.history_backfill.async_request(self, self.entity_ids)
+
+    @callback
+    def _async_set_sources(self, entity_ids: list[str]) -> None:
+        """Replace the sources, keeping the state of those that stay."""
+        kept = set(entity_ids)
+        removed = [entity_id for entity_id in self.entity_ids if entity_id not in kept]
+        added = [entity_id for entity_id in entity_ids if entity_id not in self._index]
+        for entity_id in removed:
+            index = self._index[entity_id]
+            self._remove(index)
+            self._freshness.pop(index, None)
+            self.window.discard(entity_id)
+            self.stale.discard(entity_id)
+            del self._slots[entity_id]
+        async_get_multiplexer(self._hass).async_unsubscribe(
+            removed, self._async_source_changed
+        )
+
+        # Move the flat arrays to the new positions
+        old_index = self._index
+        self._index = {entity_id: index for index, entity_id in enumerate(entity_ids)}
+        values = array("d", [nan]) * len(entity_ids)
+        updated = array("d", [nan]) * len(entity_ids)
+        for entity_id, index in self._index.items():
+            if (old := old_index.get(entity_id)) is not None:
+                values[index] = self.values[old]
+                updated[index] = self.updated[old]
+        self._freshness = OrderedDict(
+            (self._index[self.entity_ids[old]], timestamp)
+            for old, timestamp in self._freshness.items()
+        )
+        self.entity_ids = entity_ids
+        self.values = values
+        self.updated = updated
+
+        self._async_follow(added)
+        # Seeded readings can be older than those already held
+        self._freshness = OrderedDict(sorted(self._freshness.items(), key=lambda item: item[1]))
+        with_reading = [entity_id for entity_id in added if self.get(entity_id) is not None]
+        if with_reading and self.history_backfill is not None:
+            self.history_backfill.async_request(self, with_reading)
+
+    @callback
+    def _async_source_changed(self, slot: SourceSlot) -> None:
+        """Handle a new reading of a source sensor."""
+        entity_id = slot.entity_id
+        had_reading = not isnan(self.updated[self._index[entity_id]])
+        self._async_set(slot)
+        if (
+            not had_reading
+            and self.history_backfill is not None
+            and self.get(entity_id) is not None
+        ):
+            # The source came back, or up after a restart, with no samples
+            # in the window
+            self.history_backfill.async_request(self, [entity_id])
+
+    @callback
+    def async_request_backfill(self) -> asyncio.Future[None] | None:
+        """Request seeding the window of every source from history."""
+        if self.history_backfill is None:
+            return None
+        return self.history_backfill.async_request(self, self.entity_ids)
+
+    def backfill(self, history: dict[str, list[State]], now: float) -> None:
+        """Add recorded samples older than those in the window."""
+        start = now - self.window.window
+        for entity_id, states in history.items():
+            # Sources removed since the request and unavailable ones are
+            # kept out of the window
+            if entity_id not in self._index or self.get(entity_id) is None:
+                continue
+            # Recorded states have no attributes; they are in the unit the
+            # source has now
+            slot = self._slots.get(entity_id)
+            convert = slot.convert if slot is not None else None
+            samples: list[Sample] = []
+            for state in states:
+                if (value := parse_value(state.state)) is None:
+                    continue
+                if convert is not None:
+                    value = convert(value)
+                timestamp = max(state.last_updated.timestamp(), start)
+                if samples and samples[-1][1] == value:
+                    continue
+                if samples and samples[-1][0] == timestamp:
+                    samples.pop()
+                samples.append((timestamp, value))
+            if samples:
+                self.window.backfill(entity_id, samples)
+
+    @callback
+    def _async_set(self, slot: SourceSlot) -> None:
+        """Store the reading of a source and update the aggregates."""
+        entity_id = slot.entity_id
+        value = slot.value
+        index = self._index[entity_id]
+        old = self.values[index]
+        self._remove(index)
+        self._freshness.pop(index, None)
+        self.stale.discard(entity_id)
+
+        if value is None:
+            self.updated[index] = nan
+            self.window.discard(entity_id)
+            return
+
+        timestamp = slot.updated
+        self.values[index] = value
+        self.updated[index] = timestamp
+        self._freshness[index] = timestamp
+        if value != old:
+            # Attribute-only changes would otherwise repeat the same sample
+            self.window.add(entity_id, value, timestamp)
+        self._sum += value
+        insort(self._sorted, value)
+        if self._ready is not None and len(self._sorted) == len(self.entity_ids):
+            self._ready.set()
+
+    def _remove(self, index: int) -> None:
+        """Remove the current reading of a source from the aggregates."""
+        old = self.values[index]
+        if isnan(old):
+            return
+        self.values[index] = nan
+        del self._sorted[bisect_left(self._sorted, old)]
+        if self._sorted:
+            self._sum -= old
+        else:
+            # Start over so rounding errors cannot accumulate
+            self._sum = 0.0
+
+    def expire_stale(self, now: float) -> None:
+        """Drop readings that have not been updated within max_age."""
+        if not self.max_age:
+            return
+        cutoff = now - self.max_age
+        freshness = self._freshness
+        while freshness:
+            index, timestamp = next(iter(freshness.items()))
+            if timestamp >= cutoff:
+                break
+            del freshness[index]
+            self._remove(index)
+            self.updated[index] = nan
+            entity_id = self.entity_ids[index]
+            self.window.discard(entity_id)
+            self.stale.add(entity_id)
+
+    def stale_sensors(self) -> list[str]:
+        """Return the sources whose reading is stale, in config order."""
+        if not self.stale:
+            return []
+        return [entity_id for entity_id in self.entity_ids if entity_id in self.stale]
+
+    async def async_wait_ready(self, timeout: float) -> bool:
+        """Wait until every source has a valid reading.
+
+        Returns False if some sources still have no reading after timeout
+        seconds.
+        """
+        if len(self._sorted) == len(self.entity_ids):
+            return True
+        self._ready = asyncio.Event()
+        try:
+            async with asyncio.timeout(timeout):
+                await self._ready.wait()
+        except TimeoutError:
+            return False
+        finally:
+            self._ready = None
+        return True
+
+    @property
+    def count(self) -> int:
+        """Return the number of sources with a valid reading."""
+        return len(self._sorted)
+
+    def get(self, entity_id: str) -> float | None:
+        """Return the current reading of a source, or None without one."""
+        value = self.values[self._index[entity_id]]
+        return None if isnan(value) else value
+
+    def last_updated(self, entity_id: str) -> float | None:
+        """Return when the current reading of a source arrived, or None."""
+        timestamp = self.updated[self._index[entity_id]]
+        return None if isnan(timestamp) else timestamp
+
+    def statistics(self) -> ReadingStatistics | None:
+        """Return the statistics of the current readings, or None without readings.
+
+        All of them are read from the running sum and the sorted values,
+        so they cost O(1) together.
+        """
+        values = self._sorted
+        count = len(values)
+        if not count:
+            return None
+        low, high = values[0], values[-1]
+        middle = count // 2
+        median = values[middle] if count % 2 else (values[middle - 1] + values[middle]) / 2
+        return ReadingStatistics(low, self._sum / count, high, median, high - low)
+
+    def aggregate(
+        self,
+        method: str,
+        now: float,
+        statistics: ReadingStatistics | None = None,
+    ) -> float | None:
+        """Return the aggregated temperature, or None without readings.
+
+        Pass the statistics already computed for this report to reuse them.
+        """
+        if statistics is None and (statistics := self.statistics()) is None:
+            return None
+        if method in WINDOWED_AGGREGATIONS:
+            return self.window.result(method, now)
+        if method == AGGREGATION_MEAN:
+            return statistics.mean
+        return statistics.min
+
+    def sensor_temperatures(self) -> dict[str, float]:
+        """Return the rounded current reading of each source, in config order."""
+        return {
+            entity_id: round(value, 1)
+            for entity_id, value in zip(self.entity_ids, self.values)
+            if not isnan(value)
+        }
@@ -0,0 +1,402 @@
+"""Reporting of aggregated temperatures to Temperatur.nu."""
+from __future__ import annotations
+
+import asyncio
+from contextlib import suppress
+from datetime import datetime
+import logging
+import time
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .client import ReportClient
+from .const import (
+    BACKFILL_TIMEOUT,
+    FIRST_REPORT_TIMEOUT,
+    MAX_MESSAGE_LENGTH,
+    REPORT_NOW_COOLDOWN,
+    REPORT_TIMEOUT,
+    REPORT_URL,
+    RETRY_MAX_DELAY,
+    SIGNAL_REPORT_UPDATED,
+)
+from .deadband import DeadbandPolicy
+from .destinations import DestinationFanout, Report, build_destinations
+from .history import ReportHistory
+from .metrics import (
+    OUTCOME_FAILURE,
+    OUTCOME_NO_READINGS,
+    OUTCOME_QUEUED,
+    OUTCOME_SKIPPED,
+    OUTCOME_SUCCESS,
+    OUTCOME_TIMEOUT,
+    ReportMetrics,
+)
+from .models import EntrySettings, ReportState
+from .readings import SourceReadings
+from .retry import RetryQueue
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def truncate_message(message: str) -> str:
+    """Cap a status message at MAX_MESSAGE_LENGTH characters."""
+    if len(message) <= MAX_MESSAGE_LENGTH:
+        return message
+    return message[: MAX_MESSAGE_LENGTH - 1] + "…"
+
+
+def retry_delay_cap(settings: EntrySettings) -> float:
+    """Return the longest retry backoff of an entry.
+
+    Capped at the report interval, so a queued value is never delivered
+    later after an outage than the next scheduled report would be.
+    """
+    return min(RETRY_MAX_DELAY, settings.interval * 60)
+
+
+class TemperatureReporter:
+    """Single-flight reporter for one config entry.
+
+    At most one report or retry of a queued report runs at a time.
+    Requests that arrive while one is in flight are merged into one
+    follow-up report, and the whole report is cancelled if it exceeds
+    REPORT_TIMEOUT.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        client: ReportClient,
+        settings: EntrySettings,
+        readings: SourceReadings,
+        state: ReportState,
+        history: ReportHistory | None = None,
+    ) -> None:
+        """Initialize the reporter."""
+        self.hass = hass
+        self.entry = entry
+        self.client = client
+        self.settings = settings
+        self.readings = readings
+        self.state = state
+        self.history = history
+        self.retry_queue = RetryQueue(
+            hass, entry.entry_id, self._async_request_retry, retry_delay_cap(settings)
+        )
+        self.metrics = ReportMetrics()
+        self.destinations = DestinationFanout(
+            hass, build_destinations(hass, client, settings)
+        )
+        self.policy = DeadbandPolicy(
+            settings.deadband, settings.heartbeat_interval * 60, settings.interval * 60
+        )
+        self._signal = SIGNAL_REPORT_UPDATED.format(entry.entry_id)
+        self._task: asyncio.Task | None = None
+        self._pending = False
+        # Set when the retry queue asked for its report to be sent
+        self._retry = False
+        # Value the running report is uploading to Temperatur.nu, if any
+        self._uploading: float | None = None
+        # Set when the next report must be uploaded even inside the deadband
+        self._force = False
+        self._debouncer: Debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=REPORT_NOW_COOLDOWN,
+            immediate=False,
+            function=self._async_request_forced_report,
+        )
+
+    async def async_apply_settings(self, settings: EntrySettings) -> None:
+        """Switch to changed settings without losing the reporting state.
+
+        The deadband keeps its last upload, and the destinations are only
+        rebuilt if their addresses changed.
+        """
+        old, self.settings = self.settings, settings
+        policy = self.policy
+        policy.deadband = settings.deadband
+        policy.heartbeat = settings.heartbeat_interval * 60
+        policy.interval = settings.interval * 60
+        self.retry_queue.max_delay = retry_delay_cap(settings)
+        if (settings.collector_url, settings.sink) != (old.collector_url, old.sink):
+            await self.destinations.async_shutdown()
+            self.destinations = DestinationFanout(
+                self.hass, build_destinations(self.hass, self.client, settings)
+            )
+
+    async def async_tick(self) -> None:
+        """Handle a scheduled reporting tick and wait for it to finish."""
+        self.async_request_report()
+        if (task := self._task) is not None:
+            await asyncio.shield(task)
+
+    async def async_report_when_ready(self) -> None:
+        """Send the first report as soon as every source has a reading.
+
+        Waits at most FIRST_REPORT_TIMEOUT seconds and then reports with
+        the readings that are available, after seeding the window from
+        recorder history. Nothing is sent if a scheduled report already
+        ran in the meantime.
+        """
+        readings = self.readings
+        if not await readings.async_wait_ready(FIRST_REPORT_TIMEOUT):
+            _LOGGER.info(
+                "%d of %d sensor(s) available after %d seconds, reporting anyway",
+                readings.count, len(readings.entity_ids), FIRST_REPORT_TIMEOUT,
+            )
+        if (backfilled := readings.async_request_backfill()) is not None:
+            # Let the first report cover a whole interval of samples
+            with suppress(TimeoutError):
+                async with asyncio.timeout(BACKFILL_TIMEOUT):
+                    await asyncio.shield(backfilled)
+        if self.state.status == "pending":
+            await self.async_tick()
+
+    async def async_report_now(self) -> None:
+        """Request a report, merging bursts of calls into one upload."""
+        await self._debouncer.async_call()
+
+    @callback
+    def _async_request_forced_report(self) -> None:
+        """Request a report that is uploaded even if the value is unchanged."""
+        self._force = True
+        self.async_request_report()
+
+    @callback
+    def async_request_report(self) -> None:
+        """Start a report, or merge into the one already in flight."""
+        if self._task is not None:
+            _LOGGER.debug(
+                "Report for %s already in flight, merging request", self.entry.title
+            )
+        self._pending = True
+        self._async_start()
+
+    @callback
+    def _async_request_retry(self) -> None:
+        """Retry the queued report once no other upload is in flight."""
+        self._retry = True
+        self._async_start()
+
+    @callback
+    def _async_start(self) -> None:
+        """Start working through the requests unless already running."""
+        if self._task is None:
+            self._task = self.hass.async_create_task(
+                self._async_run(), f"{self.entry.entry_id} report"
+            )
+
+    async def _async_run(self) -> None:
+        """Run reports and retries one at a time until none is requested.
+
+        Reports go first, so a retry that is due sends the newest value.
+        """
+        try:
+            while self._pending or self._retry:
+                if self._pending:
+                    self._pending = False
+                    await self._async_run_report()
+                else:
+                    self._retry = False
+                    await self._async_retry()
+        finally:
+            self._task = None
+
+    async def _async_run_report(self) -> None:
+        """Run one report under REPORT_TIMEOUT and record it."""
+        timestamp = time.time()
+        start = time.perf_counter()
+        self._uploading = None
+        try:
+            async with asyncio.timeout(REPORT_TIMEOUT):
+                outcome = await self.async_report()
+        except TimeoutError:
+            outcome = OUTCOME_TIMEOUT
+            self.metrics.count(OUTCOME_TIMEOUT)
+            msg = f"Report timed out after {REPORT_TIMEOUT} seconds"
+            _LOGGER.error(msg)
+            # Retry an upload that timed out like any other failed upload
+            if self._uploading is not None:
+                self.retry_queue.async_enqueue(self._uploading, timestamp)
+            self.state.status = "failed"
+            self.state.message = msg
+            self.state.time = datetime.now()
+        elapsed = time.perf_counter() - start
+        self.metrics.total.record(elapsed)
+        if self.history is not None and outcome is not None:
+            await self.hass.async_add_executor_job(
+                self.history.append,
+                timestamp,
+                None if outcome == OUTCOME_NO_READINGS else self.state.temperature,
+                self.readings.count,
+                outcome,
+                elapsed,
+            )
+        async_dispatcher_send(self.hass, self._signal)
+
+    async def _async_retry(self) -> None:
+        """Send the report from the retry queue and push the result."""
+        if (report := self.retry_queue.async_next()) is None:
+            return
+        timestamp, temperature = report
+        try:
+            async with asyncio.timeout(REPORT_TIMEOUT):
+                sent = await self._async_send(
+                    temperature,
+                    f"queued at {datetime.fromtimestamp(timestamp):%H:%M:%S}",
+                )
+        except TimeoutError:
+            self.metrics.count(OUTCOME_TIMEOUT)
+            sent = False
+        self.retry_queue.async_sent(report, sent)
+        async_dispatcher_send(self.hass, self._signal)
+
+    async def async_shutdown(self) -> None:
+        """Cancel reports in flight, persist the retry queue and close the history."""
+        self._debouncer.async_cancel()
+        if (task := self._task) is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        await self.destinations.async_shutdown()
+        await self.retry_queue.async_shutdown()
+        if self.history is not None:
+            await self.hass.async_add_executor_job(self.history.close)
+
+    async def async_report(self) -> int | None:
+        """Report temperature to Temperatur.nu and return the outcome.
+
+        The outcome is an index into OUTCOMES, or None if the entry has no
+        hash code.
+        """
+        settings = self.settings
+        state = self.state
+        readings = self.readings
+
+        if not settings.hash_code:
+            _LOGGER.error("No hash_code found in configuration")
+            return None
+
+        aggregation_method = settings.aggregation_method
+        metrics = self.metrics
+
+        # Update sensor temperatures in the report state
+        start = time.perf_counter()
+        now = time.time()
+        readings.expire_stale(now)
+        state.stale_sensors = readings.stale_sensors()
+        state.sensor_temperatures = readings.sensor_temperatures()
+        collected = time.perf_counter()
+        metrics.collect.record(collected - start)
+
+        # The reported value and the statistics sensors share one result
+        state.statistics = readings.statistics()
+        aggregated_temp = readings.aggregate(aggregation_method, now, state.statistics)
+        metrics.aggregate.record(time.perf_counter() - collected)
+        if aggregated_temp is None:
+            metrics.count(OUTCOME_NO_READINGS)
+            if state.stale_sensors:
+                # Skip the upload rather than report an outdated value
+                msg = f"No fresh temperature readings, {len(state.stale_sensors)} sensor(s) stale"
+            else:
+                msg = "No valid temperature readings from any sensor"
+            _LOGGER.warning(msg)
+            state.status = "failed"
+            state.message = msg
+            state.time = datetime.now()
+            return OUTCOME_NO_READINGS
+
+        # Round to 1 decimal place
+        aggregated_temp = round(aggregated_temp, 1)
+
+        # Store the calculated temperature (before reporting)
+        state.temperature = aggregated_temp
+
+        force, self._force = self._force, False
+        if not force and not self.policy.should_report(aggregated_temp, now):
+            metrics.count(OUTCOME_SKIPPED)
+            _LOGGER.debug(
+                "%.1f°C is within %.1f°C of the last report, skipping upload",
+                aggregated_temp, self.policy.deadband,
+            )
+            return OUTCOME_SKIPPED
+        self.policy.reported(aggregated_temp, now)
+
+        if self.destinations:
+            # Runs in the background while Temperatur.nu is sent to below
+            self.destinations.async_publish(
+                Report(
+                    self.entry.entry_id,
+                    self.entry.title,
+                    now,
+                    aggregated_temp,
+                    aggregation_method,
+                    state.sensor_temperatures,
+                )
+            )
+
+        if self.retry_queue:
+            # Replace the undelivered value and wait for its retry backoff
+            self.retry_queue.async_enqueue(aggregated_temp, time.time())
+            metrics.count(OUTCOME_QUEUED)
+            state.status = "queued"
+            state.message = (
+                f"Waiting to retry after {self.retry_queue.attempt + 1} failed attempt(s)"
+            )
+            state.time = datetime.now()
+            return OUTCOME_QUEUED
+
+        self._uploading = aggregated_temp
+        if not await self._async_send(
+            aggregated_temp, f"{aggregation_method} of {readings.count} sensor(s)"
+        ):
+            self.retry_queue.async_enqueue(aggregated_temp, time.time())
+            return OUTCOME_FAILURE
+        return OUTCOME_SUCCESS
+
+    async def _async_send(self, temperature: float, description: str) -> bool:
+        """Send one temperature to Temperatur.nu and record the outcome."""
+        state = self.state
+        hash_code = self.settings.hash_code
+
+        # Format temperature with dot as decimal separator (US format)
+        temp_formatted = f"{temperature:.1f}"
+        url = f"{REPORT_URL}?hash={hash_code}&t={temp_formatted}"
+
+        try:
+            self.metrics.requests += 1
+            status, response_text = await self.client.async_get(
+                url, metrics=self.metrics
+            )
+
+            if status == 200:
+                msg = f"Successfully reported {temp_formatted}°C ({description}). Server response: {response_text}"
+                _LOGGER.info(msg)
+                _LOGGER.debug("URL used: %s", url)
+                state.status = "success"
+                state.message = truncate_message(response_text)
+                state.reported_temperature = temperature
+            else:
+                msg = f"Failed with HTTP {status}. Response: {response_text}. URL: {url}"
+                _LOGGER.error(msg)
+                state.status = "failed"
+                state.message = truncate_message(msg)
+
+            state.time = datetime.now()
+            self.metrics.count(OUTCOME_SUCCESS if status == 200 else OUTCOME_FAILURE)
+            return status == 200
+
+        except Exception as err:
+            self.metrics.count(OUTCOME_FAILURE)
+            msg = f"Error reporting temperature: {err}. URL: {url}"
+            _LOGGER.error(msg)
+            state.status = "failed"
+            state.message = truncate_message(msg)
+            state.time = datetime.now()
+            return False
@@ -0,0 +1,172 @@
+"""Persistent retry queue for reports that could not be delivered."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime
+import logging
+import random
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_AGE,
+    RETRY_MAX_DELAY,
+    RETRY_SAVE_DELAY,
+    RETRY_STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# (timestamp, temperature) of a report that was not delivered
+QueuedReport = tuple[float, float]
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Return the delay before retry number attempt, with full jitter.
+
+    The upper bound doubles for every failed attempt up to cap, and the
+    delay is drawn uniformly below it so that many stations recovering
+    from the same outage do not retry in lockstep.
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def _retry_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Return the store holding the retry queue of an entry."""
+    return Store(hass, RETRY_STORAGE_VERSION, f"{DOMAIN}.retry_{entry_id}")
+
+
+async def async_remove_retry_queue(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the persisted retry queue of a deleted entry."""
+    await _retry_store(hass, entry_id).async_remove()
+
+
+class RetryQueue:
+    """Newest undelivered report and its retry backoff, persisted in HA storage.
+
+    rapportera.php takes no timestamp, so whatever is sent is recorded as
+    the current temperature. Resending older values after an outage would
+    show them as live, so a newer report replaces the one waiting, and a
+    report older than RETRY_MAX_AGE is dropped instead of sent. After a
+    failure the next attempt waits for an exponential backoff with jitter.
+
+    The queue does not send anything itself: when a retry is due it calls
+    request_retry, and the reporter sends the report taken with
+    async_next in turn with its other uploads and passes the outcome to
+    async_sent.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        request_retry: Callable[[], None],
+        max_delay: float = RETRY_MAX_DELAY,
+    ) -> None:
+        """Initialize the queue."""
+        self.hass = hass
+        self._request_retry = request_retry
+        # Upper bound of the backoff in seconds
+        self.max_delay = max_delay
+        self._store = _retry_store(hass, entry_id)
+        self.report: QueuedReport | None = None
+        self.attempt = 0
+        self.next_retry: datetime | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        # Set while a requested retry has not been taken yet
+        self._due = False
+
+    def __len__(self) -> int:
+        """Return the number of queued reports."""
+        return 0 if self.report is None else 1
+
+    async def async_load(self) -> None:
+        """Load the queued report from storage and schedule sending it."""
+        if (stored := await self._store.async_load()) is None:
+            return
+        # Older versions stored every undelivered report, oldest first
+        if reports := stored["reports"]:
+            self.report = tuple(reports[-1])
+            _LOGGER.info("Loaded a queued report")
+            self._async_schedule(RETRY_BASE_DELAY)
+
+    @callback
+    def async_enqueue(self, temperature: float, timestamp: float) -> None:
+        """Queue a report in place of any older one and schedule sending it."""
+        if self.report is not None:
+            _LOGGER.debug("Replacing the queued report with a newer one")
+        self.report = (timestamp, temperature)
+        self._async_save()
+        if self._unsub_timer is None and not self._due:
+            self._async_schedule(backoff_delay(self.attempt, RETRY_BASE_DELAY, self.max_delay))
+
+    @callback
+    def _async_schedule(self, delay: float) -> None:
+        """Schedule the next attempt."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+        self.next_retry = datetime.fromtimestamp(time.time() + delay)
+        self._unsub_timer = async_call_later(self.hass, delay, self._async_retry_due)
+
+    @callback
+    def _async_retry_due(self, _now: datetime) -> None:
+        """Ask the reporter to send the queued report."""
+        self._unsub_timer = None
+        self._due = True
+        self._request_retry()
+
+    @callback
+    def async_next(self) -> QueuedReport | None:
+        """Return the report to retry now, or None if there is none left."""
+        self._due = False
+        if (report := self.report) is not None and report[0] < time.time() - RETRY_MAX_AGE:
+            _LOGGER.debug("Dropping a queued report older than %d seconds", RETRY_MAX_AGE)
+            report = self.report = None
+            self._async_save()
+        if report is None:
+            self.attempt = 0
+            self.next_retry = None
+        return report
+
+    @callback
+    def async_sent(self, report: QueuedReport, sent: bool) -> None:
+        """Record the outcome of retrying report and schedule the next attempt."""
+        if sent:
+            # Keep a report queued while this one was being sent
+            if self.report is report:
+                self.report = None
+            self.attempt = 0
+            delay = RETRY_BASE_DELAY
+        else:
+            self.attempt += 1
+            delay = backoff_delay(self.attempt, RETRY_BASE_DELAY, self.max_delay)
+            _LOGGER.debug(
+                "Retry %d failed, next attempt in %.0f seconds", self.attempt, delay
+            )
+        self._async_save()
+        if self.report is not None:
+            self._async_schedule(delay)
+        else:
+            self.next_retry = None
+
+    @callback
+    def _async_save(self) -> None:
+        """Persist the queue after a short delay."""
+        self._store.async_delay_save(self._data_to_save, RETRY_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the data to persist."""
+        return {"reports": [] if self.report is None else [self.report]}
+
+    async def async_shutdown(self) -> None:
+        """Stop retrying and persist the queue."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        await self._store.async_save(self._data_to_save())
@@ -0,0 +1,177 @@
+"""Integration-wide scheduler for reporting ticks."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+import hashlib
+import heapq
+import logging
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_SCHEDULER, SCHEDULER_CONCURRENCY, SCHEDULER_JITTER_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def jitter_offset(key: str, interval: float) -> float:
+    """Return a deterministic offset into the jitter window for key."""
+    window = min(interval, SCHEDULER_JITTER_WINDOW)
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64 * window
+
+
+def next_due(now: float, interval: float, offset: float) -> float:
+    """Return the first time after now on the wall-clock grid plus offset."""
+    return ((now - offset) // interval + 1) * interval + offset
+
+
+class ScheduledEntry:
+    """A config entry's reporting schedule."""
+
+    __slots__ = ("entry_id", "interval", "offset", "action", "due")
+
+    def __init__(
+        self,
+        entry_id: str,
+        interval: float,
+        offset: float,
+        action: Callable[[], Awaitable[None]],
+    ) -> None:
+        """Initialize the schedule."""
+        self.entry_id = entry_id
+        self.interval = interval
+        self.offset = offset
+        self.action = action
+        self.due = 0.0
+
+
+class ReportScheduler:
+    """Single timer that owns the reporting ticks of every config entry.
+
+    Ticks are aligned to multiples of each entry's interval on the wall
+    clock and shifted by a deterministic per-hash offset into the first
+    SCHEDULER_JITTER_WINDOW seconds, so stations stay in the right minute
+    bucket without all firing at once. Due entries run concurrently, at
+    most SCHEDULER_CONCURRENCY at a time.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self.entries: dict[str, ScheduledEntry] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._semaphore = asyncio.Semaphore(SCHEDULER_CONCURRENCY)
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._timer_due: float | None = None
+
+    @callback
+    def async_add(
+        self,
+        entry_id: str,
+        interval: float,
+        jitter_key: str,
+        action: Callable[[], Awaitable[None]],
+    ) -> CALLBACK_TYPE:
+        """Schedule action every interval seconds and return a remover."""
+        scheduled = ScheduledEntry(
+            entry_id, interval, jitter_offset(jitter_key, interval), action
+        )
+        self.entries[entry_id] = scheduled
+        self._async_push(scheduled, time.time())
+
+        @callback
+        def async_remove() -> None:
+            """Stop scheduling the entry."""
+            if self.entries.get(entry_id) is scheduled:
+                del self.entries[entry_id]
+            if not self.entries:
+                self._async_cancel_timer()
+                self._heap.clear()
+                if self.hass.data.get(DATA_SCHEDULER) is self:
+                    del self.hass.data[DATA_SCHEDULER]
+
+        return async_remove
+
+    @callback
+    def async_update(self, entry_id: str, interval: float, jitter_key: str) -> None:
+        """Move a scheduled entry to another interval or jitter key."""
+        scheduled = self.entries[entry_id]
+        scheduled.interval = interval
+        scheduled.offset = jitter_offset(jitter_key, interval)
+        # The tick queued for the old schedule is skipped as its due time
+        # no longer matches
+        self._async_push(scheduled, time.time())
+
+    @callback
+    def _async_push(self, scheduled: ScheduledEntry, now: float) -> None:
+        """Queue the next tick of an entry and rearm the timer if needed."""
+        scheduled.due = next_due(now, scheduled.interval, scheduled.offset)
+        heapq.heappush(self._heap, (scheduled.due, scheduled.entry_id))
+        if self._timer_due is None or scheduled.due < self._timer_due:
+            self._async_arm(scheduled.due)
+
+    @callback
+    def _async_arm(self, due: float) -> None:
+        """Arm the timer for the given time."""
+        self._async_cancel_timer()
+        self._timer_due = due
+        self._unsub_timer = async_track_point_in_utc_time(
+            self.hass, self._async_fire, dt_util.utc_from_timestamp(due)
+        )
+
+    @callback
+    def _async_cancel_timer(self) -> None:
+        """Cancel the armed timer."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._timer_due = None
+
+    @callback
+    def _async_fire(self, fired_at: datetime) -> None:
+        """Run every entry that is due and schedule their next ticks."""
+        # The datetime passed in is rounded to microseconds, so it can fall
+        # just short of the due time the timer was armed for
+        now = max(fired_at.timestamp(), self._timer_due or 0.0)
+        self._unsub_timer = None
+        self._timer_due = None
+        heap = self._heap
+        due: list[ScheduledEntry] = []
+        while heap and heap[0][0] <= now:
+            due_time, entry_id = heapq.heappop(heap)
+            scheduled = self.entries.get(entry_id)
+            # Skip entries that were removed or rescheduled since being queued
+            if scheduled is None or scheduled.due != due_time:
+                continue
+            due.append(scheduled)
+            scheduled.due = next_due(now, scheduled.interval, scheduled.offset)
+            heapq.heappush(heap, (scheduled.due, entry_id))
+
+        for scheduled in due:
+            self.hass.async_create_background_task(
+                self._async_run(scheduled), f"{scheduled.entry_id} scheduled report"
+            )
+        if heap:
+            self._async_arm(heap[0][0])
+
+    async def _async_run(self, scheduled: ScheduledEntry) -> None:
+        """Run one entry's tick under the concurrency cap."""
+        async with self._semaphore:
+            try:
+                await scheduled.action()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Scheduled report for %s failed", scheduled.entry_id)
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> ReportScheduler:
+    """Return the integration-wide scheduler, creating it if needed."""
+    scheduler: ReportScheduler | None = hass.data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = hass.data[DATA_SCHEDULER] = ReportScheduler(hass)
+    return scheduler
@@ -1,17 +1,41 @@
 """Sensor platform for Report Temperature."""
+from abc import abstractmethod
 import logging
 
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN
+from .const import (
+    DOMAIN,
+    SIGNAL_REPORT_UPDATED,
+    STATISTIC_MAX,
+    STATISTIC_MEAN,
+    STATISTIC_MEDIAN,
+    STATISTIC_MIN,
+    STATISTIC_SPREAD,
+)
+from .models import RapporteraTempData
 
 _LOGGER = logging.getLogger(__name__)
 
+STATUS_ICONS = {
+    "success": "mdi:cloud-check",
+    "failed": "mdi:cloud-alert",
+    "queued": "mdi:cloud-refresh",
+}
+
+STATISTIC_NAMES = {
+    STATISTIC_MIN: "Minimum",
+    STATISTIC_MEAN: "Mean",
+    STATISTIC_MAX: "Maximum",
+    STATISTIC_MEDIAN: "Median",
+    STATISTIC_SPREAD: "Spread",
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -19,123 +43,203 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the sensor platform."""
+    runtime: RapporteraTempData = config_entry.runtime_data
     async_add_entities([
-        RapporteraTempStatusSensor(hass, config_entry),
-        RapporteraTempTemperatureSensor(hass, config_entry),
-    ], True)
-
-
-class RapporteraTempStatusSensor(SensorEntity):
+        RapporteraTempStatusSensor(runtime, config_entry),
+        RapporteraTempTemperatureSensor(runtime, config_entry),
+        *(
+            RapporteraTempStatisticSensor(runtime, config_entry, statistic)
+            for statistic in runtime.settings.statistics
+        ),
+    ])
+
+
+class RapporteraTempEntity(SensorEntity):
+    """Base entity that writes its state only when a report has finished.
+
+    State and attributes are built once per report in
+    _async_update_from_data rather than on every property access.
+    """
+
+    _attr_should_poll = False
+
+    def __init__(self, runtime: RapporteraTempData, config_entry: ConfigEntry) -> None:
+        """Initialize the entity."""
+        self._runtime = runtime
+        self._settings = runtime.settings
+        self._state = runtime.state
+        self._entry_id = config_entry.entry_id
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to report updates."""
+        self._async_update_from_data()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_REPORT_UPDATED.format(self._entry_id),
+                self._async_handle_report,
+            )
+        )
+
+    @callback
+    def _async_handle_report(self) -> None:
+        """Update from the finished report and write the state."""
+        if self._settings is not self._runtime.settings:
+            # The options were changed and applied in place
+            self._settings = self._runtime.settings
+            self._async_update_settings()
+        self._async_update_from_data()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_update_settings(self) -> None:
+        """Update what is derived from the settings, like the name."""
+
+    @callback
+    @abstractmethod
+    def _async_update_from_data(self) -> None:
+        """Update state and attributes from the report state."""
+
+
+class RapporteraTempStatusSensor(RapporteraTempEntity):
     """Representation of a Report Temperature Status sensor."""
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    # Change on every report; kept on the entity but out of the recorder
+    _unrecorded_attributes = frozenset(
+        {
+            "sensor_temperatures",
+            "last_update_message",
+            "last_update_time",
+            "last_reported_temperature",
+            "queued_reports",
+            "stale_sensors",
+            "effective_interval_minutes",
+        }
+    )
+
+    def __init__(self, runtime: RapporteraTempData, config_entry: ConfigEntry) -> None:
         """Initialize the sensor."""
-        self._hass = hass
-        self._config_entry = config_entry
-        # Support both old (sensor_entity_id) and new (sensor_entity_ids) configuration
-        sensors = config_entry.data.get("sensor_entity_ids", [config_entry.data.get("sensor_entity_id")])
-        if not isinstance(sensors, list):
-            sensors = [sensors]
-        sensor_count = len([s for s in sensors if s])
-        default_name = f"Report Temperature ({sensor_count} sensor{'s' if sensor_count > 1 else ''})"
-        entity_name = config_entry.data.get("entity_name", default_name)
-        self._attr_name = f"{entity_name} Status"
+        super().__init__(runtime, config_entry)
         self._attr_unique_id = f"{DOMAIN}_{config_entry.entry_id}_status"
         self._attr_icon = "mdi:cloud-upload"
-        self._attr_should_poll = True
-
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        data = self._hass.data.get(DOMAIN, {}).get(self._config_entry.entry_id, {})
-        return data.get("last_update_status", "pending")
-
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        data = self._hass.data.get(DOMAIN, {}).get(self._config_entry.entry_id, {})
-        config = data.get("config", self._config_entry.data)
-        
-        # Support both old (single) and new (multiple) sensor format
-        sensors = config.get("sensor_entity_ids", [config.get("sensor_entity_id")])
-        if not isinstance(sensors, list):
-            sensors = [sensors]
-        
-        attrs = {
-            "sensors": sensors,
-            "sensor_count": len([s for s in sensors if s]),
-            "aggregation_method": config.get("aggregation_method", "min"),
-            "sensor_temperatures": data.get("sensor_temperatures", {}),
-            "hash_code": (config.get("hash_code", "")[:8] + "...") if config.get("hash_code") else "N/A",
-            "interval_minutes": config.get("interval", 5),
-            "last_update_status": data.get("last_update_status", "pending"),
-            "last_update_message": data.get("last_update_message", "No updates yet"),
-            "last_update_time": data.get("last_update_time"),
-            "last_reported_temperature": data.get("last_reported_temperature"),
+        self._async_update_settings()
+        self._async_update_from_data()
+
+    @callback
+    def _async_update_settings(self) -> None:
+        """Update the name and the shown hash code from the settings."""
+        settings = self._settings
+        sensor_count = len(settings.sensor_ids)
+        default_name = f"Report Temperature ({sensor_count} sensor{'s' if sensor_count > 1 else ''})"
+        entity_name = settings.entity_name or default_name
+        self._attr_name = f"{entity_name} Status"
+        self._hash_display = (settings.hash_code[:8] + "...") if settings.hash_code else "N/A"
+
+    @callback
+    def _async_update_from_data(self) -> None:
+        """Update state, icon and attributes from the report state."""
+        settings = self._settings
+        state = self._state
+        reporter = self._runtime.reporter
+        effective_interval = reporter.policy.effective_interval
+        self._attr_native_value = state.status
+        self._attr_icon = STATUS_ICONS.get(state.status, "mdi:cloud-upload")
+        self._attr_extra_state_attributes = {
+            "sensors": settings.sensor_ids,
+            "sensor_count": len(settings.sensor_ids),
+            "aggregation_method": settings.aggregation_method,
+            "sensor_temperatures": state.sensor_temperatures,
+            "stale_sensors": state.stale_sensors,
+            "hash_code": self._hash_display,
+            "interval_minutes": settings.interval,
+            "last_update_status": state.status,
+            "last_update_message": state.message,
+            "last_update_time": state.time,
+            "last_reported_temperature": state.reported_temperature,
+            "queued_reports": len(reporter.retry_queue),
+            "effective_interval_minutes": (
+                round(effective_interval / 60, 1) if effective_interval is not None else None
+            ),
         }
-        
-        return attrs
-    
-    @property
-    def icon(self):
-        """Return the icon based on status."""
-        data = self._hass.data.get(DOMAIN, {}).get(self._config_entry.entry_id, {})
-        status = data.get("last_update_status", "pending")
-        
-        if status == "success":
-            return "mdi:cloud-check"
-        elif status == "failed":
-            return "mdi:cloud-alert"
-        else:
-            return "mdi:cloud-upload"
-
-
-class RapporteraTempTemperatureSensor(SensorEntity):
+
+
+class RapporteraTempTemperatureSensor(RapporteraTempEntity):
     """Representation of the aggregated temperature sensor."""
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    # The temperature itself is the state; the per-source breakdown is not
+    # worth a recorder row on every report
+    _unrecorded_attributes = frozenset(
+        {"sensor_temperatures", "last_reported_temperature"}
+    )
+
+    def __init__(self, runtime: RapporteraTempData, config_entry: ConfigEntry) -> None:
         """Initialize the sensor."""
-        self._hass = hass
-        self._config_entry = config_entry
-        entity_name = config_entry.data.get("entity_name", "Report Temperature")
-        self._attr_name = f"{entity_name} Temperature"
+        super().__init__(runtime, config_entry)
         self._attr_unique_id = f"{DOMAIN}_{config_entry.entry_id}_temperature"
         self._attr_device_class = SensorDeviceClass.TEMPERATURE
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
-        self._attr_should_poll = True
         self._attr_icon = "mdi:thermometer"
+        self._async_update_settings()
+        self._async_update_from_data()
+
+    @callback
+    def _async_update_settings(self) -> None:
+        """Update the name from the settings."""
+        entity_name = self._settings.entity_name or "Report Temperature"
+        self._attr_name = f"{entity_name} Temperature"
 
-    @property
-    def native_value(self):
-        """Return the temperature value."""
-        data = self._hass.data.get(DOMAIN, {}).get(self._config_entry.entry_id, {})
-        return data.get("last_temperature")
-
-    @property
-    def extra_state_attributes(self):
-        """Return the state attributes."""
-        data = self._hass.data.get(DOMAIN, {}).get(self._config_entry.entry_id, {})
-        config = data.get("config", self._config_entry.data)
-        
-        # Support both old (single) and new (multiple) sensor format
-        sensors = config.get("sensor_entity_ids", [config.get("sensor_entity_id")])
-        if not isinstance(sensors, list):
-            sensors = [sensors]
-        
-        attrs = {
-            "aggregation_method": config.get("aggregation_method", "min"),
-            "source_sensors": sensors,
-            "sensor_count": len([s for s in sensors if s]),
-            "sensor_temperatures": data.get("sensor_temperatures", {}),
-            "last_reported_temperature": data.get("last_reported_temperature"),
+    @callback
+    def _async_update_from_data(self) -> None:
+        """Update value, availability and attributes from the report state."""
+        settings = self._settings
+        state = self._state
+        self._attr_native_value = state.temperature
+        self._attr_available = state.temperature is not None
+        self._attr_extra_state_attributes = {
+            "aggregation_method": settings.aggregation_method,
+            "source_sensors": settings.sensor_ids,
+            "sensor_count": len(settings.sensor_ids),
+            "sensor_temperatures": state.sensor_temperatures,
+            "last_reported_temperature": state.reported_temperature,
         }
-        
-        return attrs
 
-    @property
-    def available(self):
-        """Return if the sensor is available."""
-        data = self._hass.data.get(DOMAIN, {}).get(self._config_entry.entry_id, {})
-        return data.get("last_temperature") is not None
 
+class RapporteraTempStatisticSensor(RapporteraTempEntity):
+    """One statistic of the source readings, from the same pass as the report."""
+
+    def __init__(
+        self, runtime: RapporteraTempData, config_entry: ConfigEntry, statistic: str
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(runtime, config_entry)
+        self._statistic = statistic
+        self._attr_unique_id = f"{DOMAIN}_{config_entry.entry_id}_{statistic}"
+        # The spread is a temperature difference, which must not be
+        # converted like a temperature
+        if statistic != STATISTIC_SPREAD:
+            self._attr_device_class = SensorDeviceClass.TEMPERATURE
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
+        self._attr_icon = (
+            "mdi:arrow-expand-vertical" if statistic == STATISTIC_SPREAD else "mdi:thermometer"
+        )
+        self._async_update_settings()
+        self._async_update_from_data()
+
+    @callback
+    def _async_update_settings(self) -> None:
+        """Update the name from the settings."""
+        entity_name = self._settings.entity_name or "Report Temperature"
+        self._attr_name = f"{entity_name} {STATISTIC_NAMES[self._statistic]}"
+
+    @callback
+    def _async_update_from_data(self) -> None:
+        """Update value and availability from the report state."""
+        statistics = self._state.statistics
+        if statistics is None:
+            self._attr_native_value = None
+            self._attr_available = False
+            return
+        self._attr_native_value = round(getattr(statistics, self._statistic), 1)
+        self._attr_available = True
@@ -0,0 +1,148 @@
+"""Index of the entities that can be used as temperature sources."""
+from __future__ import annotations
+
+import heapq
+import logging
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import ATTR_DEVICE_CLASS, ATTR_UNIT_OF_MEASUREMENT, UnitOfTemperature
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, State, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util.unit_conversion import TemperatureConverter
+
+from .const import DATA_SOURCE_INDEX, SHADE_SUGGESTIONS
+from .multiplexer import TEMPERATURE_UNITS, parse_value
+
+_LOGGER = logging.getLogger(__name__)
+
+SENSOR_DOMAIN = "sensor"
+
+
+def is_temperature(device_class: str | None, unit: str | None) -> bool:
+    """Return whether a device class or unit marks a temperature."""
+    return device_class == SensorDeviceClass.TEMPERATURE or unit in TEMPERATURE_UNITS
+
+
+def _state_is_temperature(state: State | None) -> bool:
+    """Return whether a state looks like a temperature reading."""
+    if state is None:
+        return False
+    attributes = state.attributes
+    return is_temperature(
+        attributes.get(ATTR_DEVICE_CLASS), attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+    )
+
+
+def _entry_is_temperature(entry: er.RegistryEntry) -> bool:
+    """Return whether a registry entry describes a temperature sensor."""
+    return is_temperature(
+        entry.device_class or entry.original_device_class, entry.unit_of_measurement
+    )
+
+
+class SourceIndex:
+    """Set of the sensor entities that report a temperature.
+
+    Built once from the entity registry and the current states, then kept
+    current by entity registry events, so the config and options flows
+    can offer only these entities and check a selected source with one
+    set lookup instead of scanning every entity in the instance.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the index."""
+        self.hass = hass
+        self.entity_ids: set[str] = set()
+        self._registry = er.async_get(hass)
+        self._unsub_registry: CALLBACK_TYPE | None = None
+
+    @callback
+    def async_build(self) -> None:
+        """Index every temperature sensor and follow registry changes."""
+        entity_ids = self.entity_ids
+        for entry in self._registry.entities.values():
+            if entry.domain == SENSOR_DOMAIN and _entry_is_temperature(entry):
+                entity_ids.add(entry.entity_id)
+        # Entities without a unique ID are only known by their state
+        for state in self.hass.states.async_all(SENSOR_DOMAIN):
+            if _state_is_temperature(state):
+                entity_ids.add(state.entity_id)
+        self._unsub_registry = self.hass.bus.async_listen(
+            er.EVENT_ENTITY_REGISTRY_UPDATED, self._async_registry_updated
+        )
+        _LOGGER.debug("Indexed %d temperature sensor(s)", len(entity_ids))
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Stop following registry changes."""
+        if self._unsub_registry is not None:
+            self._unsub_registry()
+            self._unsub_registry = None
+
+    @callback
+    def _async_registry_updated(self, event: Event) -> None:
+        """Add, rename or drop an entity after a registry change."""
+        data = event.data
+        entity_id: str = data["entity_id"]
+        if old_entity_id := data.get("old_entity_id"):
+            self.entity_ids.discard(old_entity_id)
+        if data["action"] == "remove" or not entity_id.startswith(f"{SENSOR_DOMAIN}."):
+            self.entity_ids.discard(entity_id)
+            return
+        entry = self._registry.async_get(entity_id)
+        if (entry is not None and _entry_is_temperature(entry)) or _state_is_temperature(
+            self.hass.states.get(entity_id)
+        ):
+            self.entity_ids.add(entity_id)
+        else:
+            self.entity_ids.discard(entity_id)
+
+    def __contains__(self, entity_id: str) -> bool:
+        """Return whether an entity is a temperature source.
+
+        An entity that was not indexed, because it has no registry entry
+        and appeared after the index was built, is checked by its state.
+        """
+        if entity_id in self.entity_ids:
+            return True
+        if _state_is_temperature(self.hass.states.get(entity_id)):
+            self.entity_ids.add(entity_id)
+            return True
+        return False
+
+    def suggest_shade(self, limit: int = SHADE_SUGGESTIONS) -> list[tuple[str, float]]:
+        """Return the coldest sources with their current reading in Celsius.
+
+        A sensor in the sun reads warmer than one in the shade next to
+        it, so the lowest current readings are the likely shade sensors.
+        """
+        readings = []
+        for entity_id in self.entity_ids:
+            state = self.hass.states.get(entity_id)
+            if state is None or (value := parse_value(state.state)) is None:
+                continue
+            unit = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
+            if unit in TEMPERATURE_UNITS and unit != UnitOfTemperature.CELSIUS:
+                value = TemperatureConverter.convert(value, unit, UnitOfTemperature.CELSIUS)
+            readings.append((value, entity_id))
+        return [
+            (entity_id, value) for value, entity_id in heapq.nsmallest(limit, readings)
+        ]
+
+
+@callback
+def async_get_source_index(hass: HomeAssistant) -> SourceIndex:
+    """Return the integration-wide source index, building it if needed."""
+    index: SourceIndex | None = hass.data.get(DATA_SOURCE_INDEX)
+    if index is None:
+        index = hass.data[DATA_SOURCE_INDEX] = SourceIndex(hass)
+        index.async_build()
+    return index
+
+
+@callback
+def async_drop_source_index(hass: HomeAssistant) -> None:
+    """Drop the source index, if built, and stop keeping it current."""
+    index: SourceIndex | None = hass.data.pop(DATA_SOURCE_INDEX, None)
+    if index is not None:
+        index.async_shutdown()
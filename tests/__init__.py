@@ -1 +1,19 @@
 """Tests for RapporteraTempHA integration."""
+import asyncio
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+
+async def setup_integration(hass: HomeAssistant, entry: MockConfigEntry) -> None:
+    """Set up a config entry and wait for the report sent on startup."""
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    await wait_for_startup_report(hass, entry)
+
+
+async def wait_for_startup_report(hass: HomeAssistant, entry: MockConfigEntry) -> None:
+    """Wait until the report sent on startup has finished."""
+    # async_block_till_done does not wait for the entry's background tasks
+    await asyncio.gather(*entry._background_tasks)
+    await hass.async_block_till_done()
@@ -1,9 +1,95 @@
 """Test configuration for RapporteraTempHA integration - Bronze minimum."""
+import asyncio
 import pytest
 import sys
 from pathlib import Path
+from unittest.mock import patch
+
+from aiohttp import web
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 
 # Add the custom_components directory to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 
+class StandInServer:
+    """Local server that mimics Temperatur.nu's rapportera.php."""
+
+    def __init__(self) -> None:
+        """Initialize the stand-in."""
+        self.url = ""
+        self.collect_url = ""
+        self.requests = []
+        self.peers = []
+        self.status = 200
+        self.text = "ok"
+        self.delay = 0.0
+        # JSON bodies POSTed to the collector endpoint
+        self.collected = []
+        self.collect_status = 200
+        # Set to an asyncio.Event to hold collector answers until it is set
+        self.collect_gate = None
+
+    async def handle(self, request):
+        """Record the request and answer with the configured response."""
+        self.requests.append(dict(request.query))
+        self.peers.append(request.transport.get_extra_info("peername"))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return web.Response(status=self.status, text=self.text)
+
+    async def handle_collect(self, request):
+        """Record a report POSTed to the collector endpoint."""
+        if self.collect_gate is not None:
+            await self.collect_gate.wait()
+        self.collected.append(await request.json())
+        return web.Response(status=self.collect_status, text="stored")
+
+
+@pytest.fixture
+async def stand_in_server(socket_enabled):
+    """Start a local rapportera.php stand-in on a free port."""
+    server = StandInServer()
+    app = web.Application()
+    app.router.add_get("/rapportera.php", server.handle)
+    app.router.add_post("/collect", server.handle_collect)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    server.url = f"http://127.0.0.1:{port}/rapportera.php"
+    server.collect_url = f"http://127.0.0.1:{port}/collect"
+    yield server
+    await runner.cleanup()
+
+
+@pytest.fixture
+def config_entry(hass, tmp_path):
+    """Add a config entry reporting one source sensor."""
+    # Keep files the integration writes, like the report history, out of
+    # the shared test configuration directory
+    hass.config.config_dir = str(tmp_path)
+    hass.states.async_set("sensor.outdoor", "3.4")
+    entry = MockConfigEntry(
+        domain="rapportera_temp",
+        title="Station",
+        data={
+            "hash_code": "abc123",
+            "sensor_entity_ids": ["sensor.outdoor"],
+            "aggregation_method": "min",
+            "entity_name": "Station",
+            "interval": 5,
+        },
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+def report_url(stand_in_server):
+    """Point reports at the local stand-in."""
+    with patch(
+        "custom_components.rapportera_temp.reporter.REPORT_URL", stand_in_server.url
+    ):
+        yield stand_in_server
@@ -0,0 +1,146 @@
+"""Test the streaming windowed aggregation engine."""
+import random
+import statistics
+
+import pytest
+
+from custom_components.rapportera_temp.aggregation import (
+    MAD_SCALE,
+    WindowAggregator,
+    kth_deviation,
+)
+from custom_components.rapportera_temp.const import (
+    AGGREGATION_MAD_MEAN,
+    AGGREGATION_MEDIAN,
+    AGGREGATION_TIME_WEIGHTED_MEAN,
+    AGGREGATION_TRIMMED_MEAN,
+    AGGREGATION_WINDOW_MIN,
+)
+
+
+def test_time_weighted_mean():
+    """Test that values are weighted by how long they were held."""
+    aggregator = WindowAggregator(window=100)
+    aggregator.add("sensor.a", 10.0, 0)
+    aggregator.add("sensor.a", 20.0, 75)
+
+    # 10 held for 75 s, 20 held for 25 s
+    assert aggregator.result(AGGREGATION_TIME_WEIGHTED_MEAN, 100) == pytest.approx(12.5)
+
+    # Window now starts at 50: 10 held for 25 s, 20 held for 75 s
+    assert aggregator.result(AGGREGATION_TIME_WEIGHTED_MEAN, 150) == pytest.approx(17.5)
+
+    # The first sample is fully superseded and evicted
+    assert aggregator.result(AGGREGATION_TIME_WEIGHTED_MEAN, 200) == pytest.approx(20.0)
+    assert aggregator.sample_count == 1
+
+
+def test_window_min_expires():
+    """Test the windowed minimum across sources and its expiry."""
+    aggregator = WindowAggregator(window=60)
+    aggregator.add("sensor.a", 5.0, 0)
+    aggregator.add("sensor.a", 8.0, 10)
+    aggregator.add("sensor.b", 7.0, 20)
+    aggregator.add("sensor.a", 6.0, 30)
+
+    assert aggregator.result(AGGREGATION_WINDOW_MIN, 40) == 5.0
+    # 5.0 was replaced at t=10, so it leaves the window at t=70
+    assert aggregator.result(AGGREGATION_WINDOW_MIN, 75) == 6.0
+
+    aggregator.discard("sensor.a")
+    assert aggregator.result(AGGREGATION_WINDOW_MIN, 75) == 7.0
+
+
+def test_median_and_trimmed_mean():
+    """Test the median and trimmed mean across the sources in the window."""
+    values = [3.0, 1.0, 4.0, 1.5, 5.0, 9.0, 2.0, 6.0, 50.0, -20.0]
+    aggregator = WindowAggregator(window=1000, trim_fraction=0.1)
+    for index, value in enumerate(values):
+        aggregator.add(f"sensor.{index}", value, 0)
+
+    assert aggregator.result(AGGREGATION_MEDIAN, 10) == statistics.median(values)
+    trimmed = sorted(values)[1:-1]
+    assert aggregator.result(AGGREGATION_TRIMMED_MEAN, 10) == pytest.approx(
+        statistics.mean(trimmed)
+    )
+
+
+def test_median_and_trimmed_mean_weight_sources_equally():
+    """Test that a fast-updating source does not dominate the median or trimmed mean."""
+    aggregator = WindowAggregator(window=300, trim_fraction=0.2)
+    for index, value in enumerate([2.0, 2.2, 2.4, 2.6]):
+        aggregator.add(f"sensor.shade_{index}", value, 0)
+    for step in range(30):
+        aggregator.add("sensor.sun", 15.0, step * 10)
+
+    assert aggregator.result(AGGREGATION_MEDIAN, 300) == pytest.approx(2.4)
+    # One source trimmed from each end
+    assert aggregator.result(AGGREGATION_TRIMMED_MEAN, 300) == pytest.approx(2.4)
+
+
+def test_buffer_is_bounded():
+    """Test that a fast-updating source cannot grow the buffer unbounded."""
+    aggregator = WindowAggregator(window=3600, max_samples=16)
+    for step in range(1000):
+        aggregator.add("sensor.fast", float(step % 7), step * 0.1)
+
+    assert aggregator.sample_count == 16
+    assert len(aggregator.sources["sensor.fast"].samples) == 16
+    assert aggregator.result(AGGREGATION_WINDOW_MIN, 100) == 0.0
+
+
+def test_empty_window():
+    """Test that an empty window has no result."""
+    aggregator = WindowAggregator(window=60)
+    assert aggregator.result(AGGREGATION_MEDIAN, 0) is None
+
+
+def test_kth_deviation_matches_sorting():
+    """Test the binary search for the k-th smallest deviation."""
+    rng = random.Random(3)
+    for count in (1, 2, 5, 50):
+        values = sorted(round(rng.gauss(5, 3), 1) for _ in range(count))
+        center = statistics.median(values)
+        deviations = sorted(abs(value - center) for value in values)
+        for k in range(1, count + 1):
+            assert kth_deviation(values, center, k) == pytest.approx(deviations[k - 1])
+
+
+def test_mad_mean_rejects_outliers():
+    """Test that samples far from the median are left out of the mean."""
+    rng = random.Random(7)
+    values = [round(rng.gauss(4.0, 0.3), 1) for _ in range(500)]
+    # A few sources in direct sun and one broken sensor
+    values[:5] = [25.0, 26.5, 24.0, 27.0, -40.0]
+    aggregator = WindowAggregator(window=1000)
+    for index, value in enumerate(values):
+        aggregator.add(f"sensor.{index}", value, 0)
+
+    median = statistics.median(values)
+    mad = statistics.median(abs(value - median) for value in values)
+    inliers = [value for value in values if abs(value - median) <= 3 * MAD_SCALE * mad]
+    assert len(inliers) < len(values) - 4
+    assert aggregator.result(AGGREGATION_MAD_MEAN, 0) == pytest.approx(
+        statistics.mean(inliers)
+    )
+    assert aggregator.result(AGGREGATION_MEDIAN, 0) == median
+
+
+def test_mad_mean_counts_each_source_once():
+    """Test that a fast-updating outlier cannot outvote slower sources."""
+    aggregator = WindowAggregator(window=300)
+    aggregator.add("sensor.shade_north", 2.0, 0)
+    aggregator.add("sensor.shade_south", 2.2, 0)
+    # A sensor in direct sun updating every 10 seconds
+    for step in range(30):
+        aggregator.add("sensor.sun", 15.0 + step % 3 * 0.1, step * 10)
+
+    assert aggregator.result(AGGREGATION_MAD_MEAN, 300) == pytest.approx(2.1)
+
+
+def test_mad_mean_identical_values():
+    """Test that a zero MAD falls back to the values equal to the median."""
+    aggregator = WindowAggregator(window=1000)
+    for index, value in enumerate([5.0, 5.0, 5.0, 9.0]):
+        aggregator.add(f"sensor.{index}", value, 0)
+    assert aggregator.result(AGGREGATION_MAD_MEAN, 0) == 5.0
@@ -0,0 +1,142 @@
+"""Test seeding the reading windows from recorder history."""
+from datetime import timedelta
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from homeassistant.core import HomeAssistant, State
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.rapportera_temp.aggregation import WindowAggregator
+from custom_components.rapportera_temp.backfill import HistoryBackfill
+from custom_components.rapportera_temp.const import BACKFILL_DELAY, DATA_SCHEDULER
+from custom_components.rapportera_temp.readings import SourceReadings
+
+from . import wait_for_startup_report
+
+
+def _state(entity_id: str, value: str, seconds_ago: float) -> State:
+    """Return a recorded state from seconds_ago."""
+    updated = dt_util.utcnow() - timedelta(seconds=seconds_ago)
+    return State(entity_id, value, last_updated=updated, last_changed=updated)
+
+
+@pytest.fixture
+def recorded_history(hass: HomeAssistant):
+    """Pretend the recorder is loaded and return the patched history query."""
+    hass.config.components.add("recorder")
+    with patch(
+        "custom_components.rapportera_temp.backfill._async_fetch_history",
+        AsyncMock(
+            return_value={
+                "sensor.outdoor": [
+                    _state("sensor.outdoor", "1.0", 240),
+                    _state("sensor.outdoor", "unavailable", 120),
+                    _state("sensor.outdoor", "2.0", 60),
+                ],
+                "sensor.second": [_state("sensor.second", "4.0", 100)],
+            }
+        ),
+    ) as fetch:
+        yield fetch
+
+
+async def _advance(hass: HomeAssistant) -> None:
+    """Fire the batched history query."""
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=BACKFILL_DELAY))
+    await hass.async_block_till_done()
+
+
+def test_backfill_keeps_held_samples():
+    """Test that recorded samples are merged in before the held ones."""
+    window = WindowAggregator(300)
+    window.add("sensor.a", 3.0, 1000)
+    window.backfill("sensor.a", [(800, 1.0), (900, 2.0), (1000, 9.0)])
+
+    assert list(window.sources["sensor.a"].samples) == [(800, 1.0), (900, 2.0), (1000, 3.0)]
+    assert window.result("window_min", 1000) == 1.0
+
+
+async def test_first_report_covers_recorded_window(
+    hass: HomeAssistant,
+    enable_custom_integrations,
+    config_entry,
+    report_url,
+    recorded_history,
+) -> None:
+    """Test that all entries share one history query before their first report."""
+    hass.config_entries.async_update_entry(
+        config_entry, data={**config_entry.data, "aggregation_method": "window_min"}
+    )
+    hass.states.async_set("sensor.second", "5.0")
+    second = MockConfigEntry(
+        domain="rapportera_temp",
+        title="Second",
+        data={
+            "hash_code": "def456",
+            "sensor_entity_ids": ["sensor.second"],
+            "aggregation_method": "window_min",
+            "entity_name": "Second",
+            "interval": 5,
+        },
+    )
+    second.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    # Keep wall-clock aligned ticks out of the reports checked below
+    for entry in (config_entry, second):
+        hass.data[DATA_SCHEDULER].entries.pop(entry.entry_id)
+    assert report_url.requests == []
+
+    await _advance(hass)
+    await wait_for_startup_report(hass, config_entry)
+    await wait_for_startup_report(hass, second)
+
+    recorded_history.assert_awaited_once()
+    assert recorded_history.await_args.args[1] == ["sensor.outdoor", "sensor.second"]
+    assert sorted(report_url.requests, key=lambda query: query["hash"]) == [
+        {"hash": "abc123", "t": "1.0"},
+        {"hash": "def456", "t": "4.0"},
+    ]
+
+    # A source coming back after an outage gets its window refilled
+    reporter = config_entry.runtime_data.reporter
+    hass.states.async_set("sensor.outdoor", "unavailable")
+    hass.states.async_set("sensor.outdoor", "3.0")
+    await hass.async_block_till_done()
+    await _advance(hass)
+    assert recorded_history.await_count == 2
+    assert recorded_history.await_args.args[1] == ["sensor.outdoor"]
+    await reporter.async_tick()
+    assert report_url.requests[-1] == {"hash": "abc123", "t": "1.0"}
+
+
+async def test_backfill_skips_sources_removed_before_the_query(
+    hass: HomeAssistant, recorded_history
+) -> None:
+    """Test that a source removed before the batch ran does not stop the batch."""
+    hass.states.async_set("sensor.outdoor", "3.0")
+    hass.states.async_set("sensor.second", "5.0")
+    backfill = HistoryBackfill(hass)
+    first = SourceReadings(hass, ["sensor.outdoor", "sensor.second"], 300)
+    second = SourceReadings(hass, ["sensor.second"], 300)
+    for readings in (first, second):
+        readings.async_start()
+        readings.history_backfill = backfill
+        readings.async_request_backfill()
+
+    first.async_reconfigure(["sensor.outdoor"], 300, 0)
+    await _advance(hass)
+
+    recorded_history.assert_awaited_once()
+    assert first.window.result("window_min", time.time()) == 1.0
+    assert "sensor.second" not in first.window.sources
+    assert second.window.result("window_min", time.time()) == 4.0
+    first.async_stop()
+    second.async_stop()
@@ -0,0 +1,69 @@
+"""Test the shared HTTP client against a local Temperatur.nu stand-in."""
+from unittest.mock import patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import HomeAssistant
+
+from custom_components.rapportera_temp.client import ReportClient
+from custom_components.rapportera_temp.const import DATA_CLIENT
+
+from . import setup_integration
+
+
+async def test_connections_are_reused(stand_in_server):
+    """Test that sequential reports share one keep-alive connection."""
+    client = ReportClient()
+
+    for temp in ("1.0", "1.1", "1.2", "1.3", "1.4"):
+        status, text = await client.async_get(
+            f"{stand_in_server.url}?hash=abc&t={temp}", 10
+        )
+        assert status == 200
+        assert text == "ok"
+
+    await client.async_close()
+
+    assert len(stand_in_server.peers) == 5
+    assert len(set(stand_in_server.peers)) == 1
+
+
+async def test_session_recreated_after_close(stand_in_server):
+    """Test that a closed client opens a fresh session on next use."""
+    client = ReportClient()
+
+    await client.async_get(stand_in_server.url, 10)
+    await client.async_close()
+    await client.async_get(stand_in_server.url, 10)
+    await client.async_close()
+
+    assert len(set(stand_in_server.peers)) == 2
+
+
+async def test_session_closed_when_hass_closes(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that the shared session is closed at shutdown without an unload."""
+    await setup_integration(hass, config_entry)
+    client = hass.data[DATA_CLIENT]
+    session = client.session
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+
+    assert session.closed
+
+
+async def test_client_released_when_setup_fails(
+    hass: HomeAssistant, enable_custom_integrations, config_entry
+) -> None:
+    """Test that a failed setup releases its reference to the shared client."""
+    with patch(
+        "custom_components.rapportera_temp.ReportHistory.open",
+        side_effect=OSError("disk full"),
+    ):
+        assert not await hass.config_entries.async_setup(config_entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert config_entry.state is ConfigEntryState.SETUP_RETRY
+    assert DATA_CLIENT not in hass.data
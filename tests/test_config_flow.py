@@ -1,6 +1,12 @@
 """Test config flow for RapporteraTempHA - Bronze minimum coverage."""
 import json
 from pathlib import Path
+from unittest.mock import patch
+
+from homeassistant import config_entries
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.rapportera_temp.const import AGGREGATION_MAD_MEAN
 
 # Get project root
 project_root = Path(__file__).parent.parent
@@ -112,3 +118,128 @@ def test_version_format_consistent():
     for part in parts:
         int_part = int(part)
         assert int_part >= 0, f"Version part {part} should be non-negative"
+
+
+async def test_flow_keeps_all_sensors(hass, enable_custom_integrations):
+    """Test that the config flow stores every selected sensor."""
+    sensors = [f"sensor.station_{index}" for index in range(500)]
+    for sensor in sensors:
+        hass.states.async_set(sensor, "3.4", {"device_class": "temperature"})
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch(
+        "custom_components.rapportera_temp.async_setup_entry", return_value=True
+    ):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {
+                "hash_code": "abc123",
+                "sensor_entity_ids": sensors,
+                "aggregation_method": AGGREGATION_MAD_MEAN,
+                "entity_name": "",
+                "interval": 5,
+            },
+        )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert result["data"]["sensor_entity_ids"] == sensors
+    assert result["title"] == "Report Temperature (500 sensors)"
+
+
+async def test_flow_only_accepts_temperature_sensors(hass, enable_custom_integrations):
+    """Test that the flow rejects sources that do not report a temperature."""
+    hass.states.async_set("sensor.humidity", "60", {"unit_of_measurement": "%"})
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            "hash_code": "abc123",
+            "sensor_entity_ids": ["sensor.humidity"],
+            "aggregation_method": "min",
+        },
+    )
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"sensor_entity_ids": "not_temperature_sensor"}
+
+
+async def test_flow_suggests_shade_sensors(hass, enable_custom_integrations):
+    """Test that the shade step lists the coldest sensors after the chosen ones."""
+    for entity_id, value, unit in (
+        ("sensor.north", "2.0", "°C"),
+        ("sensor.south", "9.5", "°C"),
+        ("sensor.porch", "34.0", "°F"),
+        ("sensor.attic", "unavailable", "°C"),
+    ):
+        hass.states.async_set(entity_id, value, {"unit_of_measurement": unit})
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"],
+        {
+            "hash_code": "abc123",
+            "sensor_entity_ids": ["sensor.south"],
+            "aggregation_method": "min",
+            "suggest_shade": True,
+        },
+    )
+    assert result["type"] == FlowResultType.FORM
+    assert result["step_id"] == "shade"
+    options = result["data_schema"].schema["sensor_entity_ids"].config["options"]
+    assert [option["value"] for option in options] == [
+        "sensor.south",
+        "sensor.porch",
+        "sensor.north",
+    ]
+    assert options[1]["label"] == "porch (1.1 °C)"
+
+    with patch(
+        "custom_components.rapportera_temp.async_setup_entry", return_value=True
+    ):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {"sensor_entity_ids": ["sensor.north", "sensor.porch"]}
+        )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert result["data"]["sensor_entity_ids"] == ["sensor.north", "sensor.porch"]
+    assert "suggest_shade" not in result["data"]
+
+
+async def test_options_validate_destinations(hass, enable_custom_integrations, config_entry):
+    """Test that the options reject an unusable collector URL or sink."""
+    options = {
+        "hash_code": "abc123",
+        "sensor_entity_ids": ["sensor.outdoor"],
+        "aggregation_method": "min",
+        "entity_name": "Station",
+        "interval": 5,
+    }
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        {**options, "collector_url": "ftp://collector", "sink": "udp://host:1"},
+    )
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {
+        "collector_url": "invalid_collector_url",
+        "sink": "invalid_sink",
+    }
+
+    # Files can only be written in the allowlisted folders
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"], {**options, "sink": "/etc/reports.jsonl"}
+    )
+    assert result["type"] == FlowResultType.FORM
+    assert result["errors"] == {"sink": "sink_not_allowed"}
+
+    with patch(
+        "custom_components.rapportera_temp.async_setup_entry", return_value=True
+    ):
+        result = await hass.config_entries.options.async_configure(
+            result["flow_id"],
+            {**options, "collector_url": "http://collector/ingest", "sink": "tcp://host:9000"},
+        )
+    assert result["type"] == FlowResultType.CREATE_ENTRY
+    assert config_entry.data["collector_url"] == "http://collector/ingest"
+    assert config_entry.data["sink"] == "tcp://host:9000"
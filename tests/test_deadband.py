@@ -0,0 +1,64 @@
+"""Test deadband and heartbeat reporting."""
+from homeassistant.core import HomeAssistant
+
+from custom_components.rapportera_temp.deadband import DeadbandPolicy
+
+from . import setup_integration
+
+
+def test_policy_deadband_and_heartbeat():
+    """Test that small changes wait for the heartbeat and large ones do not."""
+    policy = DeadbandPolicy(deadband=0.5, heartbeat=1800, interval=60)
+    assert policy.should_report(3.0, 0)
+    policy.reported(3.0, 0)
+
+    assert not policy.should_report(3.4, 60)
+    assert policy.should_report(3.5, 60)
+    assert policy.should_report(2.5, 60)
+    # The heartbeat fires on the tick nearest to it
+    assert not policy.should_report(3.0, 1740)
+    assert policy.should_report(3.0, 1800.5)
+
+    policy.reported(3.0, 1800)
+    policy.reported(4.0, 1860)
+    assert 60 < policy.effective_interval < 1800
+
+
+def test_policy_disabled():
+    """Test that a deadband of 0 uploads every value."""
+    policy = DeadbandPolicy(deadband=0, heartbeat=1800, interval=60)
+    policy.reported(3.0, 0)
+    assert policy.should_report(3.0, 60)
+
+
+async def test_unchanged_values_are_not_uploaded(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that ticks inside the deadband skip the upload."""
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={**config_entry.data, "deadband": 0.5, "heartbeat_interval": 30},
+    )
+    await setup_integration(hass, config_entry)
+    reporter = config_entry.runtime_data.reporter
+    assert len(report_url.requests) == 1
+
+    for value in ("3.4", "3.6", "3.0"):
+        hass.states.async_set("sensor.outdoor", value)
+        await reporter.async_tick()
+    assert len(report_url.requests) == 1
+
+    hass.states.async_set("sensor.outdoor", "4.0")
+    await reporter.async_tick()
+    assert report_url.requests[-1] == {"hash": "abc123", "t": "4.0"}
+
+    # A forced report, as report_now sends, uploads even an unchanged value
+    reporter._async_request_forced_report()
+    await hass.async_block_till_done()
+    assert len(report_url.requests) == 3
+
+    metrics = reporter.metrics.as_dict()
+    assert metrics["requests"] == 3
+    assert metrics["outcomes"]["skipped"] == 3
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
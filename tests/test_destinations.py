@@ -0,0 +1,157 @@
+"""Test fanning reports out to extra destinations."""
+import asyncio
+import json
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.rapportera_temp.destinations import (
+    Destination,
+    DestinationFanout,
+    Report,
+    SocketSinkDestination,
+    validate_sink,
+)
+
+from . import setup_integration
+
+REPORT = Report("entry", "Station", 0.0, 3.4, "min", {"sensor.outdoor": 3.4})
+
+
+class StalledDestination(Destination):
+    """Destination that never answers."""
+
+    async def async_send(self, report: Report) -> None:
+        """Wait forever."""
+        await asyncio.Event().wait()
+
+
+class RecordingDestination(Destination):
+    """Destination that keeps what it was sent."""
+
+    def __init__(self) -> None:
+        """Initialize the destination."""
+        super().__init__("recording")
+        self.reports = []
+
+    async def async_send(self, report: Report) -> None:
+        """Record the report."""
+        self.reports.append(report)
+
+
+async def test_reports_fan_out_to_collector_and_file(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url, tmp_path
+) -> None:
+    """Test that an uploaded value also reaches the collector and the file sink."""
+    sink = tmp_path / "reports.jsonl"
+    hass.config.allowlist_external_dirs.add(str(tmp_path))
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={
+            **config_entry.data,
+            "collector_url": report_url.collect_url,
+            "sink": str(sink),
+        },
+    )
+    await setup_integration(hass, config_entry)
+    reporter = config_entry.runtime_data.reporter
+
+    assert report_url.requests == [{"hash": "abc123", "t": "3.4"}]
+    assert len(report_url.collected) == 1
+    collected = report_url.collected[0]
+    assert collected["temperature"] == 3.4
+    assert collected["sensor_temperatures"] == {"sensor.outdoor": 3.4}
+    assert "abc123" not in json.dumps(collected)
+    assert json.loads(sink.read_text()) == collected
+
+    assert [
+        destination.sent for destination in reporter.destinations.destinations
+    ] == [1, 1]
+
+
+async def test_slow_collector_does_not_delay_the_report(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that a slow collector neither delays Temperatur.nu nor piles up."""
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={**config_entry.data, "collector_url": report_url.collect_url},
+    )
+    report_url.collect_gate = asyncio.Event()
+    await setup_integration(hass, config_entry)
+    reporter = config_entry.runtime_data.reporter
+    collector = reporter.destinations.destinations[0]
+
+    # The report finished while the collector is still answering
+    assert config_entry.runtime_data.state.status == "success"
+    assert collector.in_flight == 1
+
+    for value in ("3.5", "3.6", "3.7"):
+        hass.states.async_set("sensor.outdoor", value)
+        await reporter.async_tick()
+    assert len(report_url.requests) == 4
+    # Two sends may be in flight, the third report is dropped
+    assert collector.in_flight == 2
+    assert collector.dropped == 2
+
+    await hass.config_entries.async_unload(config_entry.entry_id)
+    assert collector.in_flight == 0
+    report_url.collect_gate.set()
+    await hass.async_block_till_done()
+
+
+async def test_failing_destination_backs_off(hass: HomeAssistant) -> None:
+    """Test that a timed out destination is skipped until its backoff passed."""
+    stalled = StalledDestination("stalled", timeout=0.01)
+    recording = RecordingDestination()
+    fanout = DestinationFanout(hass, [stalled, recording])
+
+    fanout.async_publish(REPORT)
+    await asyncio.gather(*fanout._tasks)
+    assert recording.reports == [REPORT]
+    assert stalled.failed == 1
+    assert stalled.attempt == 1
+    assert stalled.retry_at > 0
+
+    fanout.async_publish(REPORT)
+    await asyncio.sleep(0)
+    assert stalled.dropped == 1
+    assert stalled.in_flight == 0
+    assert len(recording.reports) == 2
+
+    # Once the backoff has passed the destination is tried again
+    stalled.retry_at = 0.0
+    fanout.async_publish(REPORT)
+    await asyncio.sleep(0)
+    assert stalled.in_flight == 1
+    await fanout.async_shutdown()
+    assert stalled.in_flight == 0
+
+
+async def test_tcp_socket_sink(hass: HomeAssistant, socket_enabled) -> None:
+    """Test that the socket sink writes one JSON line per report."""
+    received = asyncio.Queue()
+
+    async def handle(reader, writer):
+        received.put_nowait(await reader.readline())
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    fanout = DestinationFanout(hass, [SocketSinkDestination(f"tcp://127.0.0.1:{port}")])
+
+    fanout.async_publish(REPORT)
+    line = await asyncio.wait_for(received.get(), 1)
+    assert json.loads(line) == REPORT.as_dict()
+
+    server.close()
+    await server.wait_closed()
+
+
+def test_validate_sink():
+    """Test the accepted sink addresses."""
+    assert validate_sink("/config/reports.jsonl")
+    assert validate_sink("tcp://localhost:9000")
+    assert validate_sink("unix:///run/reports.sock")
+    assert not validate_sink("tcp://localhost")
+    assert not validate_sink("udp://localhost:9000")
+    assert not validate_sink(" ")
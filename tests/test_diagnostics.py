@@ -0,0 +1,53 @@
+"""Test diagnostics and hot-path metrics."""
+from homeassistant.core import HomeAssistant
+
+from custom_components.rapportera_temp.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.rapportera_temp.metrics import LatencyHistogram
+
+from . import setup_integration
+
+
+def test_histogram_buckets():
+    """Test that samples land in the right fixed bucket."""
+    histogram = LatencyHistogram()
+    for seconds in (0.00005, 0.003, 0.003, 42.0):
+        histogram.record(seconds)
+
+    result = histogram.as_dict()
+    assert result["count"] == 4
+    assert result["max"] == 42.0
+    assert result["buckets"]["le_0.0001"] == 1
+    assert result["buckets"]["le_0.005"] == 2
+    assert result["buckets"]["inf"] == 1
+
+
+async def test_diagnostics_redacts_hash(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that diagnostics expose metrics without leaking the hash."""
+    await setup_integration(hass, config_entry)
+    reporter = config_entry.runtime_data.reporter
+
+    # The first report was sent on startup
+    report_url.status = 500
+    reporter.retry_queue.report = None
+    reporter.async_request_report()
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+
+    assert "abc123" not in str(diagnostics)
+    assert diagnostics["entry"]["hash_code"] == "**REDACTED**"
+    assert diagnostics["status"]["last_update_status"] == "failed"
+    outcomes = diagnostics["metrics"]["outcomes"]
+    assert outcomes["success"] == 1
+    assert outcomes["failure"] == 1
+    latency = diagnostics["metrics"]["latency"]
+    assert latency["total"]["count"] == 2
+    assert latency["http_response"]["count"] == 2
+    # The second report reused the pooled connection
+    assert latency["http_connect"]["count"] == 1
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
@@ -0,0 +1,150 @@
+"""Test the report history ring file and its export service."""
+import csv
+import json
+from pathlib import Path
+import threading
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.rapportera_temp.const import DOMAIN, SERVICE_EXPORT_HISTORY
+from custom_components.rapportera_temp.history import (
+    HEADER,
+    RECORD,
+    ReportHistory,
+    _decode as decode,
+)
+from custom_components.rapportera_temp.metrics import (
+    OUTCOME_NO_READINGS,
+    OUTCOME_SUCCESS,
+)
+
+from . import setup_integration
+
+
+def _fill(history: ReportHistory, count: int) -> None:
+    """Append count successful reports one minute apart."""
+    for minute in range(count):
+        history.append(60 * minute, minute / 10, 3, OUTCOME_SUCCESS, 0.012)
+
+
+def test_ring_overwrites_oldest(tmp_path):
+    """Test that a full ring keeps the newest records in order."""
+    path = tmp_path / "history"
+    history = ReportHistory(str(path), capacity=100)
+    history.open()
+    _fill(history, 250)
+
+    records = list(history.iter_range())
+    assert len(records) == len(history) == 100
+    assert records[0].timestamp == 150 * 60
+    assert records[-1].timestamp == 249 * 60
+    assert records[-1].temperature == 24.9
+    assert records[-1].latency == 0.012
+    history.close()
+
+    # The file never grows past its preallocated size and survives reopening
+    assert path.stat().st_size == HEADER.size + 100 * RECORD.size
+    history = ReportHistory(str(path), capacity=100)
+    history.open()
+    assert list(history.iter_range()) == records
+    history.close()
+
+
+def test_time_range_and_last(tmp_path):
+    """Test reading a time range and finding the last successful report."""
+    history = ReportHistory(str(tmp_path / "history"), capacity=1000)
+    history.open()
+    _fill(history, 600)
+    history.append(600 * 60, None, 0, OUTCOME_NO_READINGS, 0.001)
+
+    records = list(history.iter_range(60 * 100, 60 * 109))
+    assert [record.timestamp // 60 for record in records] == list(range(100, 110))
+    assert list(history.iter_range(60 * 1000)) == []
+    assert history.last("success").timestamp == 599 * 60
+    assert history.last("no_readings").temperature is None
+    assert history.last("timeout") is None
+    history.close()
+
+
+def test_export_streams_csv_and_json(tmp_path):
+    """Test that an export writes the requested range in either format."""
+    history = ReportHistory(str(tmp_path / "history"), capacity=1000)
+    history.open()
+    _fill(history, 10)
+
+    assert history.export(str(tmp_path / "out.csv"), "csv", 120, 300) == 4
+    with open(tmp_path / "out.csv", encoding="utf-8") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["temperature"] for row in rows] == ["0.2", "0.3", "0.4", "0.5"]
+    assert rows[0]["status"] == "success"
+
+    assert history.export(str(tmp_path / "out.json"), "json") == 10
+    exported = json.loads((tmp_path / "out.json").read_text())
+    assert exported[0] == {
+        "time": "1970-01-01T00:00:00+00:00",
+        "temperature": 0.0,
+        "sources": 3,
+        "status": "success",
+        "latency": 0.012,
+    }
+    history.close()
+
+
+def test_close_waits_for_export(tmp_path):
+    """Test that closing waits for a running export and later appends are dropped."""
+    history = ReportHistory(str(tmp_path / "history"), capacity=100)
+    history.open()
+    _fill(history, 10)
+    exporting = threading.Event()
+    release = threading.Event()
+
+    def slow_decode(record):
+        exporting.set()
+        release.wait(5)
+        return decode(record)
+
+    with patch("custom_components.rapportera_temp.history._decode", slow_decode):
+        export = threading.Thread(
+            target=history.export, args=(str(tmp_path / "out.json"), "json")
+        )
+        export.start()
+        assert exporting.wait(5)
+        close = threading.Thread(target=history.close)
+        close.start()
+        close.join(0.1)
+        assert close.is_alive()
+        release.set()
+        export.join(5)
+        close.join(5)
+
+    assert len(json.loads((tmp_path / "out.json").read_text())) == 10
+    history.append(600, 1.0, 3, OUTCOME_SUCCESS, 0.012)
+    assert len(history) == 10
+
+
+async def test_reports_are_kept_across_restarts(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that reports are recorded, exported and restored after a reload."""
+    await setup_integration(hass, config_entry)
+    hass.states.async_set("sensor.outdoor", "unavailable")
+    await config_entry.runtime_data.reporter.async_tick()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_EXPORT_HISTORY,
+        {"entry_id": config_entry.entry_id, "format": "json"},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["records"] == 2
+    exported = json.loads(Path(response["path"]).read_text())
+    assert [(record["status"], record["temperature"]) for record in exported] == [
+        ("success", 3.4),
+        ("no_readings", None),
+    ]
+
+    assert await hass.config_entries.async_reload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert config_entry.runtime_data.state.reported_temperature == 3.4
@@ -0,0 +1,86 @@
+"""Test the shared table of source readings."""
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.rapportera_temp import multiplexer
+from custom_components.rapportera_temp.multiplexer import async_get_multiplexer
+
+from . import setup_integration, wait_for_startup_report
+
+
+async def test_entries_share_source_slots(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that a sensor used by two entries is tracked and parsed once."""
+    hass.states.async_set("sensor.second", "5.0")
+    second = MockConfigEntry(
+        domain="rapportera_temp",
+        title="Second",
+        data={
+            "hash_code": "def456",
+            "sensor_entity_ids": ["sensor.outdoor", "sensor.second"],
+            "aggregation_method": "mean",
+            "entity_name": "Second",
+            "interval": 5,
+        },
+    )
+    second.add_to_hass(hass)
+    # Setting up the integration sets up both entries
+    await setup_integration(hass, config_entry)
+    await wait_for_startup_report(hass, second)
+
+    slots = async_get_multiplexer(hass).slots
+    assert {entity_id: len(slot.subscribers) for entity_id, slot in slots.items()} == {
+        "sensor.outdoor": 2,
+        "sensor.second": 1,
+    }
+
+    with patch.object(
+        multiplexer, "parse_temperature", wraps=multiplexer.parse_temperature
+    ) as parse:
+        hass.states.async_set("sensor.outdoor", "1.0")
+        await hass.async_block_till_done()
+    parse.assert_called_once()
+    assert config_entry.runtime_data.readings.get("sensor.outdoor") == 1.0
+    assert second.runtime_data.readings.aggregate("mean", 0) == 3.0
+
+    # Unloading an entry only drops its own references
+    assert await hass.config_entries.async_unload(second.entry_id)
+    await hass.async_block_till_done()
+    assert list(slots) == ["sensor.outdoor"]
+    assert len(slots["sensor.outdoor"].subscribers) == 1
+    hass.states.async_set("sensor.outdoor", "2.0")
+    await hass.async_block_till_done()
+    assert config_entry.runtime_data.readings.get("sensor.outdoor") == 2.0
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert slots == {}
+
+
+async def test_unit_resolved_when_attributes_change(hass: HomeAssistant) -> None:
+    """Test that a slot only looks the unit up again after an attribute change."""
+    hass.states.async_set("sensor.porch", "50.0", {"unit_of_measurement": "°F"})
+    with patch.object(
+        multiplexer, "celsius_converter", wraps=multiplexer.celsius_converter
+    ) as resolve:
+        shared = async_get_multiplexer(hass)
+        unsub = shared.async_subscribe(["sensor.porch"], lambda slot: None)
+        slot = shared.slots["sensor.porch"]
+        assert slot.value == 10.0
+
+        for value in ("59.0", "68.0"):
+            hass.states.async_set("sensor.porch", value, {"unit_of_measurement": "°F"})
+            await hass.async_block_till_done()
+        assert slot.value == 20.0
+        resolve.assert_called_once()
+
+        hass.states.async_set(
+            "sensor.porch", "68.0", {"unit_of_measurement": "°F", "battery": 80}
+        )
+        await hass.async_block_till_done()
+        assert resolve.call_count == 2
+        assert slot.value == 20.0
+    unsub()
@@ -0,0 +1,183 @@
+"""Test the event-driven source reading cache."""
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.rapportera_temp.const import AGGREGATION_MEAN, AGGREGATION_MIN
+from custom_components.rapportera_temp.multiplexer import async_get_multiplexer
+from custom_components.rapportera_temp.readings import (
+    ReadingStatistics,
+    SourceReadings,
+)
+
+
+async def test_readings_follow_state_changes(hass: HomeAssistant) -> None:
+    """Test that readings are parsed on state change and aggregated incrementally."""
+    hass.states.async_set("sensor.a", "4.0")
+    hass.states.async_set("sensor.b", "2.0")
+
+    readings = SourceReadings(hass, ["sensor.a", "sensor.b", "sensor.c"], 300)
+    unsub = readings.async_start()
+
+    assert readings.count == 2
+    assert readings.aggregate(AGGREGATION_MIN, time.time()) == 2.0
+    assert readings.aggregate(AGGREGATION_MEAN, time.time()) == 3.0
+
+    hass.states.async_set("sensor.c", "-1.5")
+    await hass.async_block_till_done()
+    assert readings.aggregate(AGGREGATION_MIN, time.time()) == -1.5
+    assert readings.sensor_temperatures() == {
+        "sensor.a": 4.0,
+        "sensor.b": 2.0,
+        "sensor.c": -1.5,
+    }
+
+    # Raising the current minimum falls back to the next lowest reading
+    hass.states.async_set("sensor.c", "10.0")
+    await hass.async_block_till_done()
+    assert readings.aggregate(AGGREGATION_MIN, time.time()) == 2.0
+
+    hass.states.async_set("sensor.b", "unavailable")
+    await hass.async_block_till_done()
+    assert readings.count == 2
+    assert readings.aggregate(AGGREGATION_MIN, time.time()) == 4.0
+    assert readings.aggregate(AGGREGATION_MEAN, time.time()) == 7.0
+    assert readings.get("sensor.b") is None
+    assert readings.last_updated("sensor.b") is None
+
+    unsub()
+    hass.states.async_set("sensor.a", "0.0")
+    await hass.async_block_till_done()
+    assert readings.aggregate(AGGREGATION_MIN, time.time()) == 4.0
+
+
+async def test_statistics_of_current_readings(hass: HomeAssistant) -> None:
+    """Test that all statistics come from one result shared with the report."""
+    readings = SourceReadings(hass, ["sensor.a", "sensor.b", "sensor.c", "sensor.d"], 300)
+    readings.async_start()
+    assert readings.statistics() is None
+
+    for entity_id, value in (("sensor.a", "4.0"), ("sensor.b", "-2.0"), ("sensor.c", "1.0")):
+        hass.states.async_set(entity_id, value)
+    await hass.async_block_till_done()
+    statistics = readings.statistics()
+    assert statistics == ReadingStatistics(-2.0, 1.0, 4.0, 1.0, 6.0)
+    assert readings.aggregate(AGGREGATION_MEAN, time.time(), statistics) == 1.0
+
+    hass.states.async_set("sensor.d", "3.0")
+    await hass.async_block_till_done()
+    assert readings.statistics().median == 2.0
+
+
+async def test_readings_in_mixed_units(hass: HomeAssistant) -> None:
+    """Test that Fahrenheit and Kelvin sources are aggregated in Celsius."""
+    hass.states.async_set("sensor.c", "4.0", {"unit_of_measurement": "°C"})
+    hass.states.async_set("sensor.f", "41.0", {"unit_of_measurement": "°F"})
+    hass.states.async_set("sensor.k", "276.15", {"unit_of_measurement": "K"})
+    hass.states.async_set("sensor.plain", "6.0")
+
+    readings = SourceReadings(hass, ["sensor.c", "sensor.f", "sensor.k", "sensor.plain"], 300)
+    unsub = readings.async_start()
+    assert readings.sensor_temperatures() == {
+        "sensor.c": 4.0,
+        "sensor.f": 5.0,
+        "sensor.k": 3.0,
+        "sensor.plain": 6.0,
+    }
+    assert readings.aggregate(AGGREGATION_MIN, time.time()) == pytest.approx(3.0)
+    assert readings.aggregate(AGGREGATION_MEAN, time.time()) == pytest.approx(4.5)
+
+    # A source switched to another unit is converted from then on
+    hass.states.async_set("sensor.f", "1.0", {"unit_of_measurement": "°C"})
+    await hass.async_block_till_done()
+    assert readings.get("sensor.f") == 1.0
+    unsub()
+
+
+async def test_readings_record_arrival_time(hass: HomeAssistant) -> None:
+    """Test that the arrival time of each reading is recorded."""
+    hass.states.async_set("sensor.a", "1.0")
+    readings = SourceReadings(hass, ["sensor.a"], 300)
+    unsub = readings.async_start()
+
+    state = hass.states.get("sensor.a")
+    assert readings.last_updated("sensor.a") == state.last_updated.timestamp()
+
+    for garbage in ("garbage", "nan", "inf"):
+        hass.states.async_set("sensor.a", garbage)
+        await hass.async_block_till_done()
+        assert readings.aggregate(AGGREGATION_MIN, time.time()) is None
+        assert readings.count == 0
+    unsub()
+
+
+async def test_stale_readings_are_dropped(hass: HomeAssistant, freezer) -> None:
+    """Test that sources not updated within max_age leave the aggregates."""
+    hass.states.async_set("sensor.battery", "-8.0")
+    hass.states.async_set("sensor.a", "4.0")
+    readings = SourceReadings(hass, ["sensor.a", "sensor.battery"], 300, max_age=3600)
+    unsub = readings.async_start()
+    updated = readings.last_updated("sensor.battery")
+
+    readings.expire_stale(updated + 1800)
+    assert readings.aggregate(AGGREGATION_MIN, updated + 1800) == -8.0
+    assert readings.stale_sensors() == []
+
+    # The night-time reading of the battery sensor no longer wins
+    freezer.tick(3000)
+    hass.states.async_set("sensor.a", "5.0")
+    await hass.async_block_till_done()
+    now = updated + 4000
+    readings.expire_stale(now)
+    assert readings.stale_sensors() == ["sensor.battery"]
+    assert readings.aggregate(AGGREGATION_MIN, now) == 5.0
+    assert readings.count == 1
+    assert readings.sensor_temperatures() == {"sensor.a": 5.0}
+    assert readings.last_updated("sensor.battery") is None
+
+    # A new reading makes the source fresh again and refills its window
+    readings.history_backfill = Mock()
+    hass.states.async_set("sensor.battery", "-2.0")
+    await hass.async_block_till_done()
+    assert readings.stale_sensors() == []
+    assert readings.aggregate(AGGREGATION_MIN, now) == -2.0
+    readings.history_backfill.async_request.assert_called_once_with(
+        readings, ["sensor.battery"]
+    )
+    readings.history_backfill = None
+
+    readings.expire_stale(now + 7200)
+    assert readings.stale_sensors() == ["sensor.a", "sensor.battery"]
+    assert readings.aggregate(AGGREGATION_MIN, now + 7200) is None
+    assert readings.window.sample_count == 0
+    unsub()
+
+
+async def test_repeated_reading_keeps_source_fresh(
+    hass: HomeAssistant, freezer
+) -> None:
+    """Test that a source reporting an unchanged value does not go stale."""
+    hass.states.async_set("sensor.a", "4.0")
+    readings = SourceReadings(hass, ["sensor.a"], 300, max_age=3600)
+    unsub = readings.async_start()
+    updated = readings.last_updated("sensor.a")
+    slot = async_get_multiplexer(hass).slots["sensor.a"]
+
+    # Reported again with the same value, which changes no state
+    slot.async_reported(updated + 3000)
+    readings.expire_stale(updated + 4000)
+    assert readings.stale_sensors() == []
+    assert readings.last_updated("sensor.a") == updated + 3000
+    assert readings.window.sample_count == 1
+
+    readings.expire_stale(updated + 7000)
+    assert readings.stale_sensors() == ["sensor.a"]
+    # A source without a reading is not refreshed by reports
+    hass.states.async_set("sensor.a", "unavailable")
+    await hass.async_block_till_done()
+    slot.async_reported(updated + 7100)
+    assert readings.last_updated("sensor.a") is None
+    unsub()
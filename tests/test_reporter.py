@@ -0,0 +1,225 @@
+"""Test single-flight reporting and the report_now service."""
+import asyncio
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.rapportera_temp.const import (
+    DATA_MULTIPLEXER,
+    DATA_SCHEDULER,
+    DOMAIN,
+    SERVICE_REPORT_NOW,
+)
+
+from . import setup_integration, wait_for_startup_report
+
+
+async def test_overlapping_requests_are_merged(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that requests during an in-flight report merge into one follow-up."""
+    await setup_integration(hass, config_entry)
+    report_url.requests.clear()
+    reporter = config_entry.runtime_data.reporter
+
+    report_url.delay = 0.1
+    for _ in range(5):
+        reporter.async_request_report()
+        await asyncio.sleep(0)
+    await hass.async_block_till_done()
+
+    assert len(report_url.requests) == 2
+    assert reporter._task is None
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_report_now_debounces_bursts(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that a burst of report_now calls results in one upload."""
+    await setup_integration(hass, config_entry)
+    report_url.requests.clear()
+
+    for _ in range(5):
+        await hass.services.async_call(DOMAIN, SERVICE_REPORT_NOW, blocking=True)
+    assert report_url.requests == []
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=5))
+    await hass.async_block_till_done()
+
+    assert report_url.requests == [{"hash": "abc123", "t": "3.4"}]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_report_timeout_cancels_request(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that a hung report is cancelled, recorded as failed and queued."""
+    await setup_integration(hass, config_entry)
+    report_url.requests.clear()
+    runtime = config_entry.runtime_data
+    state = runtime.state
+
+    report_url.delay = 0.2
+    with patch("custom_components.rapportera_temp.reporter.REPORT_TIMEOUT", 0.05):
+        runtime.reporter.async_request_report()
+        await hass.async_block_till_done()
+
+    assert runtime.reporter._task is None
+    assert state.status == "failed"
+    assert state.message.startswith("Report timed out")
+    # The value that timed out is retried
+    assert runtime.reporter.retry_queue.report[1] == 3.4
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    # Let the stand-in finish the abandoned request
+    await asyncio.sleep(0.3)
+
+
+async def test_timeout_before_upload_queues_nothing(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that a report timing out before its upload does not queue an old value."""
+    await setup_integration(hass, config_entry)
+    reporter = config_entry.runtime_data.reporter
+    assert config_entry.runtime_data.state.temperature == 3.4
+
+    async def hang() -> None:
+        await asyncio.sleep(1)
+
+    with patch("custom_components.rapportera_temp.reporter.REPORT_TIMEOUT", 0.05), patch.object(
+        reporter, "async_report", hang
+    ):
+        reporter.async_request_report()
+        await hass.async_block_till_done()
+
+    assert config_entry.runtime_data.state.message.startswith("Report timed out")
+    assert not reporter.retry_queue
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_first_report_waits_for_sources(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that the first report goes out once the sources are available."""
+    hass.states.async_set("sensor.outdoor", "unavailable")
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert report_url.requests == []
+
+    hass.states.async_set("sensor.outdoor", "2.5")
+    await wait_for_startup_report(hass, config_entry)
+    assert report_url.requests == [{"hash": "abc123", "t": "2.5"}]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_first_report_timeout(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that the first report uses the available sources after the timeout."""
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={
+            **config_entry.data,
+            "sensor_entity_ids": ["sensor.outdoor", "sensor.missing"],
+        },
+    )
+    with patch(
+        "custom_components.rapportera_temp.reporter.FIRST_REPORT_TIMEOUT", 0.05
+    ):
+        await setup_integration(hass, config_entry)
+
+    assert report_url.requests == [{"hash": "abc123", "t": "3.4"}]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_stale_readings_are_not_uploaded(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url, freezer
+) -> None:
+    """Test that the upload is skipped when every reading is stale."""
+    hass.config_entries.async_update_entry(
+        config_entry, data={**config_entry.data, "max_age": 1}
+    )
+    await setup_integration(hass, config_entry)
+    assert len(report_url.requests) == 1
+    runtime = config_entry.runtime_data
+    state = runtime.state
+
+    freezer.tick(120)
+    runtime.reporter.async_request_report()
+    await hass.async_block_till_done()
+
+    assert len(report_url.requests) == 1
+    assert state.status == "failed"
+    assert state.stale_sensors == ["sensor.outdoor"]
+    status = hass.states.get("sensor.station_status")
+    assert status.attributes["stale_sensors"] == ["sensor.outdoor"]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_options_are_applied_in_place(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that changed options take effect without reloading the entry."""
+    await setup_integration(hass, config_entry)
+    runtime = config_entry.runtime_data
+    reporter = runtime.reporter
+    readings = runtime.readings
+    samples = list(readings.window.sources["sensor.outdoor"].samples)
+
+    hass.states.async_set("sensor.second", "1.0")
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={
+            **config_entry.data,
+            "sensor_entity_ids": ["sensor.second", "sensor.outdoor"],
+            "aggregation_method": "mean",
+            "entity_name": "Garden",
+            "interval": 1,
+        },
+    )
+    await hass.async_block_till_done()
+
+    assert config_entry.runtime_data is runtime
+    assert runtime.reporter is reporter
+    assert readings.entity_ids == ["sensor.second", "sensor.outdoor"]
+    # The kept source still has its window samples
+    assert list(readings.window.sources["sensor.outdoor"].samples) == samples
+    assert readings.window.window == 60
+    assert hass.data[DATA_SCHEDULER].entries[config_entry.entry_id].interval == 60
+    status = hass.states.get("sensor.station_status")
+    assert status.name == "Garden Status"
+    assert status.attributes["aggregation_method"] == "mean"
+    assert status.attributes["interval_minutes"] == 1
+
+    await reporter.async_tick()
+    assert report_url.requests[-1] == {"hash": "abc123", "t": "2.2"}
+
+    # A removed source is unsubscribed and leaves the aggregates
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={**config_entry.data, "sensor_entity_ids": ["sensor.second"]},
+    )
+    await hass.async_block_till_done()
+    assert list(hass.data[DATA_MULTIPLEXER].slots) == ["sensor.second"]
+    assert readings.statistics().max == 1.0
+
+    # New statistics sensors need the entry to be reloaded
+    hass.config_entries.async_update_entry(
+        config_entry, data={**config_entry.data, "statistics": ["max"]}
+    )
+    await hass.async_block_till_done()
+    await wait_for_startup_report(hass, config_entry)
+    assert config_entry.runtime_data is not runtime
+    assert hass.states.get("sensor.garden_maximum").state == "1.0"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
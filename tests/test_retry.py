@@ -0,0 +1,197 @@
+"""Test the persistent retry queue against a failing stand-in server."""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.rapportera_temp.const import (
+    DATA_SCHEDULER,
+    DOMAIN,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_AGE,
+    RETRY_MAX_DELAY,
+)
+from custom_components.rapportera_temp.retry import backoff_delay
+
+from . import setup_integration, wait_for_startup_report
+
+
+@pytest.fixture
+def max_jitter():
+    """Make the jittered backoff always wait its upper bound."""
+    with patch(
+        "custom_components.rapportera_temp.retry.random.uniform",
+        side_effect=lambda low, high: high,
+    ):
+        yield
+
+
+async def _advance(hass: HomeAssistant, seconds: float) -> None:
+    """Fire timers due within the given number of seconds."""
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=seconds))
+    await hass.async_block_till_done()
+
+
+def test_backoff_delay_is_capped(max_jitter):
+    """Test that the backoff doubles per attempt up to the cap."""
+    delays = [backoff_delay(attempt, RETRY_BASE_DELAY, RETRY_MAX_DELAY) for attempt in range(8)]
+    assert delays[:4] == [30, 60, 120, 240]
+    assert max(delays) == RETRY_MAX_DELAY
+
+
+async def test_retry_backoff_sends_newest_value(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url, max_jitter
+) -> None:
+    """Test that failures back off exponentially and only the newest value is resent."""
+    await setup_integration(hass, config_entry)
+    # Keep wall-clock aligned ticks out of the retry timeline
+    hass.data[DATA_SCHEDULER].entries.pop(config_entry.entry_id)
+    report_url.requests.clear()
+    state = config_entry.runtime_data.state
+    reporter = config_entry.runtime_data.reporter
+
+    report_url.status = 500
+    reporter.async_request_report()
+    await hass.async_block_till_done()
+    assert len(report_url.requests) == 1
+    assert len(reporter.retry_queue) == 1
+
+    # Ticks during the outage replace the queued value without hitting the server
+    hass.states.async_set("sensor.outdoor", "4.5")
+    reporter.async_request_report()
+    await hass.async_block_till_done()
+    assert len(report_url.requests) == 1
+    assert len(reporter.retry_queue) == 1
+    assert state.status == "queued"
+
+    # Retries happen after 30 s, then 60 s more, then 120 s more
+    for delay in (30, 60, 120):
+        requests_before = len(report_url.requests)
+        await _advance(hass, delay - 1)
+        assert len(report_url.requests) == requests_before
+        await _advance(hass, delay + 1)
+        assert len(report_url.requests) == requests_before + 1
+        assert report_url.requests[-1]["t"] == "4.5"
+    assert reporter.retry_queue.attempt == 3
+
+    # Once the server recovers the newest value is sent once, and nothing older
+    report_url.status = 200
+    hass.states.async_set("sensor.outdoor", "5.6")
+    reporter.async_request_report()
+    await hass.async_block_till_done()
+    requests_before = len(report_url.requests)
+    await _advance(hass, 240 + 1)
+    assert [request["t"] for request in report_url.requests[requests_before:]] == ["5.6"]
+    assert not reporter.retry_queue
+    assert reporter.retry_queue.attempt == 0
+    assert reporter.retry_queue.next_retry is None
+    assert state.status == "success"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_retry_waits_for_report_in_flight(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url, max_jitter
+) -> None:
+    """Test that a due retry and a report never upload at the same time."""
+    await setup_integration(hass, config_entry)
+    hass.data[DATA_SCHEDULER].entries.pop(config_entry.entry_id)
+    report_url.requests.clear()
+    reporter = config_entry.runtime_data.reporter
+
+    report_url.status = 500
+    reporter.async_request_report()
+    await hass.async_block_till_done()
+    assert reporter.retry_queue.report[1] == 3.4
+
+    # The retry comes due just as the next report is requested
+    report_url.status = 200
+    report_url.delay = 0.05
+    hass.states.async_set("sensor.outdoor", "4.5")
+    requests_before = len(report_url.requests)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=RETRY_BASE_DELAY + 1))
+    reporter.async_request_report()
+    await hass.async_block_till_done()
+
+    # The report replaced the queued value and the retry then sent it once
+    assert [request["t"] for request in report_url.requests[requests_before:]] == ["4.5"]
+    assert not reporter.retry_queue
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_retry_backoff_is_capped_at_interval(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url, max_jitter
+) -> None:
+    """Test that a long outage never delays the retry past one report interval."""
+    await setup_integration(hass, config_entry)
+    hass.data[DATA_SCHEDULER].entries.pop(config_entry.entry_id)
+    report_url.requests.clear()
+    reporter = config_entry.runtime_data.reporter
+
+    report_url.status = 500
+    reporter.retry_queue.attempt = 10
+    reporter.async_request_report()
+    await hass.async_block_till_done()
+    assert len(report_url.requests) == 1
+
+    # The entry reports every 5 minutes
+    report_url.status = 200
+    await _advance(hass, 5 * 60 - 1)
+    assert len(report_url.requests) == 1
+    await _advance(hass, 5 * 60 + 1)
+    assert len(report_url.requests) == 2
+    assert not reporter.retry_queue
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+
+async def test_retry_queue_is_persisted_and_expires(
+    hass: HomeAssistant,
+    enable_custom_integrations,
+    config_entry,
+    report_url,
+    hass_storage,
+    max_jitter,
+) -> None:
+    """Test that the queued value survives a reload but is not sent once outdated."""
+    await setup_integration(hass, config_entry)
+    report_url.requests.clear()
+    reporter = config_entry.runtime_data.reporter
+
+    report_url.status = 500
+    for value in range(20):
+        hass.states.async_set("sensor.outdoor", str(value))
+        reporter.async_request_report()
+        await hass.async_block_till_done()
+
+    assert len(report_url.requests) == 1
+    assert reporter.retry_queue.report[1] == 19.0
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    stored = hass_storage[f"{DOMAIN}.retry_{config_entry.entry_id}"]
+    assert [report[1] for report in stored["data"]["reports"]] == [19.0]
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    hass.data[DATA_SCHEDULER].entries.pop(config_entry.entry_id)
+    await wait_for_startup_report(hass, config_entry)
+    reporter = config_entry.runtime_data.reporter
+    assert reporter.retry_queue.report[1] == 19.0
+
+    # A value from longer ago than RETRY_MAX_AGE is dropped, not sent as current
+    report_url.status = 200
+    reporter.retry_queue.report = (dt_util.utcnow().timestamp() - RETRY_MAX_AGE - 1, 19.0)
+    requests_before = len(report_url.requests)
+    await _advance(hass, RETRY_BASE_DELAY + 1)
+    assert not reporter.retry_queue
+    assert all(request["t"] != "19.0" for request in report_url.requests[requests_before:])
+
+    # Deleting the entry removes its stored queue
+    await hass.config_entries.async_remove(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert f"{DOMAIN}.retry_{config_entry.entry_id}" not in hass_storage
@@ -0,0 +1,79 @@
+"""Test the integration-wide report scheduler."""
+import asyncio
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.rapportera_temp.const import (
+    DATA_SCHEDULER,
+    SCHEDULER_JITTER_WINDOW,
+)
+from custom_components.rapportera_temp.scheduler import (
+    async_get_scheduler,
+    jitter_offset,
+    next_due,
+)
+
+
+def test_ticks_are_aligned_and_jittered():
+    """Test that ticks land on the interval grid plus a stable per-hash offset."""
+    offsets = [jitter_offset(f"hash{index}", 300) for index in range(100)]
+    assert offsets == [jitter_offset(f"hash{index}", 300) for index in range(100)]
+    assert all(0 <= offset < SCHEDULER_JITTER_WINDOW for offset in offsets)
+    # Stations are spread over the window, not bunched together
+    assert max(offsets) - min(offsets) > SCHEDULER_JITTER_WINDOW * 0.8
+
+    offset = offsets[0]
+    due = next_due(1_000_000.0, 300, offset)
+    assert due > 1_000_000.0
+    assert due - offset == 300 * round((due - offset) / 300)
+    assert next_due(due, 300, offset) == due + 300
+
+
+async def test_due_entries_run_under_concurrency_cap(hass: HomeAssistant) -> None:
+    """Test that due entries run concurrently but never above the cap."""
+    running = 0
+    peak = 0
+    runs = []
+
+    def make_action(name):
+        async def action():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            runs.append(name)
+            running -= 1
+
+        return action
+
+    with patch("custom_components.rapportera_temp.scheduler.SCHEDULER_CONCURRENCY", 3):
+        scheduler = async_get_scheduler(hass)
+        # Entries with the same hash are due at the same moment
+        removers = [
+            scheduler.async_add(f"entry{index}", 60, "shared", make_action(index))
+            for index in range(10)
+        ]
+
+    # Every entry is due within one interval plus the jitter window
+    now = dt_util.utcnow()
+    for second in range(0, 111, 5):
+        async_fire_time_changed(hass, now + timedelta(seconds=second))
+        await hass.async_block_till_done()
+    await asyncio.sleep(0.1)
+
+    assert set(runs) == set(range(10))
+    assert peak == 3
+
+    # Removing the last entry tears the scheduler down
+    runs_before_removal = len(runs)
+    for remove in removers:
+        remove()
+    assert DATA_SCHEDULER not in hass.data
+
+    async_fire_time_changed(hass, now + timedelta(seconds=300))
+    await hass.async_block_till_done()
+    assert len(runs) == runs_before_removal
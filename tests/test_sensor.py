@@ -0,0 +1,125 @@
+"""Test the sensor platform for RapporteraTempHA."""
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.rapportera_temp.const import MAX_MESSAGE_LENGTH
+
+from . import setup_integration
+
+# Polling interval HA used for these entities while should_poll was True
+POLL_INTERVAL = timedelta(seconds=30)
+REPORT_INTERVAL = timedelta(minutes=5)
+
+
+async def test_state_written_once_per_report(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that entities write state once per report instead of every poll."""
+    writes = []
+    original_write = Entity._async_write_ha_state
+
+    def count_write(self):
+        writes.append(self.entity_id)
+        original_write(self)
+
+    with patch.object(Entity, "_async_write_ha_state", count_write):
+        await setup_integration(hass, config_entry)
+        # The source was available, so the first report went out on startup
+        assert len(report_url.requests) == 1
+
+        # Step at the old polling rate until the first aligned report
+        now = dt_util.utcnow()
+        step = 0
+        while len(report_url.requests) < 2:
+            step += 1
+            async_fire_time_changed(hass, now + POLL_INTERVAL * step)
+            await hass.async_block_till_done()
+        writes.clear()
+
+        # Then step through one full reporting interval
+        polls = int(REPORT_INTERVAL / POLL_INTERVAL)
+        for step in range(step + 1, step + polls + 1):
+            async_fire_time_changed(hass, now + POLL_INTERVAL * step)
+            await hass.async_block_till_done()
+
+    assert len(report_url.requests) == 3
+    assert report_url.requests[2] == {"hash": "abc123", "t": "3.4"}
+    # Polling would have written each of the two entities `polls` times
+    assert sorted(writes) == [
+        "sensor.station_status",
+        "sensor.station_temperature",
+    ]
+    assert len(writes) < 2 * polls
+
+    assert hass.states.get("sensor.station_status").state == "success"
+    assert hass.states.get("sensor.station_temperature").state == "3.4"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_volatile_attributes_not_recorded(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that per-report attributes are unrecorded and messages are capped."""
+    await setup_integration(hass, config_entry)
+
+    report_url.status = 500
+    report_url.text = "x" * 2000
+    reporter = config_entry.runtime_data.reporter
+    reporter.async_request_report()
+    await hass.async_block_till_done()
+
+    status = hass.states.get("sensor.station_status")
+    assert status.state == "failed"
+    assert len(status.attributes["last_update_message"]) == MAX_MESSAGE_LENGTH
+    assert {
+        "last_update_message",
+        "last_update_time",
+        "sensor_temperatures",
+    } <= status.state_info["unrecorded_attributes"]
+
+    temperature = hass.states.get("sensor.station_temperature")
+    assert temperature.attributes["sensor_temperatures"] == {"sensor.outdoor": 3.4}
+    assert "sensor_temperatures" in temperature.state_info["unrecorded_attributes"]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_statistic_sensors(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that the chosen statistics get sensors without extra uploads."""
+    hass.states.async_set("sensor.second", "7.4")
+    hass.config_entries.async_update_entry(
+        config_entry,
+        data={
+            **config_entry.data,
+            "sensor_entity_ids": ["sensor.outdoor", "sensor.second"],
+            "statistics": ["max", "spread"],
+        },
+    )
+    await setup_integration(hass, config_entry)
+
+    assert report_url.requests == [{"hash": "abc123", "t": "3.4"}]
+    assert hass.states.get("sensor.station_temperature").state == "3.4"
+    assert hass.states.get("sensor.station_maximum").state == "7.4"
+    spread = hass.states.get("sensor.station_spread")
+    assert spread.state == "4.0"
+    assert "device_class" not in spread.attributes
+    assert hass.states.get("sensor.station_minimum") is None
+
+    hass.states.async_set("sensor.second", "unavailable")
+    hass.states.async_set("sensor.outdoor", "unavailable")
+    await config_entry.runtime_data.reporter.async_tick()
+    await hass.async_block_till_done()
+    assert hass.states.get("sensor.station_maximum").state == "unavailable"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
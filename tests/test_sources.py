@@ -0,0 +1,65 @@
+"""Test the index of temperature sources."""
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.rapportera_temp.const import DATA_SOURCE_INDEX
+from custom_components.rapportera_temp.sources import async_get_source_index
+
+from . import setup_integration, wait_for_startup_report
+
+
+async def test_index_follows_entity_registry(hass: HomeAssistant) -> None:
+    """Test that registry changes keep the index current."""
+    registry = er.async_get(hass)
+    registry.async_get_or_create(
+        "sensor", "test", "outdoor", suggested_object_id="outdoor",
+        original_device_class="temperature",
+    )
+    registry.async_get_or_create(
+        "sensor", "test", "humidity", suggested_object_id="humidity",
+        unit_of_measurement="%",
+    )
+    hass.states.async_set("sensor.legacy", "3.0", {"unit_of_measurement": "°F"})
+    hass.states.async_set("binary_sensor.frost", "on", {"device_class": "temperature"})
+
+    index = async_get_source_index(hass)
+    assert index.entity_ids == {"sensor.outdoor", "sensor.legacy"}
+    assert async_get_source_index(hass) is index
+
+    registry.async_get_or_create(
+        "sensor", "test", "shed", suggested_object_id="shed", unit_of_measurement="°C"
+    )
+    registry.async_update_entity("sensor.outdoor", new_entity_id="sensor.garden")
+    registry.async_update_entity("sensor.humidity", device_class="temperature")
+    await hass.async_block_till_done()
+    assert index.entity_ids == {
+        "sensor.garden", "sensor.legacy", "sensor.shed", "sensor.humidity"
+    }
+
+    registry.async_remove("sensor.shed")
+    await hass.async_block_till_done()
+    assert "sensor.shed" not in index
+
+    # Entities without a registry entry are checked by their state
+    hass.states.async_set("sensor.late", "1.0", {"device_class": "temperature"})
+    assert "sensor.late" in index
+    assert "sensor.missing" not in index
+
+
+async def test_index_dropped_after_last_entry_unloads(
+    hass: HomeAssistant, enable_custom_integrations, config_entry, report_url
+) -> None:
+    """Test that the index stops following the registry when no entry is left."""
+    await setup_integration(hass, config_entry)
+    await wait_for_startup_report(hass, config_entry)
+    index = async_get_source_index(hass)
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert DATA_SOURCE_INDEX not in hass.data
+    er.async_get(hass).async_get_or_create(
+        "sensor", "test", "shed", suggested_object_id="shed", unit_of_measurement="°C"
+    )
+    await hass.async_block_till_done()
+    assert "sensor.shed" not in index.entity_ids
+    assert "sensor.shed" in async_get_source_index(hass)